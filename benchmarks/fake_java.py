@@ -0,0 +1,58 @@
+"""
+不依赖 Java 的替身进程：记录收到的 JVM 参数，按 -Xms（及 -XX:+AlwaysPreTouch）实际占用内存，
+输出一行 ready 后运行一小段时间再退出。供 jvm_bench.py 比较各预设的启动开销。
+环境变量 RTANG_FAKE_JAVA_RECORD 指定参数记录文件，RTANG_FAKE_JAVA_TOUCH_MB 限制最多占用的内存。
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rtang.procstat import memory_info
+
+MB = 1024 * 1024
+
+
+def parse_size(text):
+    units = {"k": 1024, "m": MB, "g": 1024 * MB}
+    text = text.lower()
+    if text[-1:] in units:
+        return int(text[:-1]) * units[text[-1]]
+    return int(text)
+
+
+def main(argv):
+    start = time.perf_counter()
+    jvm_args = []
+    rest = []
+    for i, arg in enumerate(argv):
+        # 与 java 相同：-jar 或第一个非选项参数之后都属于程序本身
+        if arg == "-jar" or not arg.startswith("-"):
+            rest = argv[i:]
+            break
+        jvm_args.append(arg)
+
+    initial = next((parse_size(a[4:]) for a in jvm_args if a.startswith("-Xms")), 0)
+    maximum = next((parse_size(a[4:]) for a in jvm_args if a.startswith("-Xmx")), 0)
+    limit = int(os.environ.get("RTANG_FAKE_JAVA_TOUCH_MB", "256")) * MB
+    # 不预先触碰时 JVM 只提交很小一部分初始堆
+    touch = initial if "-XX:+AlwaysPreTouch" in jvm_args else min(initial, 64 * MB)
+    heap = bytearray(min(touch, limit))
+    print("ready", flush=True)
+    startup_ms = (time.perf_counter() - start) * 1000
+    memory = memory_info()
+
+    record = os.environ.get("RTANG_FAKE_JAVA_RECORD")
+    if record:
+        with open(record, "w", encoding="utf-8") as f:
+            json.dump({"jvm_args": jvm_args, "program": rest, "initial_heap": initial, "max_heap": maximum,
+                       "touched": len(heap), "startup_ms": startup_ms,
+                       "peak_rss": memory and (memory[1] or memory[0])}, f, indent=2)
+    time.sleep(float(os.environ.get("RTANG_FAKE_JAVA_RUN", "0.5")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,144 @@
+"""
+哈希吞吐量基准：在本地生成多 GB 的测试语料（若干大 .pak 和大量小 .jar），按算法、读取方式和线程数组合测量 MB/s。
+用法: python benchmarks/hash_bench.py [--dir DIR] [--size-gb 2] [--algo sha1 sha256] [--method read readinto mmap]
+                                    [--workers 1 4] [--cold] [--output result.json]
+--cold 在每轮前把语料移出页缓存（Linux 用 posix_fadvise，不需要 root），用来估计机械硬盘上的冷启动校验时间。
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rtang import hashing
+
+LARGE_FILE = 256 * 1024 * 1024
+# 大文件占语料总量的比例，其余为 64 KB ~ 4 MB 的小文件
+LARGE_SHARE = 0.7
+
+
+def build_corpus(directory, total_bytes, seed=0):
+    """生成语料并记录在 corpus.json；已存在且总量一致时直接复用"""
+    marker = os.path.join(directory, "corpus.json")
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        if info["total"] == total_bytes and all(os.path.isfile(os.path.join(directory, p)) for p in info["files"]):
+            return [os.path.join(directory, p) for p in info["files"]]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    sizes = []
+    large_total = int(total_bytes * LARGE_SHARE)
+    while sum(sizes) < large_total:
+        sizes.append(min(LARGE_FILE, large_total - sum(sizes)))
+    remaining = total_bytes - sum(sizes)
+    while remaining > 0:
+        size = min(remaining, rng.randint(64 * 1024, 4 * 1024 * 1024))
+        sizes.append(size)
+        remaining -= size
+
+    block = os.urandom(8 * 1024 * 1024)
+    names = []
+    for i, size in enumerate(sizes):
+        name = f"archive{i:03d}.pak" if size > 4 * 1024 * 1024 else f"lib{i:05d}.jar"
+        with open(os.path.join(directory, name), "wb") as f:
+            left = size
+            while left > 0:
+                # 每块错开起点，避免文件之间内容完全相同
+                offset = rng.randrange(len(block) // 2)
+                piece = block[offset:offset + min(left, len(block) - offset)]
+                f.write(piece)
+                left -= len(piece)
+            # 落盘后页缓存才能被清除，--cold 才有效
+            f.flush()
+            os.fsync(f.fileno())
+        names.append(name)
+        print(f"\r生成语料 {i + 1}/{len(sizes)}", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump({"total": total_bytes, "files": names}, f)
+    return [os.path.join(directory, n) for n in names]
+
+
+def evict(paths):
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for path in paths:
+        with open(path, "rb") as f:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return True
+
+
+def hash_read(path, algo):
+    """旧实现：每次 read() 分配新的 1 MB bytes 对象，作为对照"""
+    h = hashlib.new(algo)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def run(paths, algo, method, workers):
+    if method == "read":
+        fn = lambda p: hash_read(p, algo)
+    else:
+        fn = lambda p: hashing.hash_file(p, algo, method=method)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        digests = list(pool.map(fn, paths))
+    return time.perf_counter() - start, digests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", default=os.path.join(tempfile.gettempdir(), "rtang-hash-corpus"))
+    parser.add_argument("--size-gb", type=float, default=2.0)
+    parser.add_argument("--algo", nargs="+", default=hashing.available_algorithms())
+    parser.add_argument("--method", nargs="+", default=["read", "readinto", "mmap", "auto"])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--cold", action="store_true", help="每轮前清除语料的页缓存")
+    parser.add_argument("--output", help="结果保存为 JSON")
+    args = parser.parse_args()
+
+    paths = build_corpus(args.dir, int(args.size_gb * 1024 ** 3))
+    total = sum(os.path.getsize(p) for p in paths)
+    if args.cold and not evict(paths):
+        print("当前平台无法清除页缓存，结果为热缓存数据", file=sys.stderr)
+        args.cold = False
+
+    results = []
+    reference = {}
+    print(f"语料: {len(paths)} 个文件，共 {total / 1024 ** 3:.2f} GB（{'冷' if args.cold else '热'}缓存）")
+    for algo in args.algo:
+        for method in args.method:
+            for workers in args.workers:
+                if args.cold:
+                    evict(paths)
+                elapsed, digests = run(paths, algo, method, workers)
+                # 各方式的结果必须一致
+                if reference.setdefault(algo, digests) != digests:
+                    print(f"{algo}/{method} 的摘要与其他方式不一致", file=sys.stderr)
+                    return 1
+                rate = total / elapsed / 1024 ** 2
+                results.append({"algo": algo, "method": method, "workers": workers,
+                                "seconds": elapsed, "mb_per_s": rate})
+                print(f"{algo:9s} {method:9s} {workers:2d} 线程  {rate:8.1f} MB/s  ({elapsed:.2f} s)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"files": len(paths), "bytes": total, "cold": args.cold, "results": results},
+                      f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+JVM 预设基准：用各预设生成参数，经正常的启动命令拼装和进程监管流程启动 fake_java.py 替身进程，
+记录替身实际收到的参数、首行输出耗时和峰值内存。不需要安装 Java。
+用法: python benchmarks/jvm_bench.py [--preset low-end balanced] [--total-mb 8192 --cpus 4]
+                                    [--runs 3] [--touch-mb 256] [--output result.json]
+--total-mb/--available-mb/--cpus 模拟其他机器的配置，不指定时使用本机检测结果。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rtang import jvm
+from rtang.launch import LaunchConfig, build_command
+from rtang.manifest import Manifest
+from rtang.supervisor import GameSupervisor
+
+FAKE_JAVA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_java.py")
+
+
+def run_once(command, workdir, record, touch_mb):
+    env = dict(os.environ, RTANG_FAKE_JAVA_RECORD=record, RTANG_FAKE_JAVA_TOUCH_MB=str(touch_mb),
+               RTANG_FAKE_JAVA_RUN="0.3")
+    done = threading.Event()
+    supervisor = GameSupervisor(command, workdir, env=env, on_exit=lambda result: done.set(),
+                                crash_dir=os.path.join(workdir, "crashes"))
+    supervisor.start()
+    if not done.wait(60):
+        supervisor.terminate()
+        raise RuntimeError("替身进程超时")
+    result = supervisor.result
+    if result.returncode != 0:
+        raise RuntimeError(f"替身进程退出码 {result.returncode}: {supervisor.snapshot()[-5:]}")
+    with open(record, "r", encoding="utf-8") as f:
+        return result, json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", nargs="+", default=list(jvm.PRESETS))
+    parser.add_argument("--total-mb", type=int)
+    parser.add_argument("--available-mb", type=int)
+    parser.add_argument("--cpus", type=int)
+    parser.add_argument("--memory-mb", type=int, default=0, help="指定堆大小，0 为按预设自动计算")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--touch-mb", type=int, default=256, help="替身进程最多实际占用的内存")
+    parser.add_argument("--output", help="结果保存为 JSON")
+    args = parser.parse_args()
+
+    machine = jvm.detect_machine()
+    machine = jvm.Machine(args.total_mb or machine.total_mb,
+                          args.available_mb or (args.total_mb or machine.available_mb),
+                          args.cpus or machine.cpus)
+    print(f"机器: 内存 {machine.total_mb} MB（可用 {machine.available_mb} MB），{machine.cpus} 核")
+
+    # 与游戏清单相同的写法，参数由 build_command 展开
+    manifest = Manifest("bench", [], "", {"command": [sys.executable, FAKE_JAVA, "{jvm_args}",
+                                                      "-jar", "{game_dir}/bin/game.jar"]})
+    results = []
+    with tempfile.TemporaryDirectory(prefix="rtang-jvm-") as workdir:
+        record = os.path.join(workdir, "args.json")
+        for key in args.preset:
+            jvm_args = jvm.build_jvm_args(key, machine, args.memory_mb)
+            config = LaunchConfig(game_dir=workdir, jvm_args=jvm_args)
+            command = build_command(manifest, config)
+            startups, peaks = [], []
+            for _ in range(args.runs):
+                result, received = run_once(command, workdir, record, args.touch_mb)
+                if received["jvm_args"] != jvm_args:
+                    print(f"{key}: 替身收到的参数与生成的不一致: {received['jvm_args']}", file=sys.stderr)
+                    return 1
+                startups.append(result.startup_ms or 0.0)
+                # 监管线程每秒才采样一次，替身进程运行时间短，以它自己记录的峰值为准
+                peaks.append(max(result.peak_rss or 0, received["peak_rss"] or 0))
+            entry = {"preset": key, "jvm_args": jvm_args, "received": received,
+                     "startup_ms": statistics.median(startups), "peak_rss": max(peaks)}
+            results.append(entry)
+            print(f"{key:16s} 首行 {entry['startup_ms']:7.1f} ms  峰值内存 {entry['peak_rss'] / 1024 ** 2:7.1f} MB")
+            print(f"  {jvm.format_args(jvm_args)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine._asdict(), "runs": args.runs, "results": results},
+                      f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+模组同步基准：生成 --mods 个 zip 格式的模组组成的镜像，先完整同步一次，再把其中 --changed 个模组改几个条目并升级版本号
+（文件名随之改变）、删掉一个、新增一个后重新同步，比较增量同步实际传输的字节数与这些文件的完整大小。
+镜像分别用本地 HTTP 服务器（支持 Range）和本地目录各跑一遍；最后模拟替换中途退出，检查下次同步前能按日志补完。
+不会动用户数据目录。
+用法: python benchmarks/modsync_bench.py [--mods 12] [--mod-mb 4] [--changed 3] [--entries 64] [--output result.json]
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator_bench import _MirrorHandler
+from rtang.launch import LaunchConfig
+from rtang.modsync import SYNC_DIR, build_manifest, finish_pending, sync_mods
+
+
+def write_mod(path, seed, entries, size, changed=()):
+    """写一个不压缩的 zip 模组；changed 中的条目内容换成别的随机数据"""
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as z:
+        for i in range(entries):
+            data = rng.randbytes(size // entries)
+            if i in changed:
+                data = random.Random(f"{seed}-{i}-new").randbytes(len(data) + 1000)
+            z.writestr(f"assets/{seed}/entry{i:03d}.bin", data)
+
+
+def build_versions(root, args):
+    """镜像的旧版本和新版本，返回 (旧版本目录, 新版本目录, 新版本中变化文件的总大小)"""
+    old = os.path.join(root, "mirror-old")
+    new = os.path.join(root, "mirror-new")
+    size = args.mod_mb * 1024 * 1024
+    rng = random.Random(0)
+    changed = set(rng.sample(range(args.mods - 1), args.changed))
+    os.makedirs(new, exist_ok=True)
+    for i in range(args.mods):
+        write_mod(os.path.join(old, f"mod{i:02d}-1.0.jar"), f"mod{i}", args.entries, size)
+        if i == args.mods - 1:
+            # 新版本中删除
+            continue
+        if i in changed:
+            edits = set(rng.sample(range(args.entries), 2))
+            write_mod(os.path.join(new, f"mod{i:02d}-1.1.jar"), f"mod{i}", args.entries, size, edits)
+        else:
+            shutil.copyfile(os.path.join(old, f"mod{i:02d}-1.0.jar"), os.path.join(new, f"mod{i:02d}-1.0.jar"))
+    write_mod(os.path.join(new, "extra-1.0.jar"), "extra", args.entries, size)
+    os.makedirs(os.path.join(new, "config"))
+    with open(os.path.join(new, "config", "extra.toml"), "w", encoding="utf-8") as f:
+        f.write("enabled = true\n")
+    build_manifest(old, version="1.0")
+    build_manifest(new, version="1.1", exclusive=True)
+    changed_bytes = sum(os.path.getsize(os.path.join(new, f"mod{i:02d}-1.1.jar")) for i in changed)
+    changed_bytes += os.path.getsize(os.path.join(new, "extra-1.0.jar"))
+    return old, new, changed_bytes
+
+
+def run(name, base_old, base_new, mods_dir, changed_bytes, counter=None):
+    """
+    先同步旧版本，放入一个清单外的文件，再同步新版本，返回结果字典。
+    counter() 返回镜像至今发送的字节数；目录镜像没有网络传输，取同步报告的下载字节数。
+    """
+    config = LaunchConfig(game_dir=os.path.dirname(mods_dir), mods_dir=mods_dir, use_store=False)
+    config.mods_manifest = base_old
+    sync_mods(config)
+    with open(os.path.join(mods_dir, "manual.jar"), "wb") as f:
+        f.write(b"not in manifest")
+    before = counter() if counter is not None else 0
+    config.mods_manifest = base_new
+    start = time.perf_counter()
+    result = sync_mods(config)
+    elapsed = time.perf_counter() - start
+    sent = counter() - before if counter is not None else result.downloaded
+    print(f"{name:5s} 更新 {result.updated} 个、删除 {result.removed} 个、移走 {result.disabled} 个，"
+          f"耗时 {elapsed:.2f} s；传输 {sent / 1048576:.2f} MB，变化文件共 {changed_bytes / 1048576:.2f} MB，"
+          f"复用本地 {result.reused / 1048576:.2f} MB")
+    return {"mirror": name, "seconds": round(elapsed, 3), "sent": sent, "changed_bytes": changed_bytes,
+            **result._asdict()}
+
+
+def same_tree(a, b):
+    """两个目录（不含同步目录、清单和签名）的内容是否相同"""
+    def files(root):
+        found = {}
+        for dirpath, dirnames, filenames in os.walk(root):
+            if SYNC_DIR in dirnames:
+                dirnames.remove(SYNC_DIR)
+            for name in filenames:
+                if name == "manifest.json" or name.endswith(".rtsig"):
+                    continue
+                with open(os.path.join(dirpath, name), "rb") as f:
+                    found[os.path.relpath(os.path.join(dirpath, name), root)] = f.read()
+        return found
+    return files(a) == files(b)
+
+
+def check_recovery(root, old, new):
+    """新文件在 staging 就绪、日志已写入但只替换了一个文件时退出：下次 finish_pending 应补完全部替换"""
+    import rtang.modsync as modsync
+    mods_dir = os.path.join(root, "mods-recovery")
+    config = LaunchConfig(game_dir=root, mods_dir=mods_dir, use_store=False,
+                          mods_manifest=os.path.join(old, "manifest.json"))
+    sync_mods(config)
+    real_apply = modsync._apply
+    calls = []
+
+    def crash(mods, journal):
+        calls.append(journal)
+        path = next(p for p in journal["replace"] if "/" not in p)
+        os.replace(os.path.join(mods, SYNC_DIR, "staging", path), os.path.join(mods, path))
+        raise KeyboardInterrupt("模拟中途退出")
+
+    modsync._apply = crash
+    config.mods_manifest = os.path.join(new, "manifest.json")
+    try:
+        sync_mods(config)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        modsync._apply = real_apply
+    pending = os.path.exists(os.path.join(mods_dir, SYNC_DIR, "journal.json"))
+    finished = finish_pending(mods_dir)
+    ok = bool(calls) and pending and finished and same_tree(mods_dir, new)
+    print(f"中途退出后补完: {'通过' if ok else '失败'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mods", type=int, default=12)
+    parser.add_argument("--mod-mb", type=int, default=4)
+    parser.add_argument("--changed", type=int, default=3, help="升级的模组数，每个改动两个条目")
+    parser.add_argument("--entries", type=int, default=64, help="每个模组的条目数")
+    parser.add_argument("--output", help="结果保存为 JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="rtang-mods-") as root:
+        os.environ["RTANG_DATA_DIR"] = os.path.join(root, "data")
+        old, new, changed_bytes = build_versions(root, args)
+        handler = functools.partial(_MirrorHandler, directory=root)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        results = [run("http", f"{base}/mirror-old/manifest.json", f"{base}/mirror-new/manifest.json",
+                       os.path.join(root, "mods-http"), changed_bytes, lambda: _MirrorHandler.sent)]
+        results.append(run("dir", os.path.join(old, "manifest.json"), os.path.join(new, "manifest.json"),
+                           os.path.join(root, "mods-dir"), changed_bytes))
+        server.shutdown()
+
+        ok = all(same_tree(os.path.join(root, f"mods-{r['mirror']}"), new) for r in results)
+        # 升级的模组只改了两个条目，增量应远小于完整下载；新增的 extra 没有旧版本，只能完整下载
+        ok = ok and all(r["sent"] < changed_bytes * 0.6 for r in results)
+        # 升级的模组换了文件名，旧文件与删除的模组一起移除；手动放入的文件被移走
+        ok = ok and all(r["removed"] == args.changed + 1 and r["disabled"] == 1 for r in results)
+        ok = check_recovery(root, old, new) and ok
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        if not ok:
+            print("检查未通过", file=sys.stderr)
+        return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+多配置档启动基准：本地 HTTP 镜像提供 --versions 个版本的测试清单，N 个配置档轮流使用这些版本、各用自己的游戏目录，
+经 LaunchOrchestrator 并行准备、错峰启动 fake_java.py 替身进程。记录每个配置档的准备耗时、启动时刻和镜像实际传输的字节数，
+检查同时准备的配置档不超过 --parallel、每个版本的文件只下载一次、两次启动的间隔不小于 --stagger。
+不需要安装 Java，也不会动用户数据目录。
+用法: python benchmarks/orchestrator_bench.py [--profiles 4] [--versions 2] [--parallel 2] [--stagger 0.5]
+                                             [--files 40] [--file-kb 512] [--shared-dir] [--output result.json]
+--shared-dir 让同一版本的配置档使用同一个游戏目录（同一版本的多个账号）。
+"""
+import argparse
+import functools
+import hashlib
+import http.server
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rtang.launch import STAGE_SPAWN, LaunchConfig
+from rtang.orchestrator import CANCELLED, EXITED, FAILED, PENDING, PREPARING, RUNNING, LaunchOrchestrator
+
+FAKE_JAVA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_java.py")
+
+
+class _MirrorHandler(http.server.SimpleHTTPRequestHandler):
+    """静态文件镜像，支持下载器用到的单段 Range 请求，并统计发送的正文字节数"""
+    sent = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        try:
+            f = open(self.translate_path(self.path), "rb")
+        except OSError:
+            self.send_error(404)
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = 0, size - 1
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if match:
+                start = int(match[1])
+                end = min(end, int(match[2])) if match[2] else end
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            f.seek(start)
+            data = f.read(end - start + 1)
+        self.wfile.write(data)
+        if not (match and end == start == 0):
+            # 下载器探测大小的 1 字节请求不计入
+            with self.lock:
+                _MirrorHandler.sent += len(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_mirror(root, version, count, size):
+    """生成一个版本的镜像文件和清单，返回清单路径"""
+    rng = random.Random(version)
+    files = []
+    for i in range(count):
+        path = f"assets/pack{i:03d}.bin"
+        data = rng.randbytes(size)
+        full = os.path.join(root, "mirror", f"v{version}", *path.split("/"))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as f:
+            f.write(data)
+        files.append({"path": path, "size": size, "sha256": hashlib.sha256(data).hexdigest()})
+    manifest = {"version": "bench", "files": files,
+                "launch": {"command": [sys.executable, FAKE_JAVA, "{jvm_args}", "-jar", "{game_dir}/bin/game.jar"]}}
+    path = os.path.join(root, f"manifest-v{version}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=4)
+    parser.add_argument("--versions", type=int, default=2)
+    parser.add_argument("--parallel", type=int, default=2)
+    parser.add_argument("--stagger", type=float, default=0.5, help="两次启动之间的最小间隔（秒）")
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--file-kb", type=int, default=512)
+    parser.add_argument("--run", type=float, default=1.0, help="替身进程的运行时间（秒）")
+    parser.add_argument("--shared-dir", action="store_true", help="所有配置档使用同一个游戏目录")
+    parser.add_argument("--output", help="结果保存为 JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="rtang-orch-") as root:
+        # 校验账本和资源仓库都放在临时目录
+        os.environ["RTANG_DATA_DIR"] = os.path.join(root, "data")
+        os.environ["RTANG_FAKE_JAVA_RUN"] = str(args.run)
+        os.environ["RTANG_FAKE_JAVA_TOUCH_MB"] = "16"
+        manifests = [build_mirror(root, v, args.files, args.file_kb * 1024) for v in range(args.versions)]
+        handler = functools.partial(_MirrorHandler, directory=os.path.join(root, "mirror"))
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        mirror = f"http://127.0.0.1:{server.server_port}"
+
+        events = []
+        spawned = {}
+        done = threading.Event()
+        lock = threading.Lock()
+        ids = [f"p{i}" for i in range(args.profiles)]
+
+        def on_state(state):
+            now = time.perf_counter()
+            with lock:
+                events.append((now, state))
+                if state.status == RUNNING:
+                    spawned[state.profile_id] = now
+                finished = {s.profile_id for _, s in events if s.status in (EXITED, FAILED, CANCELLED)}
+            if finished >= set(ids):
+                done.set()
+
+        orchestrator = LaunchOrchestrator(on_state, args.parallel, args.stagger)
+        start = time.perf_counter()
+        for i, profile_id in enumerate(ids):
+            version = i % args.versions
+            game_dir = os.path.join(root, f"game-v{version}" if args.shared_dir else f"game-{profile_id}")
+            config = LaunchConfig(game_dir=game_dir, mirror=f"{mirror}/v{version}", manifest=manifests[version],
+                                  jvm_args=["-Xmx64m"],
+                                  game_args=["--profile", profile_id], env={"RTANG_PROFILE": profile_id})
+            orchestrator.submit(profile_id, config)
+        finished = done.wait(120)
+        total = time.perf_counter() - start
+        orchestrator.shutdown()
+        server.shutdown()
+        if not finished:
+            print("超时：仍有配置档未结束", file=sys.stderr)
+            return 1
+
+        results = []
+        for profile_id in ids:
+            own = [(t, s) for t, s in events if s.profile_id == profile_id]
+            final = own[-1][1]
+            prepared = next((t for t, s in own if s.stage == STAGE_SPAWN or s.status not in PENDING), own[-1][0])
+            results.append({"profile": profile_id, "status": final.status, "returncode": final.returncode,
+                            "message": final.message, "prepare_s": round(prepared - start, 3),
+                            "spawned_s": round(spawned[profile_id] - start, 3) if profile_id in spawned else None})
+        # 同时准备（读取清单、校验、下载）的配置档数的峰值；等待错峰启动的不占名额
+        preparing, peak = set(), 0
+        for _, state in events:
+            if state.status == PREPARING and state.stage != STAGE_SPAWN:
+                preparing.add(state.profile_id)
+            else:
+                preparing.discard(state.profile_id)
+            peak = max(peak, len(preparing))
+        times = sorted(spawned.values())
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        manifest_bytes = min(args.versions, args.profiles) * args.files * args.file_kb * 1024
+
+        for r in results:
+            print(f"{r['profile']:4s} {r['status']:9s} 准备 {r['prepare_s']:6.2f} s  启动于 "
+                  f"{r['spawned_s'] if r['spawned_s'] is not None else '-':>6} s  {r['message']}")
+        print(f"总耗时 {total:.2f} s，同时准备的峰值 {peak}（上限 {args.parallel}）")
+        print(f"镜像传输 {_MirrorHandler.sent / 1048576:.1f} MB，各版本清单合计 {manifest_bytes / 1048576:.1f} MB")
+        if gaps:
+            print(f"启动间隔 最小 {min(gaps):.2f} s / 最大 {max(gaps):.2f} s（要求 ≥ {args.stagger:.2f} s）")
+
+        ok = all(r["status"] == EXITED and r["returncode"] == 0 for r in results)
+        ok = ok and peak <= args.parallel and all(g >= args.stagger - 0.01 for g in gaps)
+        ok = ok and _MirrorHandler.sent <= manifest_bytes
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"args": vars(args), "total_s": total, "peak_parallel": peak, "spawn_gaps": gaps,
+                           "mirror_bytes": _MirrorHandler.sent, "results": results}, f, ensure_ascii=False, indent=2)
+        if not ok:
+            print("检查未通过", file=sys.stderr)
+        return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
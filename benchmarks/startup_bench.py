@@ -0,0 +1,67 @@
+"""
+启动基准：无界面（QT_QPA_PLATFORM=offscreen）多次启动客户端，统计到首帧的耗时。
+用法: python benchmarks/startup_bench.py [--runs 5] [--budget-ms 300] [--eager-init] [--output result.json]
+中位数超出预算时返回码为 1，可直接接入自动化流程。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(eager):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    # --new-instance：不把参数转交给可能正在运行的客户端
+    cmd = [sys.executable, os.path.join(ROOT, "main.py"), f"--profile-startup={path}", "--quit-after-first-frame",
+           "--new-instance"]
+    if eager:
+        cmd.append("--eager-init")
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    start = time.perf_counter()
+    try:
+        subprocess.run(cmd, cwd=ROOT, env=env, check=True, timeout=60,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wall_ms = (time.perf_counter() - start) * 1000
+        with open(path, "r", encoding="utf-8") as f:
+            marks = {m["name"]: m["at_ms"] for m in json.load(f)["marks"]}
+    finally:
+        os.remove(path)
+    return wall_ms, marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="首帧耗时中位数上限")
+    parser.add_argument("--eager-init", action="store_true", help="测量不延迟初始化时的耗时")
+    parser.add_argument("--output", help="结果保存为 JSON")
+    args = parser.parse_args()
+
+    runs = [run_once(args.eager_init) for _ in range(args.runs)]
+    names = list(runs[0][1])
+    phases = {name: statistics.median(marks.get(name, 0.0) for _, marks in runs) for name in names}
+    first_frame = phases.get("首帧", 0.0)
+    wall = statistics.median(wall for wall, _ in runs)
+
+    for name, at in phases.items():
+        print(f"{at:8.1f} ms  {name}")
+    print(f"首帧中位数 {first_frame:.1f} ms（预算 {args.budget_ms:.0f} ms），含解释器启动的进程总耗时 {wall:.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"runs": args.runs, "eager_init": args.eager_init, "phases_ms": phases,
+                       "first_frame_ms": first_frame, "process_wall_ms": wall, "budget_ms": args.budget_ms},
+                      f, ensure_ascii=False, indent=2)
+    return 0 if first_frame <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+主题与提示框样式基准：无界面下创建主窗口和全部延迟页面，测量
+1) 每次读取文件并整表 setStyleSheet 与 ThemeManager（缓存、压缩、冻结重绘）切换主题的耗时；
+2) 提示框淡出时用内联 setStyleSheet 与用动态属性只重新套用单个控件样式的耗时。
+用法: python benchmarks/theme_bench.py [--switches 20] [--fades 2000] [--output result.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PySide6.QtWidgets import QApplication, QLabel, QWidget
+
+from rtang.settings import Settings
+from rtang.theme import THEMES, ThemeManager, set_state
+
+
+def timed(fn, app, repeat):
+    """分别统计操作本身（样式解析和套用）和随后重绘的耗时"""
+    apply_ms, paint_ms = [], []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        applied = time.perf_counter()
+        app.processEvents()
+        apply_ms.append((applied - start) * 1000)
+        paint_ms.append((time.perf_counter() - applied) * 1000)
+    return {"apply_median_ms": round(statistics.median(apply_ms), 3), "apply_max_ms": round(max(apply_ms), 3),
+            "paint_median_ms": round(statistics.median(paint_ms), 3),
+            "total_ms": round(sum(apply_ms) + sum(paint_ms), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--switches", type=int, default=20)
+    parser.add_argument("--fades", type=int, default=2000)
+    parser.add_argument("--output", help="结果保存为 JSON")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    styles = os.path.join(ROOT, "styles")
+    themes = ThemeManager(app, styles)
+    themes.apply("pink")
+
+    import main as client
+    workdir = tempfile.mkdtemp(prefix="rtang-theme-")
+    settings = Settings(os.path.join(workdir, "settings.json"), os.path.join(workdir, "defaults.json"))
+    win = client.RTangClient(settings=settings, themes=themes)
+    win.resize(1280, 720)
+    win.show()
+    for page in (win.PAGE_PLAYLIST, win.PAGE_LOG, win.PAGE_SETTINGS, win.PAGE_HOME):
+        win.switch_page(page)
+        app.processEvents()
+    widgets = len(win.findChildren(QWidget))
+    keys = list(THEMES)
+
+    def reload_raw(i):
+        with open(os.path.join(styles, THEMES[keys[i % len(keys)]][1]), "r", encoding="utf-8") as f:
+            app.setStyleSheet(f.read())
+
+    results = {
+        "theme_switch_raw": timed(reload_raw, app, args.switches),
+        "theme_switch_manager": timed(lambda i: themes.apply(keys[i % len(keys)]), app, args.switches),
+    }
+    themes.apply("pink")
+
+    # 模拟提示框池：淡出时改样式，回收时恢复
+    labels = []
+    for _ in range(10):
+        label = QLabel("提示", win)
+        label.setObjectName("toastLabel")
+        label.show()
+        labels.append(label)
+    app.processEvents()
+
+    def fade_inline(i):
+        label = labels[i % len(labels)]
+        label.setStyleSheet("border: none; background-color: #FFABC1; border-radius: 12px;")
+        label.setStyleSheet("")
+
+    def fade_property(i):
+        label = labels[i % len(labels)]
+        set_state(label, "fading", True)
+        set_state(label, "fading", False)
+
+    results["toast_fade_inline"] = timed(fade_inline, app, args.fades)
+    results["toast_fade_property"] = timed(fade_property, app, args.fades)
+
+    print(f"主窗口中的控件数: {widgets}")
+    for name, value in results.items():
+        print(f"{name:22s} 套用 中位 {value['apply_median_ms']:8.3f} ms  最大 {value['apply_max_ms']:8.3f} ms  "
+              f"重绘 中位 {value['paint_median_ms']:7.3f} ms  合计 {value['total_ms']:9.1f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(dict(results, widgets=widgets, theme_stats=themes.stats), f, ensure_ascii=False, indent=2)
+    win.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
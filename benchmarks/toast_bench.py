@@ -0,0 +1,66 @@
+"""
+提示框压力测试：无界面下连续发出 10000 条提示（重复消息与不同消息混合），
+统计总耗时、创建的控件数、布局次数和启动的动画数。
+用法: python benchmarks/toast_bench.py [--count 10000] [--unique 0.2] [--output result.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QElapsedTimer
+from PySide6.QtWidgets import QApplication, QWidget
+
+from rtang.toast import ToastManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--unique", type=float, default=0.2, help="不同消息所占比例，其余为重复的“正在播放”类消息")
+    parser.add_argument("--output", help="结果保存为 JSON")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    window = QWidget()
+    window.resize(1280, 720)
+    window.show()
+    manager = ToastManager(window, lifetime=500)
+
+    rng = random.Random(0)
+    repeated = [f"正在播放: 歌曲 {i}" for i in range(5)]
+    start = time.perf_counter()
+    for i in range(args.count):
+        if rng.random() < args.unique:
+            manager.show(f"已校验文件 {i}")
+        else:
+            manager.show(rng.choice(repeated))
+        # 每 50 条让出一次事件循环，模拟来自后台线程的持续消息
+        if i % 50 == 0:
+            app.processEvents()
+    fire_ms = (time.perf_counter() - start) * 1000
+
+    # 等待所有提示过期并淡出
+    timer = QElapsedTimer()
+    timer.start()
+    while (manager.active or manager.fading_count()) and timer.elapsed() < 10000:
+        app.processEvents()
+    drain_ms = (time.perf_counter() - start) * 1000 - fire_ms
+
+    result = dict(manager.stats, count=args.count, fire_ms=round(fire_ms, 1), drain_ms=round(drain_ms, 1),
+                  per_toast_us=round(fire_ms * 1000 / args.count, 2))
+    for key, value in result.items():
+        print(f"{key:>16}: {value}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+界面性能基准：无界面（QT_QPA_PLATFORM=offscreen）创建 RTangClient，按脚本执行页面切换、提示框连发、
+音乐图标旋转和拖动窗口，记录每帧绘制耗时、事件循环延迟和内存分配，结果保存为 JSON 以便在提交之间比较。
+用法: python benchmarks/ui_bench.py [--scenario page_switch toast_burst] [--output result.json]
+                                  [--compare baseline.json --tolerance 0.25] [--tracemalloc]
+--compare 时任一场景的 p95 帧耗时、p95 事件循环延迟或残留的 QObject 数超出基线 (1 + tolerance) 倍则返回码为 1。
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# 不读写用户自己的数据目录和设置
+os.environ.setdefault("RTANG_DATA_DIR", tempfile.mkdtemp(prefix="rtang-ui-bench-"))
+
+import PySide6
+from PySide6.QtCore import QEvent, QEventLoop, QObject, QPoint, QPointF, Qt, QTimer
+from PySide6.QtGui import QColor, QMouseEvent, QPainter, QPixmap
+from PySide6.QtWidgets import QApplication
+
+from rtang.procstat import memory_info
+
+# 事件循环探针的间隔（毫秒）
+PROBE_INTERVAL = 5
+# 比较时使用的指标及其下限：基线低于下限时按下限比较，避免噪声被放大。
+# Python 内存块数受缓存和首次运行影响较大，只记录不比较；残留的 QObject 数是确定的，用来发现泄漏
+COMPARE_METRICS = ((("paint_ms", "p95"), 1.0), (("loop_latency_ms", "p95"), 1.0), (("allocations", "qobjects"), 10))
+
+
+class FrameRecorder(QObject):
+    """
+    拦截顶层窗口的 UpdateRequest 并由自己交给窗口处理：Qt 在其中同步绘制整个窗口，耗时即一帧的绘制时间。
+    不重写 QApplication.notify，后台线程的事件不会因此进入 Python 争抢 GIL。
+    """
+
+    def __init__(self, window):
+        super().__init__()
+        self.frames = []
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.UpdateRequest:
+            start = time.perf_counter()
+            obj.event(event)
+            self.frames.append((start, time.perf_counter() - start))
+            return True
+        return False
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(values):
+    return {"count": len(values), "median": round(statistics.median(values), 3) if values else 0.0,
+            "p95": round(percentile(values, 0.95), 3), "max": round(max(values), 3) if values else 0.0}
+
+
+def page_switch(win, rounds=5):
+    pages = [win.PAGE_PLAYLIST, win.PAGE_LOG, win.PAGE_SETTINGS, win.PAGE_HOME]
+    for _ in range(rounds):
+        for page in pages:
+            win.switch_page(page)
+            # 切换动画 300 毫秒
+            yield 400
+
+
+def toast_burst(win, count=200):
+    for i in range(count):
+        win.show_toast(f"已校验文件 {i % 40}")
+        if i % 10 == 9:
+            yield 1
+    # 等待全部提示过期并淡出
+    deadline = time.monotonic() + 15
+    while (win.toasts.active or win.toasts._fading) and time.monotonic() < deadline:
+        yield 50
+
+
+def music_icon_spin(win, seconds=3.0):
+    if win._music_icon_source.isNull():
+        # 没有图标资源时用生成的图标代替，保证有东西可转
+        pixmap = QPixmap(win.MUSIC_ICON_SIZE * 2, win.MUSIC_ICON_SIZE * 2)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setBrush(QColor("#FF8AAE"))
+        painter.drawEllipse(pixmap.rect().adjusted(4, 4, -4, -4))
+        painter.setBrush(QColor("#FFFFFF"))
+        painter.drawRect(pixmap.width() // 2 - 4, 8, 8, pixmap.height() // 2)
+        painter.end()
+        win._set_music_icon_source(pixmap)
+    win.start_music_icon_animation()
+    yield int(seconds * 1000)
+    win.stop_music_icon_animation()
+    yield 50
+
+
+def window_drag(win, seconds=2.0):
+    start = win.mapToGlobal(win.title_bar.geometry().center())
+    local = QPointF(win.title_bar.geometry().center())
+
+    def send(kind, global_pos, buttons):
+        event = QMouseEvent(kind, local, QPointF(global_pos), Qt.LeftButton, buttons, Qt.NoModifier)
+        QApplication.sendEvent(win, event)
+
+    send(QEvent.MouseButtonPress, start, Qt.LeftButton)
+    steps = int(seconds * 60)
+    for i in range(steps):
+        # 以每帧一次的频率画一个来回
+        offset = (i if i < steps // 2 else steps - i) * 3
+        send(QEvent.MouseMove, start + QPoint(offset, offset // 2), Qt.LeftButton)
+        yield 16
+    send(QEvent.MouseButtonRelease, start, Qt.NoButton)
+    yield 50
+
+
+SCENARIOS = {
+    "page_switch": page_switch,
+    "toast_burst": toast_burst,
+    "music_icon_spin": music_icon_spin,
+    "window_drag": window_drag,
+}
+
+
+class ScenarioRunner(QObject):
+    """在事件循环中逐步执行场景生成器，同时用精确定时器测量事件循环延迟"""
+
+    def __init__(self):
+        super().__init__()
+        self.latencies = []
+        self._last_probe = None
+        self.probe = QTimer(self)
+        self.probe.setTimerType(Qt.PreciseTimer)
+        self.probe.setInterval(PROBE_INTERVAL)
+        self.probe.timeout.connect(self._on_probe)
+
+    def _on_probe(self):
+        now = time.perf_counter()
+        if self._last_probe is not None:
+            self.latencies.append(max(0.0, (now - self._last_probe) * 1000 - PROBE_INTERVAL))
+        self._last_probe = now
+
+    def run(self, steps):
+        loop = QEventLoop()
+
+        def step():
+            try:
+                delay = next(steps)
+            except StopIteration:
+                loop.quit()
+                return
+            QTimer.singleShot(delay, step)
+
+        self.latencies = []
+        self._last_probe = None
+        self.probe.start()
+        QTimer.singleShot(0, step)
+        loop.exec()
+        self.probe.stop()
+        return self.latencies
+
+
+def qobject_count(win):
+    return len(win.findChildren(QObject))
+
+
+def run_scenario(recorder, win, runner, name, use_tracemalloc, budget_ms):
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    objects = qobject_count(win)
+    memory = memory_info()
+    collections = sum(s["collections"] for s in gc.get_stats())
+    if use_tracemalloc:
+        tracemalloc.start()
+    recorder.frames = []
+    start = time.perf_counter()
+    latencies = runner.run(SCENARIOS[name](win))
+    duration = time.perf_counter() - start
+    traced = tracemalloc.get_traced_memory() if use_tracemalloc else None
+    if use_tracemalloc:
+        tracemalloc.stop()
+    gc.collect()
+
+    paint = [d * 1000 for _, d in recorder.frames]
+    starts = [s for s, _ in recorder.frames]
+    intervals = [(b - a) * 1000 for a, b in zip(starts, starts[1:])]
+    after = memory_info()
+    allocations = {
+        # 场景结束并回收垃圾后仍然存在的 Python 内存块和 Qt 对象，持续增长说明有泄漏
+        "python_blocks": sys.getallocatedblocks() - blocks,
+        "qobjects": qobject_count(win) - objects,
+        "gc_collections": sum(s["collections"] for s in gc.get_stats()) - collections,
+        "rss_delta": after[0] - memory[0] if memory and after else None,
+    }
+    if traced is not None:
+        allocations["traced_peak"] = traced[1]
+    return {
+        "duration_s": round(duration, 3),
+        "frames": len(paint),
+        "fps": round(len(paint) / duration, 1) if duration else 0.0,
+        "paint_ms": summarize(paint),
+        "frame_interval_ms": summarize(intervals),
+        # 单帧绘制超过一个刷新周期，在真实屏幕上一定会掉帧
+        "slow_frames": sum(1 for p in paint if p > budget_ms),
+        "loop_latency_ms": summarize(latencies),
+        "allocations": allocations,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for (group, key), floor in COMPARE_METRICS:
+            old, new = base[group][key], current[group][key]
+            limit = max(old, floor) * (1 + tolerance)
+            mark = "回退" if new > limit else "ok"
+            print(f"{name:16s} {group + '.' + key:26s} {old:>10} → {new:>10}  {mark}")
+            if new > limit:
+                regressions.append(f"{name}.{group}.{key}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--size", default="1280x720", help="窗口大小")
+    parser.add_argument("--no-warmup", action="store_true", help="不预先创建延迟页面，把首次创建的开销计入结果")
+    parser.add_argument("--tracemalloc", action="store_true", help="统计 Python 分配峰值（开销较大，会影响耗时）")
+    parser.add_argument("--output", help="结果保存为 JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="与之前保存的结果比较")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    import main as client
+    from rtang.settings import Settings
+    from rtang.theme import ThemeManager
+
+    themes = ThemeManager(app, os.path.join(ROOT, "styles"))
+    themes.apply("pink")
+    data = os.environ["RTANG_DATA_DIR"]
+    settings = Settings(os.path.join(data, "settings.json"), os.path.join(data, "defaults.json"))
+    settings.set("toast_lifetime", 1000)
+    win = client.RTangClient(settings=settings, themes=themes)
+    width, height = (int(v) for v in args.size.split("x"))
+    win.resize(width, height)
+    recorder = FrameRecorder(win)
+    win.show()
+
+    runner = ScenarioRunner()
+    warmup = iter([300])
+    if not args.no_warmup:
+        warmup = page_switch(win, rounds=1)
+    runner.run(warmup)
+
+    refresh = win.screen().refreshRate() or 60.0
+    budget_ms = 1000 / refresh
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "qt": PySide6.__version__,
+        "platform": QApplication.platformName(),
+        "size": args.size,
+        "frame_budget_ms": round(budget_ms, 2),
+        "scenarios": {},
+    }
+    for name in args.scenario:
+        result = run_scenario(recorder, win, runner, name, args.tracemalloc, budget_ms)
+        results["scenarios"][name] = result
+        print(f"{name:16s} {result['frames']:4d} 帧  绘制 p95 {result['paint_ms']['p95']:7.2f} ms  "
+              f"慢帧 {result['slow_frames']:3d}  循环延迟 p95 {result['loop_latency_ms']['p95']:7.2f} ms  "
+              f"新增内存块 {result['allocations']['python_blocks']:6d}  新增 QObject {result['allocations']['qobjects']:4d}")
+
+    win.close()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("性能回退: " + ", ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
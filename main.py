@@ -1,6 +1,25 @@
 import sys
 import os
-os.environ["QT_SCALE_FACTOR"] = "1.5"
+import argparse
+import queue
+import threading
+import time
+
+from rtang.startup import profiler
+if any(arg == "--profile-startup" or arg.startswith("--profile-startup=") for arg in sys.argv):
+    profiler.enable()
+
+if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        # 打包后音乐分析的子进程也从这个可执行文件启动
+        import multiprocessing
+        multiprocessing.freeze_support()
+    # 已有实例在运行时把参数交给它后立即退出，不加载 Qt
+    from rtang.ipc import forward_to_instance
+    _forwarded = forward_to_instance(sys.argv[1:])
+    if _forwarded is not None:
+        sys.exit(_forwarded)
+
 os.environ["QT_ENABLE_HIGHDPI_SCALING"] = "1"
 os.environ["QT_SCALE_FACTOR_ROUNDING_POLICY"] = "RoundPreferFloor"
 
@@ -9,12 +28,38 @@ from PySide6.QtWidgets import QApplication
 
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton,
-    QVBoxLayout, QHBoxLayout, QFrame, QProgressBar, QGraphicsOpacityEffect, QFileDialog,
-    QStackedWidget, QTextEdit
+    QVBoxLayout, QHBoxLayout, QFrame, QProgressBar, QFileDialog,
+    QStackedWidget, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
+)
+from PySide6.QtGui import (
+    QPixmap, QFont, QMouseEvent, QGuiApplication, QPainter, QOpenGLContext, QKeySequence, QShortcut
+)
+from PySide6.QtCore import (
+    Qt, QAbstractAnimation, QPoint, QTimer, QPropertyAnimation, QEasingCurve,
+    QThread, Signal, QVariantAnimation, QSize, QEvent
 )
-from PySide6.QtGui import QPixmap, QFont, QMouseEvent, QGuiApplication, QFontMetrics, QPainter
-from PySide6.QtCore import Qt, QPoint, QTimer, QPropertyAnimation, QParallelAnimationGroup, QEasingCurve, QRect, QUrl
-from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+from rtang.launch import (
+    STAGE_MANIFEST, STAGE_VERIFY, STAGE_STORE, STAGE_DOWNLOAD, STAGE_MODS, STAGE_MODS_VERIFY, STAGE_SPAWN,
+    LaunchError
+)
+from rtang.images import ImageService
+from rtang.ipc import add_instance_arguments, commands_from_args, forward_to_instance
+from rtang.launch_panel import LaunchBridge, LaunchPanel
+from rtang.orchestrator import CANCELLED, EXITED, FAILED, PENDING, RUNNING, LaunchOrchestrator, spawn_supervised
+from rtang.procstat import format_bytes
+from rtang.library import LibraryIndex, scan_library
+from rtang.playqueue import PlayQueue
+from rtang.profiles import config_for, default_profile, load_profiles
+from rtang.playlist import PlaylistModel
+from rtang.scheduler import UiUpdateScheduler
+from rtang.settings import Settings
+from rtang.theme import DEFAULT_THEME, ThemeError, ThemeManager
+from rtang.toast import ToastManager
+from rtang.waveform import AnalysisBridge, WaveformSeekBar
+from rtang.tags import TagCache, display_title, new_tag_executor, read_tags_cached
+
+profiler.mark("导入模块")
 
 
 def resource_path(relative_path):
@@ -24,37 +69,194 @@ def resource_path(relative_path):
     return os.path.join(os.path.abspath("."), relative_path)
 
 
+class MusicScanThread(QThread):
+    """后台递归扫描音乐文件夹，分批把结果发回 GUI 线程"""
+    batch_ready = Signal(list)
+    scan_finished = Signal(int, int)  # 文件总数, 新增或改动数
+
+    def __init__(self, folder, batch_size=500, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.batch_size = batch_size
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        index = LibraryIndex()
+        total = changed = 0
+        try:
+            for paths, n in scan_library(self.folder, index, self.batch_size, self._cancel):
+                total += len(paths)
+                changed += n
+                self.batch_ready.emit(paths)
+        finally:
+            index.close()
+        if not self._cancel.is_set():
+            self.scan_finished.emit(total, changed)
+
+
+class TagReadThread(QThread):
+    """后台读取音乐标签，命中缓存的直接返回，其余交给有限并发的线程池解析"""
+    tags_ready = Signal(list)
+
+    def __init__(self, chunk_size=200, parent=None):
+        super().__init__(parent)
+        self.chunk_size = chunk_size
+        self._queue = queue.Queue()
+        self._cancel = threading.Event()
+
+    def add(self, paths):
+        self._queue.put(list(paths))
+
+    def cancel(self):
+        self._cancel.set()
+        self._queue.put(None)
+
+    def run(self):
+        cache = TagCache()
+        executor = new_tag_executor()
+        try:
+            while not self._cancel.is_set():
+                paths = self._queue.get()
+                if paths is None:
+                    break
+                for i in range(0, len(paths), self.chunk_size):
+                    infos = read_tags_cached(paths[i:i + self.chunk_size], cache, executor, self._cancel)
+                    if self._cancel.is_set():
+                        break
+                    if infos:
+                        self.tags_ready.emit(infos)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            cache.close()
+
+
 class RTangClient(QWidget):
+    first_frame = Signal()
     SIDEBAR_WIDTH = 220
     BUTTON_WIDTH = 180
     BUTTON_HEIGHT = 45
-    TOAST_WIDTH = 200
     TOAST_HEIGHT = 40
     TOAST_MARGIN = 20
     TOAST_ANIM_DURATION = 300
     TOAST_FADE_DURATION = 300
-    TOAST_LIFETIME = 5000
     TOAST_SPACING = 10
-    MAX_TOASTS = 10
-
-    def __init__(self):
+    SCAN_BATCH_SIZE = 500
+    SCAN_TOAST_INTERVAL = 2.0
+    LAUNCH_STAGE_TEXT = {
+        STAGE_MANIFEST: "正在读取游戏清单",
+        STAGE_VERIFY: "正在校验游戏文件",
+        STAGE_STORE: "正在登记资源仓库",
+        STAGE_DOWNLOAD: "正在下载缺失文件",
+        STAGE_MODS_VERIFY: "正在校验模组",
+        STAGE_MODS: "正在同步模组",
+        STAGE_SPAWN: "正在启动游戏",
+    }
+    MUSIC_ICON_SIZE = 32
+    MUSIC_ICON_FRAMES = 36
+    # 为 True 时用 QGraphicsView + 动画旋转图标，由场景合成（有 OpenGL 时走 GPU），不再定时重绘标签
+    MUSIC_ICON_GPU = False
+    PAGE_HOME, PAGE_PLAYLIST, PAGE_LOG, PAGE_SETTINGS = range(4)
+    # 游戏日志环形缓冲和日志页保留的行数
+    GAME_LOG_LINES = 5000
+    # 窗口隐藏或最小化时界面数值的刷新间隔（毫秒）
+    BACKGROUND_UPDATE_INTERVAL = 1000
+    DOWNLOAD_RATE_WINDOW = 1.0
+    # 当前曲目剩余多少毫秒时预加载下一首；交叉淡入淡出时长，0 为无缝直接切换
+    PRELOAD_MS = 5000
+    CROSSFADE_MS = 0
+    REPEAT_TEXT = ("➡️", "🔁", "🔂")
+    REPEAT_TOAST = ("顺序播放，列表结束后停止", "列表循环", "单曲循环")
+
+    def __init__(self, lazy=True, settings=None, themes=None):
         super().__init__()
+        # lazy 为 True 时多媒体后端和设置页推迟到第一次使用时再创建，缩短首帧时间
+        self.lazy = lazy
+        self.settings = settings or Settings()
+        self.themes = themes
+        self.settings.subscribe(self._on_setting_changed)
         self.setWindowTitle("RTangClient")
         self.setWindowFlags(Qt.FramelessWindowHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
         self._old_pos = None
-        self._active_toasts = []
         self.calculate_window_size()
+        self.images = ImageService(parent=self)
+        # 播放进度、启动进度和下载速度都经它合并，每帧最多刷新一次
+        self.ui_updates = UiUpdateScheduler(self, self.BACKGROUND_UPDATE_INTERVAL)
+        self.ui_updates.active_changed.connect(self._on_window_active_changed)
 
         # 音乐相关初始化提前
         self.music_files = []
         self.music_index = -1
-        self.player = QMediaPlayer(self)
-        self.audio_output = QAudioOutput(self)
-        self.player.setAudioOutput(self.audio_output)
-        self.player.mediaStatusChanged.connect(self._on_media_status_changed)
+        self.play_queue = PlayQueue()
+        self._scan_thread = None
+        self._scan_last_toast = 0.0
+        self.track_info = {}
+        # 预分析得到的 ReplayGain 增益（dB），波形按需从缓存读取
+        self.track_gain_db = {}
+        self.analyzer = None
+        self.analysis_bridge = AnalysisBridge(self)
+        self.analysis_bridge.result_ready.connect(self._on_analysis_ready)
+        self.playlist_model = PlaylistModel(self)
+        self.playlist_panel = None
+        self._tag_thread = None
+        # 播放栏读取封面用的缓存连接，第一次显示封面时打开
+        self._cover_cache = None
+        # 多配置档启动：编排器在第一次启动游戏时创建；各配置档的阶段、进度和开始下载的时间分别记录
+        self.profiles = []
+        self.launcher = None
+        self.launch_bridge = LaunchBridge(self)
+        self.launch_bridge.state_changed.connect(self._on_launch_state)
+        self.launch_bridge.output_pending.connect(self._on_game_output)
+        self._launch_progress = {}
+        self._download_started = {}
+        self._rate_sample = (0.0, 0)
+        # 日志页显示的配置档及其监管器，默认跟随最近启动的一个
+        self.log_profile = None
+        self.game_supervisor = None
+        self.log_view = None
+        self.diagnostics = None
+        self.perf_overlay = None
+        self._player = None
+        # 创建播放器时一并取得 QMediaPlayer 类，播放回调里比较状态枚举不必再执行 import
+        self._media_player = None
+        self._first_frame_seen = False
+        if not lazy:
+            self.init_player()
 
         self.init_ui()
+        profiler.mark("构建控件")
+
+    @property
+    def player(self):
+        """首次访问时才加载 QtMultimedia 并创建播放器"""
+        if self._player is None:
+            self.init_player()
+        return self._player
+
+    def init_player(self):
+        if self._player is None:
+            from PySide6.QtMultimedia import QMediaPlayer
+            from rtang.playback import GaplessPlayer
+            self._media_player = QMediaPlayer
+            self._player = GaplessPlayer(self._peek_next_track, self.PRELOAD_MS, self.CROSSFADE_MS,
+                                         gain=self._track_gain, parent=self)
+            self._player.setVolume(self.settings.volume)
+            self._player.track_changed.connect(self._on_track_changed)
+            self._player.queue_finished.connect(self._on_queue_finished)
+            self._player.positionChanged.connect(self.on_position_changed)
+            self._player.durationChanged.connect(self.on_duration_changed)
+            self._player.playbackStateChanged.connect(self.on_playback_state_changed)
+
+    def eventFilter(self, obj, event):
+        if obj is self.background and event.type() == QEvent.Paint and not self._first_frame_seen:
+            self._first_frame_seen = True
+            self.background.removeEventFilter(self)
+            # 排到本轮绘制结束之后，此时首帧已完整画完
+            QTimer.singleShot(0, self.first_frame.emit)
+        return super().eventFilter(obj, event)
 
     def calculate_window_size(self):
         screen = QGuiApplication.primaryScreen().availableGeometry()
@@ -74,23 +276,24 @@ class RTangClient(QWidget):
         )
 
     def init_ui(self):
-        self.init_toast_label()
+        self.init_toasts()
         self.init_background()
         self.init_main_layout()
-
-    def init_toast_label(self):
-        self.toast_label = QLabel("", self)
-        self.toast_label.setObjectName("toastLabel")
-        self.toast_label.setAlignment(Qt.AlignCenter)
-        self.toast_label.setFixedHeight(self.TOAST_HEIGHT)
-        self.toast_label.setFixedWidth(self.TOAST_WIDTH)
-        self.toast_label.hide()
-        self.toast_label.setAttribute(Qt.WA_StyledBackground, True)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self).activated.connect(self.toggle_diagnostics)
+        QShortcut(QKeySequence("Ctrl+Shift+E"), self).activated.connect(self.export_diagnostics)
+
+    def init_toasts(self):
+        self.toasts = ToastManager(
+            self, width=300, height=self.TOAST_HEIGHT, margin=self.TOAST_MARGIN, spacing=self.TOAST_SPACING,
+            lifetime=self.settings.toast_lifetime, max_toasts=self.settings.max_toasts, anim_duration=self.TOAST_ANIM_DURATION,
+            top_inset=lambda: self.title_bar.height() if hasattr(self, "title_bar") else 32
+        )
 
     def init_background(self):
         self.background = QFrame(self)
         self.background.setObjectName("background")
         self.background.setGeometry(0, 0, self.width(), self.height())
+        self.background.installEventFilter(self)
 
     def init_main_layout(self):
         main_layout = QVBoxLayout(self.background)
@@ -113,26 +316,39 @@ class RTangClient(QWidget):
         self.btn_home.setObjectName("navButton")
         self.btn_home.setFixedHeight(28)
         self.btn_home.setCheckable(True)
-        self.btn_home.clicked.connect(lambda: self.switch_page(0))
+        self.btn_home.clicked.connect(lambda: self.switch_page(self.PAGE_HOME))
+
+        self.btn_playlist = QPushButton("歌单")
+        self.btn_playlist.setObjectName("navButton")
+        self.btn_playlist.setFixedHeight(28)
+        self.btn_playlist.setCheckable(True)
+        self.btn_playlist.clicked.connect(lambda: self.switch_page(self.PAGE_PLAYLIST))
+
+        self.btn_log = QPushButton("日志")
+        self.btn_log.setObjectName("navButton")
+        self.btn_log.setFixedHeight(28)
+        self.btn_log.setCheckable(True)
+        self.btn_log.clicked.connect(lambda: self.switch_page(self.PAGE_LOG))
 
         self.btn_settings = QPushButton("设置")
         self.btn_settings.setObjectName("navButton")
         self.btn_settings.setFixedHeight(28)
         self.btn_settings.setCheckable(True)
-        self.btn_settings.clicked.connect(lambda: self.switch_page(1))
+        self.btn_settings.clicked.connect(lambda: self.switch_page(self.PAGE_SETTINGS))
 
+        # 按页面顺序排列，下标与 stacked_widget 一致
+        self.nav_buttons = [self.btn_home, self.btn_playlist, self.btn_log, self.btn_settings]
         # 默认主页选中
-        self.btn_home.setChecked(True)
-        self.btn_settings.setChecked(False)
-        self.btn_home.setEnabled(False)
-        self.btn_settings.setEnabled(True)
+        for i, button in enumerate(self.nav_buttons):
+            button.setChecked(i == self.PAGE_HOME)
+            button.setEnabled(i != self.PAGE_HOME)
 
         title_label = QLabel("RTangClient")
         title_label.setObjectName("titleLabel")
         title_label.setFont(QFont("Microsoft YaHei", 10))
 
-        title_layout.addWidget(self.btn_home)
-        title_layout.addWidget(self.btn_settings)
+        for button in self.nav_buttons:
+            title_layout.addWidget(button)
         title_layout.addStretch()
         title_layout.addWidget(title_label)
 
@@ -169,6 +385,19 @@ class RTangClient(QWidget):
         btn_layout.setSpacing(10)
         btn_layout.setAlignment(Qt.AlignBottom | Qt.AlignHCenter)
 
+        # 配置档列表，只有一个配置档时隐藏
+        self.launch_panel = LaunchPanel()
+        self.launch_panel.selection_changed.connect(lambda ids: self.settings.set("launch_profiles", ",".join(ids)))
+        self.launch_panel.stop_requested.connect(self.stop_profile)
+        self.launch_panel.log_requested.connect(self.follow_profile_log)
+        try:
+            self.profiles = load_profiles()
+        except ValueError:
+            # 文件有误时先按默认配置档显示，点击启动时再提示具体错误
+            self.profiles = [default_profile()]
+        self.launch_panel.set_profiles(self.profiles, self._selected_profile_ids())
+        sidebar_layout.addWidget(self.launch_panel)
+
         # 移除主页和设置按钮，只保留启动和进度条
         self.start_button = QPushButton("启动游戏")
         self.start_button.setObjectName("startButton")
@@ -206,13 +435,10 @@ class RTangClient(QWidget):
         self.home_page = QWidget()
         home_layout = QVBoxLayout(self.home_page)
         self.logo = QLabel()
-        pixmap = QPixmap(resource_path("assets/logo.png"))
-        if pixmap.isNull():
-            self.logo.setText("[Logo]")
-            QTimer.singleShot(0, lambda: self.show_toast("Logo 加载失败！"))
-        else:
-            pixmap.setDevicePixelRatio(self.devicePixelRatioF())
-            self.logo.setPixmap(pixmap.scaled(150, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        # 先占住位置，图片在后台解码完成后再填入，避免布局跳动
+        self.logo.setMinimumSize(150, 150)
+        self.images.bind(self.logo, resource_path("assets/logo.png"), QSize(150, 150),
+                         on_failed=self._on_logo_failed)
         self.logo.setAlignment(Qt.AlignCenter)
         self.status_label = QLabel("未登录")
         self.status_label.setObjectName("statusLabel")
@@ -222,33 +448,97 @@ class RTangClient(QWidget):
         home_layout.addWidget(self.status_label)
         home_layout.addStretch()
 
-        # 设置页
+        # 歌单、日志和设置页，内容在第一次切换过去时才创建
+        self.playlist_page = QWidget()
+        self.log_page = QWidget()
         self.settings_page = QWidget()
-        settings_layout = QVBoxLayout(self.settings_page)
-        settings_label = QLabel("设置")
-        settings_label.setFont(QFont("Microsoft YaHei", 16))
-        settings_label.setAlignment(Qt.AlignCenter)
-        settings_layout.addWidget(settings_label)
-        settings_layout.addStretch()
+        self.settings_panel = None
+        if not self.lazy:
+            self.init_playlist_page()
+            self.init_log_page()
+            self.init_settings_page()
 
         self.stacked_widget.addWidget(self.home_page)
+        self.stacked_widget.addWidget(self.playlist_page)
+        self.stacked_widget.addWidget(self.log_page)
         self.stacked_widget.addWidget(self.settings_page)
         content_v_layout.addWidget(self.stacked_widget)
         self.content.setLayout(content_v_layout)
         content_layout.addWidget(self.content)
 
-        self.stacked_widget.setCurrentIndex(0)
+        self.stacked_widget.setCurrentIndex(self.PAGE_HOME)
+
+    def init_playlist_page(self):
+        if self.playlist_panel is not None:
+            return
+        from rtang.playlist import PlaylistPanel
+        layout = QVBoxLayout(self.playlist_page)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.playlist_panel = PlaylistPanel(self.playlist_model, self.playlist_page)
+        self.playlist_panel.track_activated.connect(self.play_music)
+        layout.addWidget(self.playlist_panel)
+
+    def init_log_page(self):
+        if self.log_view is not None:
+            return
+        from rtang.logview import LogView
+        layout = QVBoxLayout(self.log_page)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.log_view = LogView(self.GAME_LOG_LINES, self.log_page)
+        if self.game_supervisor is not None:
+            # 页面创建前的输出都在环形缓冲里，显示时整体载入一次
+            self.log_view.attach(self.game_supervisor, reload=True)
+        layout.addWidget(self.log_view)
+        self._update_game_status()
+
+    def init_settings_page(self):
+        if self.settings_panel is not None:
+            return
+        from rtang.settings_page import SettingsPage
+        layout = QVBoxLayout(self.settings_page)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.settings_panel = SettingsPage(self.settings, self.settings_page)
+        layout.addWidget(self.settings_panel)
+
+    def _on_setting_changed(self, key, value):
+        # 能立即生效的设置在这里应用，其余在下次使用时读取
+        if key == "volume" and self._player is not None:
+            self._player.setVolume(value)
+        elif key == "normalize_volume" and self._player is not None:
+            self._player.setVolume(self.settings.volume)
+        elif key == "launch_parallel" and self.launcher is not None:
+            self.launcher.set_max_parallel(value)
+        elif key == "launch_stagger_ms" and self.launcher is not None:
+            self.launcher.stagger = value / 1000
+        elif key == "toast_lifetime":
+            self.toasts.lifetime = value
+        elif key == "max_toasts":
+            self.toasts.max_toasts = value
+        elif key == "theme" and self.themes is not None:
+            try:
+                self.themes.apply(value)
+            except ThemeError as e:
+                self.show_toast(str(e))
+
+    def _on_logo_failed(self):
+        self.logo.setText("[Logo]")
+        self.show_toast("Logo 加载失败！")
 
     def switch_page(self, index):
         current_index = self.stacked_widget.currentIndex()
         if current_index == index:
             return
+        if index == self.PAGE_PLAYLIST:
+            self.init_playlist_page()
+        elif index == self.PAGE_LOG:
+            self.init_log_page()
+        elif index == self.PAGE_SETTINGS:
+            self.init_settings_page()
 
         # 先立即切换按钮选中状态和可用状态，保证UI及时刷新
-        self.btn_home.setChecked(index == 0)
-        self.btn_settings.setChecked(index == 1)
-        self.btn_home.setEnabled(index != 0)
-        self.btn_settings.setEnabled(index != 1)
+        for i, button in enumerate(self.nav_buttons):
+            button.setChecked(i == index)
+            button.setEnabled(i != index)
         QApplication.processEvents()  # 强制刷新UI
 
         direction = 1 if index > current_index else -1
@@ -278,8 +568,9 @@ class RTangClient(QWidget):
             next_widget.move(0, 0)
 
         anim_in.finished.connect(on_finished)
-        anim_out.start()
-        anim_in.start()
+        # 动画结束后自动释放，否则每次切换都会在窗口下留下两个动画对象
+        anim_out.start(QAbstractAnimation.DeleteWhenStopped)
+        anim_in.start(QAbstractAnimation.DeleteWhenStopped)
 
     def init_music_controls(self, main_layout=None):
         music_bar = QFrame()
@@ -303,29 +594,49 @@ class RTangClient(QWidget):
         self.btn_next.clicked.connect(self.play_next_music)
         self.btn_next.setEnabled(False)
 
+        self.btn_shuffle = QPushButton("🔀")
+        self.btn_shuffle.setCheckable(True)
+        self.btn_shuffle.toggled.connect(self.set_shuffle)
+
+        self.btn_repeat = QPushButton(self.REPEAT_TEXT[self.play_queue.repeat])
+        self.btn_repeat.clicked.connect(self.cycle_repeat_mode)
+
         self.music_title = QLabel("未选择音乐")
         self.music_title.setMinimumWidth(120)
 
-        self.music_progress = QProgressBar()
-        self.music_progress.setFixedWidth(120)
-        self.music_progress.setRange(0, 100)
-        self.music_progress.setValue(0)
-        self.music_progress.setTextVisible(False)
-
-        self.music_icon = QLabel()
-        icon_pixmap = QPixmap(resource_path("assets/music_icon.png"))
-        if icon_pixmap.isNull():
-            self.music_icon.setText("🎵")
+        self.music_progress = WaveformSeekBar()
+        self.music_progress.setObjectName("musicProgress")
+        self.music_progress.setFixedSize(200, 24)
+        self.music_progress.seek_requested.connect(self.seek_music)
+
+        icon_path = resource_path("assets/music_icon.png")
+        self._music_icon_source = QPixmap()
+        # 当前曲目有内嵌封面时转动封面，没有时转动默认图标
+        self._music_icon_default = QPixmap()
+        self._music_cover_id = None
+        self._music_icon_frames = []
+        self._music_icon_frames_dpr = 0.0
+        self._music_icon_anim = None
+        self._rotation_angle = 0
+        self._icon_animating = False
+        if self.MUSIC_ICON_GPU and os.path.isfile(icon_path):
+            self.music_icon = self._create_gpu_music_icon()
         else:
-            self.music_icon.setPixmap(icon_pixmap.scaled(32, 32, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        self.music_icon.setFixedSize(32, 32)
-        self.music_icon.setAlignment(Qt.AlignCenter)
+            # 图片解码完成前先显示文字图标
+            self.music_icon = QLabel("🎵")
+            self.music_icon.setAlignment(Qt.AlignCenter)
+        self.music_icon.setFixedSize(self.MUSIC_ICON_SIZE, self.MUSIC_ICON_SIZE)
+        if os.path.isfile(icon_path):
+            self.images.request(icon_path, QSize(self.MUSIC_ICON_SIZE, self.MUSIC_ICON_SIZE),
+                                self.devicePixelRatioF(), self._set_default_music_icon)
 
         music_layout.addWidget(self.music_icon)
         music_layout.addWidget(self.btn_select_folder)
         music_layout.addWidget(self.btn_prev)
         music_layout.addWidget(self.btn_play)
         music_layout.addWidget(self.btn_next)
+        music_layout.addWidget(self.btn_shuffle)
+        music_layout.addWidget(self.btn_repeat)
         music_layout.addWidget(self.music_title)
         music_layout.addWidget(self.music_progress)
         music_layout.addStretch()
@@ -335,148 +646,218 @@ class RTangClient(QWidget):
         self.music_bar = music_bar
 
         self.music_timer = QTimer(self)
+        self.music_timer.setObjectName("musicTimer")
         self.music_timer.timeout.connect(self.update_music_progress)
-        self._rotation_angle = 0
-        self._icon_animating = False
 
-        self.player.positionChanged.connect(self.on_position_changed)
-        self.player.durationChanged.connect(self.on_duration_changed)
-        self.player.playbackStateChanged.connect(self.on_playback_state_changed)
 
-    def start_game(self):
-        self.start_button.setEnabled(False)
-        self.start_button.hide()
-        self.progress_bar.setValue(0)
-        self.progress_bar.show()
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_progress)
-        self.timer.start(10)
-
-    def update_progress(self):
-        value = self.progress_bar.value()
-        if value < 100:
-            self.progress_bar.setValue(value + 5)
+    def _selected_profile_ids(self):
+        ids = [p.id for p in self.profiles]
+        selected = [pid for pid in self.settings.launch_profiles.split(",") if pid in ids]
+        return selected or ids[:1]
+
+    def _profile_name(self, profile_id):
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile.name
+        return profile_id
+
+    def _ensure_launcher(self):
+        if self.launcher is None:
+            self.launcher = LaunchOrchestrator(
+                self.launch_bridge.state_changed.emit, self.settings.launch_parallel,
+                self.settings.launch_stagger_ms / 1000,
+                spawn=lambda command, config, on_output, on_exit: spawn_supervised(
+                    command, config, on_output, on_exit, self.GAME_LOG_LINES),
+                on_output=self.launch_bridge.output_pending.emit)
+        return self.launcher
+
+    def start_game(self, profile_ids=None):
+        """把勾选的（或指定的）配置档加入启动队列，返回实际排队的数量；已在启动或运行中的配置档跳过"""
+        try:
+            # 每次启动都重新读取，修改 profiles.json 后不必重启客户端
+            self.profiles = load_profiles()
+        except ValueError as e:
+            self.show_toast(f"配置档文件有误: {e}")
+            return 0
+        self.launch_panel.set_profiles(self.profiles, self._selected_profile_ids())
+        wanted = profile_ids or self._selected_profile_ids()
+        profiles = [p for p in self.profiles if p.id in wanted]
+        if not profiles:
+            self.show_toast("没有要启动的配置档")
+            return 0
+        launcher = self._ensure_launcher()
+        busy = set(launcher.running()) | {s.profile_id for s in launcher.states() if s.status in PENDING}
+        todo = [p for p in profiles if p.id not in busy]
+        if not todo:
+            self.show_toast("游戏正在运行" if len(profiles) == 1 else "所选配置档都已在启动或运行中")
+            return 0
+        # 自动计算堆大小时按同时运行的客户端数平分内存
+        instances = len(busy | {p.id for p in todo})
+        queued = 0
+        for profile in todo:
+            try:
+                config = config_for(profile, self.settings, instances)
+            except LaunchError as e:
+                self.show_toast(f"{profile.name}: {e}")
+                continue
+            launcher.submit(profile.id, config)
+            queued += 1
+        return queued
+
+    def stop_profile(self, profile_id):
+        """列表中的 ✕：排队或准备中时取消，运行中时结束游戏"""
+        if self.launcher is None:
+            return
+        if not self.launcher.cancel(profile_id) and self.launcher.terminate(profile_id):
+            self.show_toast(f"正在结束 {self._profile_name(profile_id)}")
+
+    def follow_profile_log(self, profile_id):
+        supervisor = self.launcher.supervisor(profile_id) if self.launcher is not None else None
+        if supervisor is None:
+            return
+        self.log_profile = profile_id
+        self.game_supervisor = supervisor
+        if self.log_view is not None:
+            self.log_view.attach(supervisor, reload=True)
+        self._update_game_status()
+        self.switch_page(self.PAGE_LOG)
+
+    def _stop_launch(self):
+        launcher = self.launcher
+        self.launcher = None
+        if launcher is not None:
+            # 关闭启动器不结束游戏，只是不再接收它的输出和退出通知
+            launcher.shutdown()
+
+    def _on_launch_state(self, state):
+        if self.launcher is None:
+            # 窗口关闭后排队信号里剩下的状态
+            return
+        self.launch_panel.update_state(state)
+        profile_id = state.profile_id
+        # 多个配置档时提示前加上名称
+        prefix = f"{self._profile_name(profile_id)}: " if len(self.profiles) > 1 else ""
+        if state.status in PENDING:
+            previous = self._launch_progress.get(profile_id)
+            previous_stage = previous[0] if previous is not None else None
+            if state.stage is not None and state.stage != previous_stage:
+                if previous_stage == STAGE_DOWNLOAD:
+                    elapsed = max(time.monotonic() - self._download_started.pop(profile_id, 0.0), 1e-3)
+                    self.show_toast(f"{prefix}下载完成，平均 {previous[1] / elapsed / 1048576:.1f} MB/s")
+                elif state.stage == STAGE_DOWNLOAD:
+                    self._download_started[profile_id] = time.monotonic()
+                self.show_toast(prefix + self.LAUNCH_STAGE_TEXT.get(state.stage, state.stage))
+            self._launch_progress[profile_id] = (state.stage, state.done, state.total)
         else:
-            self.timer.stop()
+            self._launch_progress.pop(profile_id, None)
+            self._download_started.pop(profile_id, None)
+            if state.status == RUNNING:
+                self._follow_new_game(profile_id)
+                self.show_toast(f"{prefix}启动完成！")
+            elif state.status == FAILED:
+                self.show_toast(f"{prefix}启动失败: {state.message}")
+            elif state.status == CANCELLED:
+                self.show_toast(f"{prefix}已取消启动")
+            elif state.status == EXITED:
+                self._on_game_exited(profile_id)
+        self.ui_updates.post("launch_progress", self._apply_launch_progress)
+
+    def _apply_launch_progress(self):
+        """进度条显示所有启动中配置档的平均进度，下载速度为各配置档之和"""
+        progress = self._launch_progress
+        if not progress:
+            self.ui_updates.cancel("download_rate")
+            self.progress_bar.setTextVisible(False)
             self.progress_bar.hide()
-            self.start_button.setText("启动游戏")
-            self.start_button.setEnabled(True)
-            self.start_button.show()
-            self.show_toast("启动完成！")
-
-    def show_toast(self, message: str):
-        margin = self.TOAST_MARGIN
-        spacing = self.TOAST_SPACING
-        toast_width = 300
-
-        font = QFont("Microsoft YaHei", 12)
-        metrics = QFontMetrics(font)
-        elided_message = metrics.elidedText(message, Qt.ElideRight, toast_width - 30)
-
-        while len(self._active_toasts) >= self.MAX_TOASTS:
-            old_toast = self._active_toasts.pop(-1)
-            self._fade_out_toast(old_toast, rearrange=True)
-
-        toast = QLabel(elided_message, self)
-        toast.setObjectName("toastLabel")
-        toast.setAlignment(Qt.AlignCenter)
-        toast.setWordWrap(True)
-        toast.setFixedWidth(toast_width)
-        toast.setFont(font)
-        toast.setAttribute(Qt.WA_StyledBackground, True)
-        toast.setWindowOpacity(1.0)
-        toast.raise_()
-
-        toast.adjustSize()
-        toast.setFixedHeight(toast.height())
-
-        start_x = self.width() - toast.width() - margin
-
-        title_bar_height = self.title_bar.height() if hasattr(self, "title_bar") else 32
-        min_y = title_bar_height + margin
-        max_y = self.height() - toast.height() - margin
-        start_y = max(min_y, max_y)
-
-        for idx, t in enumerate(self._active_toasts):
-            target_y = max(
-                min_y,
-                self.height() - t.height() - margin - (idx + 1) * (t.height() + spacing)
-            )
-            self._move_toast(t, start_x, target_y)
-
-        toast.move(start_x, start_y + 60)
-        toast.show()
-        self._active_toasts.insert(0, toast)
-
-        self._move_toast(toast, start_x, start_y, duration=self.TOAST_ANIM_DURATION)
-        QTimer.singleShot(self.TOAST_LIFETIME, lambda: self._fade_out_toast(toast))
-
-    def _move_toast(self, toast, x, y, duration=200):
-        anim = QPropertyAnimation(toast, b"pos", toast)
-        anim.setDuration(duration)
-        anim.setStartValue(toast.pos())
-        anim.setEndValue(QPoint(x, y))
-        anim.setEasingCurve(QEasingCurve.OutQuad)
-        toast._move_anim = anim
-        anim.start()
-
-    def _fade_out_toast(self, toast, rearrange=False):
-        if getattr(toast, "_is_fading", False):
-            return
-        toast._is_fading = True
-
-        toast.setText("")
-        toast.setParent(self)
-        toast.setGeometry(toast.geometry())
-        toast.setStyleSheet("border: none; background-color: #FFABC1; border-radius: 12px;")
-        duration = 250
-
-        effect = QGraphicsOpacityEffect(toast)
-        toast.setGraphicsEffect(effect)
-        anim_fade = QPropertyAnimation(effect, b"opacity", toast)
-        anim_fade.setDuration(duration)
-        anim_fade.setStartValue(1.0)
-        anim_fade.setEndValue(0.0)
-        anim_fade.setEasingCurve(QEasingCurve.OutCubic)
-
-        start_geom = toast.geometry()
-        center = start_geom.center()
-        shrink_ratio = 0.5
-        end_width = max(1, int(start_geom.width() * shrink_ratio))
-        end_height = start_geom.height()
-        end_geom = QRect(
-            center.x() - end_width // 2,
-            center.y() - end_height // 2,
-            end_width,
-            end_height
-        )
-        anim_geom = QPropertyAnimation(toast, b"geometry", toast)
-        anim_geom.setDuration(duration)
-        anim_geom.setStartValue(start_geom)
-        anim_geom.setEndValue(end_geom)
-        anim_geom.setEasingCurve(QEasingCurve.OutCubic)
+            return
+        if self.progress_bar.isHidden():
+            self.progress_bar.setRange(0, 1000)
+            self.progress_bar.show()
+        fractions = [done / total if total else 0.0 for _, done, total in progress.values()]
+        self.progress_bar.setValue(int(sum(fractions) * 1000 / len(fractions)))
+        downloading = [done for stage, done, _ in progress.values() if stage == STAGE_DOWNLOAD]
+        if downloading:
+            self.ui_updates.post("download_rate", self._apply_download_rate, sum(downloading))
+        else:
+            self.progress_bar.setTextVisible(False)
+
+    def _apply_download_rate(self, done):
+        # 在刷新时才计算速度，取最近 DOWNLOAD_RATE_WINDOW 秒的平均值
+        now = time.monotonic()
+        last_time, last_done = self._rate_sample
+        if last_time == 0.0 or done < last_done:
+            self._rate_sample = (now, done)
+            return
+        if now - last_time < self.DOWNLOAD_RATE_WINDOW:
+            return
+        rate = (done - last_done) / (now - last_time) / 1048576
+        self._rate_sample = (now, done)
+        self.progress_bar.setFormat(f"{rate:.1f} MB/s")
+        self.progress_bar.setTextVisible(True)
+
+    def _follow_new_game(self, profile_id):
+        """日志页改为显示刚启动的游戏"""
+        self.log_profile = profile_id
+        self.game_supervisor = self.launcher.supervisor(profile_id)
+        if self.log_view is not None:
+            self.log_view.attach(self.game_supervisor)
+        self._update_game_status()
+        # 进程可能在这之前就有输出，补一次读取，之后由通知驱动
+        self.ui_updates.post("game_log", self._drain_game_log)
+
+    def _on_game_output(self, profile_id):
+        # 其他配置档的输出留在各自的环形缓冲里，切换日志页时整体载入
+        if profile_id == self.log_profile:
+            self.ui_updates.post("game_log", self._drain_game_log)
+
+    def _drain_game_log(self):
+        supervisor = self.game_supervisor
+        if supervisor is None:
+            return
+        lines = supervisor.drain()
+        if self.log_view is not None:
+            self.log_view.append_lines(lines)
+        self._update_game_status()
 
-        group = QParallelAnimationGroup(toast)
-        group.addAnimation(anim_fade)
-        group.addAnimation(anim_geom)
+    def _update_game_status(self):
+        if self.log_view is None:
+            return
+        supervisor = self.game_supervisor
+        if supervisor is None:
+            self.log_view.set_status("游戏未运行")
+            return
+        parts = [f"PID {supervisor.pid}"]
+        if len(self.profiles) > 1:
+            parts.insert(0, self._profile_name(self.log_profile))
+        if supervisor.startup_ms is not None:
+            parts.append(f"首行日志 {supervisor.startup_ms:.0f} ms")
+        if supervisor.peak_rss:
+            parts.append(f"内存 {format_bytes(supervisor.rss)}（峰值 {format_bytes(supervisor.peak_rss)}）")
+        parts.append(f"{supervisor.lines_total} 行")
+        if supervisor.lines_dropped:
+            parts.append(f"未显示 {supervisor.lines_dropped} 行")
+        result = supervisor.result
+        if result is not None:
+            parts.insert(0, f"已退出（代码 {result.returncode}）")
+        self.log_view.set_status("  ·  ".join(parts))
+
+    def _on_game_exited(self, profile_id):
+        supervisor = self.launcher.supervisor(profile_id)
+        result = supervisor.result
+        if profile_id == self.log_profile:
+            self._drain_game_log()
+            self.ui_updates.cancel("game_log")
+        prefix = f"{self._profile_name(profile_id)}: " if len(self.profiles) > 1 else ""
+        minutes = result.runtime / 60
+        peak = f"，峰值内存 {format_bytes(result.peak_rss)}" if result.peak_rss else ""
+        if result.crash_bundle:
+            self.show_toast(f"{prefix}游戏异常退出（代码 {result.returncode}），诊断包已保存")
+            self.show_toast(result.crash_bundle)
+        else:
+            self.show_toast(f"{prefix}游戏已退出，运行 {minutes:.1f} 分钟{peak}")
 
-        def on_finished():
-            toast.hide()
-            toast.deleteLater()
-            if toast in self._active_toasts:
-                self._active_toasts.remove(toast)
-            if rearrange:
-                self._rearrange_toasts()
-
-        group.finished.connect(on_finished)
-        group.start()
-
-    def _rearrange_toasts(self):
-        margin = self.TOAST_MARGIN
-        spacing = self.TOAST_SPACING
-        for idx, t in enumerate(self._active_toasts):
-            target_y = self.height() - t.height() - margin - idx * (t.height() + spacing)
-            self._move_toast(t, self.width() - t.width() - margin, target_y)
+    def show_toast(self, message: str):
+        self.toasts.show(message)
 
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton and self.title_bar.geometry().contains(event.position().toPoint()):
@@ -491,30 +872,235 @@ class RTangClient(QWidget):
     def mouseReleaseEvent(self, event: QMouseEvent):
         self._old_pos = None
 
+    def toggle_diagnostics(self):
+        """Ctrl+Shift+D：打开或关闭诊断采样和左上角的性能浮层"""
+        if self.diagnostics is not None and self.diagnostics.running:
+            self.diagnostics.stop()
+            self.perf_overlay.hide()
+            self.show_toast("已关闭性能诊断")
+            return
+        if self.diagnostics is None:
+            from rtang.diagnostics import EventLoopMonitor, PerfOverlay
+            self.diagnostics = EventLoopMonitor(self)
+            self.perf_overlay = PerfOverlay(self.diagnostics, self.background)
+        self.perf_overlay.move(12, self.title_bar.height() + 8)
+        self.perf_overlay.show()
+        self.perf_overlay.raise_()
+        self.diagnostics.start()
+        self.show_toast("已打开性能诊断，Ctrl+Shift+E 导出")
+
+    def export_diagnostics(self):
+        if self.diagnostics is None or not self.diagnostics.samples:
+            self.show_toast("请先按 Ctrl+Shift+D 打开性能诊断")
+            return
+        from rtang import data_dir
+        path = os.path.join(data_dir(), time.strftime("diagnostics-%Y%m%d-%H%M%S.jsonl"))
+        try:
+            self.diagnostics.export(path)
+        except OSError as e:
+            self.show_toast(f"导出失败: {e}")
+            return
+        self.show_toast(f"诊断记录已导出: {path}")
+
+    def closeEvent(self, event):
+        if self.diagnostics is not None:
+            self.diagnostics.stop()
+        self._stop_music_scan()
+        self._stop_tag_reader()
+        if self.analyzer is not None:
+            self.analyzer.close()
+            self.analyzer = None
+        if self._cover_cache is not None:
+            self._cover_cache.close()
+            self._cover_cache = None
+        self._stop_launch()
+        self.settings.flush()
+        super().closeEvent(event)
+
+    def handle_command(self, command, args):
+        """处理来自命令通道（第二次启动或脚本）的命令，返回回复；未知命令返回 None"""
+        if command == "show":
+            self.showNormal()
+            self.raise_()
+            self.activateWindow()
+            return {}
+        if command == "launch":
+            profile_ids = args.get("profiles") or None
+            if profile_ids:
+                known = {p.id for p in self.profiles}
+                unknown = [pid for pid in profile_ids if pid not in known]
+                if unknown:
+                    return {"ok": False, "error": f"没有这个配置档: {', '.join(unknown)}"}
+            if not self.start_game(profile_ids):
+                return {"ok": False, "error": "没有可启动的配置档（已在启动或运行中）"}
+            return {}
+        if command == "play":
+            folder = args.get("folder")
+            if not folder or not os.path.isdir(folder):
+                return {"ok": False, "error": f"文件夹不存在: {folder}"}
+            self.settings.set("music_folder", folder)
+            self.start_music_scan(folder)
+            return {}
+        if command == "status":
+            return self.status()
+        if command == "diagnostics":
+            if self.diagnostics is None:
+                return {"running": False, "samples": [], "stalls": []}
+            return self.diagnostics.snapshot()
+        return None
+
+    def status(self):
+        supervisor = self.game_supervisor
+        game = {"running": supervisor is not None and supervisor.running()}
+        if supervisor is not None:
+            game.update(pid=supervisor.pid, startup_ms=supervisor.startup_ms, rss=supervisor.rss,
+                        peak_rss=supervisor.peak_rss)
+            if supervisor.result is not None:
+                game.update(returncode=supervisor.result.returncode, runtime=supervisor.result.runtime)
+        current = self.music_files[self.music_index] if 0 <= self.music_index < len(self.music_files) else None
+        playing = False
+        if self._player is not None:
+            playing = self._player.playbackState() == self._media_player.PlayingState
+        states = self.launcher.states() if self.launcher is not None else []
+        launching = [s for s in states if s.status in PENDING]
+        return {
+            "running": True,
+            "pid": os.getpid(),
+            "launching": bool(launching),
+            "launch_stage": launching[0].stage if launching else None,
+            "game": game,
+            "profiles": [dict(s._asdict(), name=self._profile_name(s.profile_id)) for s in states],
+            "music": {"tracks": len(self.music_files), "current": current, "playing": playing,
+                      "scanning": self._scan_thread is not None,
+                      "analysis_pending": self.analyzer.pending() if self.analyzer is not None else 0},
+        }
+
     def select_music_folder(self):
-        folder = QFileDialog.getExistingDirectory(self, "选择音乐文件夹", os.path.expanduser("~"))
+        start = self.settings.music_folder
+        if not start or not os.path.isdir(start):
+            start = os.path.expanduser("~")
+        folder = QFileDialog.getExistingDirectory(self, "选择音乐文件夹", start)
         if folder:
-            exts = (".mp3", ".wav", ".ogg", ".flac", ".m4a")
-            files = [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(exts)]
-            if files:
-                self.music_files = files
-                self.music_index = 0
-                self.btn_play.setEnabled(True)
-                self.btn_prev.setEnabled(True)
-                self.btn_next.setEnabled(True)
-                self.play_music(self.music_index)
-                self.show_toast(f"已加载 {len(files)} 首音乐")
-            else:
-                self.music_files = []
-                self.music_index = -1
-                self.btn_play.setEnabled(False)
-                self.btn_prev.setEnabled(False)
-                self.btn_next.setEnabled(False)
-                self.music_title.setText("未找到音乐文件")
-                self.show_toast("未找到音乐文件")
+            self.settings.set("music_folder", folder)
+            self.start_music_scan(folder)
         else:
             self.show_toast("未选择文件夹")
 
+    def start_music_scan(self, folder):
+        self._stop_music_scan()
+        self._start_tag_reader()
+        self._start_analyzer(folder)
+        self.music_files = []
+        self.music_index = -1
+        self.playlist_model.set_tracks([])
+        self.play_queue.reset()
+        if self._player is not None:
+            self._player.stop()
+        thread = MusicScanThread(folder, self.SCAN_BATCH_SIZE, self)
+        thread.batch_ready.connect(lambda paths: self._on_scan_batch(thread, paths))
+        thread.scan_finished.connect(lambda total, changed: self._on_scan_finished(thread, total, changed))
+        thread.finished.connect(thread.deleteLater)
+        self._scan_thread = thread
+        self._scan_last_toast = time.monotonic()
+        thread.start()
+        self.show_toast("正在扫描音乐文件夹…")
+
+    def _stop_music_scan(self):
+        thread = self._scan_thread
+        self._scan_thread = None
+        if thread is not None and thread.isRunning():
+            thread.cancel()
+            thread.wait()
+
+    def _start_analyzer(self, folder):
+        if self.analyzer is None:
+            # 进程池和解码相关模块在第一次扫描音乐时才加载
+            from rtang.analysis import AudioAnalyzer
+            self.analyzer = AudioAnalyzer(self.analysis_bridge.result_ready.emit)
+        else:
+            self.analyzer.clear()
+        self.analyzer.load_folder(folder)
+
+    def _on_analysis_ready(self, path, analysis):
+        self.track_gain_db[path] = analysis.gain_db
+        if 0 <= self.music_index < len(self.music_files) and self.music_files[self.music_index] == path:
+            self.music_progress.set_waveform(analysis.waveform)
+
+    def _track_gain(self, index):
+        if not self.settings.normalize_volume or index >= len(self.music_files):
+            return 1.0
+        from rtang.analysis import gain_factor
+        return gain_factor(self.track_gain_db.get(self.music_files[index]))
+
+    def _start_tag_reader(self):
+        self._stop_tag_reader()
+        thread = TagReadThread(parent=self)
+        thread.tags_ready.connect(lambda infos: self._on_tags_ready(thread, infos))
+        thread.finished.connect(thread.deleteLater)
+        self._tag_thread = thread
+        thread.start()
+
+    def _stop_tag_reader(self):
+        thread = self._tag_thread
+        self._tag_thread = None
+        if thread is not None and thread.isRunning():
+            thread.cancel()
+            thread.wait()
+
+    def _on_tags_ready(self, thread, infos):
+        if thread is not self._tag_thread:
+            return
+        for info in infos:
+            self.track_info[info.path] = info
+        self.playlist_model.update_info(infos)
+        if 0 <= self.music_index < len(self.music_files):
+            current = self.music_files[self.music_index]
+            if current in self.track_info:
+                self.music_title.setText(display_title(self.track_info[current], current))
+                self._show_track_cover(current)
+
+    def _on_scan_batch(self, thread, paths):
+        # 已被取消的扫描可能还有排队中的信号，直接丢弃
+        if thread is not self._scan_thread:
+            return
+        first_batch = not self.music_files
+        self.music_files.extend(paths)
+        self.playlist_model.append_tracks(paths)
+        self.play_queue.extend(len(self.music_files))
+        if self._tag_thread is not None:
+            self._tag_thread.add(paths)
+        if self.analyzer is not None:
+            self.analyzer.add(paths)
+        if first_batch:
+            self.btn_play.setEnabled(True)
+            self.btn_prev.setEnabled(True)
+            self.btn_next.setEnabled(True)
+            self.play_music(self.play_queue.advance())
+        elif self._player is not None and self.play_queue.shuffle:
+            # 随机模式下新曲目会打乱后续顺序，之前预加载的下一首可能已经不是下一首了
+            self._player.invalidate_preload()
+        now = time.monotonic()
+        if now - self._scan_last_toast >= self.SCAN_TOAST_INTERVAL:
+            self._scan_last_toast = now
+            self.show_toast(f"扫描中，已找到 {len(self.music_files)} 首")
+
+    def _on_scan_finished(self, thread, total, changed):
+        if thread is not self._scan_thread:
+            return
+        self._scan_thread = None
+        if total:
+            self.show_toast(f"已加载 {total} 首音乐（{changed} 首有更新）")
+        else:
+            self.music_files = []
+            self.music_index = -1
+            self.playlist_model.set_tracks([])
+            self.play_queue.reset()
+            self.btn_play.setEnabled(False)
+            self.btn_prev.setEnabled(False)
+            self.btn_next.setEnabled(False)
+            self.music_title.setText("未找到音乐文件")
+            self.show_toast("未找到音乐文件")
+
     def play_music(self, index):
         if not self.music_files:
             self.show_toast("请先选择音乐文件夹")
@@ -523,21 +1109,65 @@ class RTangClient(QWidget):
             self.show_toast("音乐索引超出范围")
             return
         file = self.music_files[index]
-        self.player.setSource(QUrl.fromLocalFile(file))
-        self.player.play()
+        self.player.play_track(index, file)
+        self.play_queue.set_current(index)
+        self._show_current_track(index)
+        self.start_music_icon_animation()
+
+    def _show_current_track(self, index):
+        file = self.music_files[index]
         self.music_index = index
-        self.music_title.setText(os.path.basename(file))
+        self.playlist_model.set_current(index)
+        title = display_title(self.track_info.get(file), file)
+        self.music_title.setText(title)
+        self._show_track_cover(file)
         self.btn_play.setText("⏸")
-        self.show_toast(f"正在播放: {os.path.basename(file)}")
-        self.music_progress.setValue(0)
-        self.music_progress.setMaximum(100)
-        self.start_music_icon_animation()
+        self.show_toast(f"正在播放: {title}")
+        self.music_progress.set_fraction(0)
+        analysis = self.analyzer.lookup(file) if self.analyzer is not None else None
+        self.music_progress.set_waveform(analysis.waveform if analysis is not None else None)
+        if self.analyzer is not None:
+            # 当前和下一首先分析，下一首开始播放时已能按响度调整音量
+            upcoming = self._peek_next_track()
+            self.analyzer.prioritize([file] + ([upcoming[1]] if upcoming else []))
+
+    def _peek_next_track(self):
+        """供播放器预加载：只查看队列中的下一首，不移动队列位置"""
+        index = self.play_queue.peek(auto=True)
+        if index is None or index >= len(self.music_files):
+            return None
+        return index, self.music_files[index]
+
+    def _on_track_changed(self, index):
+        # 播放器已自动切到下一首（无缝或交叉淡入），这里只同步队列和界面
+        if index >= len(self.music_files):
+            return
+        self.play_queue.set_current(index)
+        self._show_current_track(index)
+
+    def _on_queue_finished(self):
+        self.btn_play.setText("▶️")
+        self.show_toast("播放列表已结束")
+
+    def set_shuffle(self, on):
+        self.play_queue.set_shuffle(on)
+        if self._player is not None:
+            self._player.invalidate_preload()
+        self.show_toast("随机播放" if on else "顺序播放")
+
+    def cycle_repeat_mode(self):
+        mode = (self.play_queue.repeat + 1) % len(self.REPEAT_TEXT)
+        self.play_queue.set_repeat(mode)
+        if self._player is not None:
+            self._player.invalidate_preload()
+        self.btn_repeat.setText(self.REPEAT_TEXT[mode])
+        self.show_toast(self.REPEAT_TOAST[mode])
 
     def toggle_play_pause(self):
-        if self.player.mediaStatus() == QMediaPlayer.NoMedia:
+        if self._player is None or self.player.mediaStatus() == self._media_player.NoMedia:
             self.show_toast("请先选择音乐文件夹")
             return
-        if self.player.playbackState() == QMediaPlayer.PlayingState:
+        if self.player.playbackState() == self._media_player.PlayingState:
             self.player.pause()
             self.btn_play.setText("▶️")
             self.show_toast("已暂停")
@@ -549,15 +1179,39 @@ class RTangClient(QWidget):
             self.start_music_icon_animation()
 
     def on_position_changed(self, position):
+        # 播放器每秒会发出多次位置变化，合并到下一帧再更新进度条
+        self.ui_updates.post("music_position", self._apply_music_position, position)
+
+    def _apply_music_position(self, position):
         duration = self.player.duration()
-        if duration > 0:
-            percent = int(position * 100 / duration)
-            self.music_progress.setValue(percent)
-        else:
-            self.music_progress.setValue(0)
+        self.music_progress.set_fraction(position / duration if duration > 0 else 0)
 
     def on_duration_changed(self, duration):
-        self.music_progress.setValue(0)
+        self.ui_updates.cancel("music_position")
+        self.music_progress.set_fraction(0)
+
+    def seek_music(self, fraction):
+        if self._player is None:
+            return
+        duration = self._player.duration()
+        if duration > 0:
+            self._player.setPosition(int(fraction * duration))
+
+    def _on_window_active_changed(self, active):
+        # 窗口不可见时暂停图标旋转，避免后台定时唤醒；_icon_animating 保持不变以便恢复
+        if not self._icon_animating:
+            return
+        if self._music_icon_anim is not None:
+            if active and self._music_icon_anim.state() == QVariantAnimation.Paused:
+                self._music_icon_anim.resume()
+            elif active:
+                self._music_icon_anim.start()
+            else:
+                self._music_icon_anim.pause()
+        elif active:
+            self.music_timer.start(50)
+        else:
+            self.music_timer.stop()
 
     def update_music_progress(self):
         if self._icon_animating:
@@ -567,60 +1221,244 @@ class RTangClient(QWidget):
     def start_music_icon_animation(self):
         if not self._icon_animating:
             self._icon_animating = True
-            self.music_timer.start(50)
+            if not self.ui_updates.active:
+                # 窗口重新显示时再开始转动
+                return
+            if self._music_icon_anim is not None:
+                self._music_icon_anim.start()
+            else:
+                self.music_timer.start(50)
 
     def stop_music_icon_animation(self):
         if self._icon_animating:
             self._icon_animating = False
-            self.music_timer.stop()
-            self.rotate_music_icon(0)
+            if self._music_icon_anim is not None:
+                self._music_icon_anim.stop()
+                self._music_icon_item.setRotation(0)
+            else:
+                self.music_timer.stop()
+                self._rotation_angle = 0
+                self.rotate_music_icon(0)
+
+    def _build_music_icon_frames(self):
+        """从原始图标一次性预渲染全部旋转帧，之后每次计时只切换帧，不再绘制"""
+        dpr = self.devicePixelRatioF()
+        side = round(self.MUSIC_ICON_SIZE * dpr)
+        source = self._music_icon_source
+        if source.width() != side and source.height() != side:
+            source = source.scaled(side, side, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        source = QPixmap(source)
+        source.setDevicePixelRatio(1.0)
+        frames = []
+        for step in range(self.MUSIC_ICON_FRAMES):
+            frame = QPixmap(side, side)
+            frame.fill(Qt.transparent)
+            painter = QPainter(frame)
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.translate(side / 2, side / 2)
+            painter.rotate(step * 360 / self.MUSIC_ICON_FRAMES)
+            painter.translate(-source.width() / 2, -source.height() / 2)
+            painter.drawPixmap(0, 0, source)
+            painter.end()
+            frame.setDevicePixelRatio(dpr)
+            frames.append(frame)
+        self._music_icon_frames = frames
+        self._music_icon_frames_dpr = dpr
+
+    def _create_gpu_music_icon(self):
+        size = self.MUSIC_ICON_SIZE
+        view = QGraphicsView()
+        if QOpenGLContext().create():
+            try:
+                from PySide6.QtOpenGLWidgets import QOpenGLWidget
+                view.setViewport(QOpenGLWidget())
+            except ImportError:
+                pass
+        view.setFrameShape(QFrame.NoFrame)
+        view.setObjectName("musicIconView")
+        view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        view.setRenderHint(QPainter.SmoothPixmapTransform)
+        scene = QGraphicsScene(0, 0, size, size, view)
+        item = QGraphicsPixmapItem()
+        item.setTransformationMode(Qt.SmoothTransformation)
+        scene.addItem(item)
+        view.setScene(scene)
+
+        # 与定时器方案转速一致：每 50ms 转 10 度
+        anim = QVariantAnimation(self)
+        anim.setStartValue(0.0)
+        anim.setEndValue(360.0)
+        anim.setDuration(50 * 36)
+        anim.setLoopCount(-1)
+        anim.valueChanged.connect(item.setRotation)
+        self._music_icon_item = item
+        self._music_icon_anim = anim
+        return view
+
+    def _set_default_music_icon(self, pixmap):
+        self._music_icon_default = pixmap
+        if self._music_cover_id is None:
+            self._set_music_icon_source(pixmap)
+
+    def _show_track_cover(self, path):
+        """播放栏图标换成曲目的内嵌封面，没有封面时恢复默认图标"""
+        info = self.track_info.get(path)
+        cover_id = info.cover_id if info is not None else None
+        if cover_id == self._music_cover_id:
+            return
+        self._music_cover_id = cover_id
+        if cover_id is not None:
+            if self._cover_cache is None:
+                self._cover_cache = TagCache()
+            data = self._cover_cache.cover(cover_id)
+            if data is not None:
+                self.images.request(data, QSize(self.MUSIC_ICON_SIZE, self.MUSIC_ICON_SIZE), self.devicePixelRatioF(),
+                                    lambda pixmap: self._on_cover_decoded(cover_id, pixmap), cache_key=cover_id)
+                return
+        self._set_music_icon_source(self._music_icon_default)
+
+    def _on_cover_decoded(self, cover_id, pixmap):
+        # 解码期间已经换了曲目
+        if cover_id != self._music_cover_id:
+            return
+        self._set_music_icon_source(pixmap if not pixmap.isNull() else self._music_icon_default)
+
+    def _set_music_icon_source(self, pixmap):
+        if pixmap.isNull():
+            if self._music_icon_source.isNull():
+                return
+            # 换下封面但没有默认图标时退回文字图标
+            self._music_icon_source = pixmap
+            if self._music_icon_anim is not None:
+                self._music_icon_item.setPixmap(pixmap)
+            else:
+                self._music_icon_frames = []
+                self.music_icon.setText("🎵")
+            return
+        self._music_icon_source = pixmap
+        if self._music_icon_anim is not None:
+            self._music_icon_item.setPixmap(pixmap)
+            size = pixmap.deviceIndependentSize()
+            self._music_icon_item.setTransformOriginPoint(size.width() / 2, size.height() / 2)
+        else:
+            self._build_music_icon_frames()
+            self.rotate_music_icon(self._rotation_angle)
 
     def rotate_music_icon(self, angle):
-        pixmap = self.music_icon.pixmap()
-        if pixmap:
-            transform = QPixmap(pixmap.size())
-            transform.fill(Qt.transparent)
-            painter = QPainter(transform)
-            painter.translate(pixmap.width() / 2, pixmap.height() / 2)
-            painter.rotate(angle)
-            painter.translate(-pixmap.width() / 2, -pixmap.height() / 2)
-            painter.drawPixmap(0, 0, pixmap)
-            painter.end()
-            self.music_icon.setPixmap(transform)
+        if not self._music_icon_frames:
+            return
+        if self._music_icon_frames_dpr != self.devicePixelRatioF():
+            self._build_music_icon_frames()
+        step = int(angle * self.MUSIC_ICON_FRAMES / 360) % self.MUSIC_ICON_FRAMES
+        self.music_icon.setPixmap(self._music_icon_frames[step])
 
     def on_playback_state_changed(self, state):
-        if state == QMediaPlayer.PlayingState:
+        if state == self._media_player.PlayingState:
             self.start_music_icon_animation()
         else:
             self.stop_music_icon_animation()
 
-    def _on_media_status_changed(self, status):
-        if status == QMediaPlayer.EndOfMedia:
-            self.play_next_music()
-
     def play_prev_music(self):
         if not self.music_files:
             return
-        self.music_index = (self.music_index - 1) % len(self.music_files)
-        self.play_music(self.music_index)
+        self.play_music(self.play_queue.prev())
 
     def play_next_music(self):
         if not self.music_files:
             return
-        self.music_index = (self.music_index + 1) % len(self.music_files)
-        self.play_music(self.music_index)
+        index = self.play_queue.advance()
+        if index is None:
+            self.show_toast("已经是最后一首")
+            return
+        self.play_music(index)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="RTangClient")
+    parser.add_argument("--profile-startup", nargs="?", const="", default=None, metavar="JSON",
+                        help="打印启动时间线，给出路径时同时保存为 JSON")
+    parser.add_argument("--quit-after-first-frame", action="store_true", help="首帧绘制完成后立即退出，用于基准测试")
+    parser.add_argument("--eager-init", action="store_true", help="启动时就创建多媒体后端和全部页面")
+    parser.add_argument("--ui-stats", action="store_true", help="退出时打印界面更新的合并统计")
+    parser.add_argument("--diagnostics", action="store_true", help="启动时打开性能诊断（同 Ctrl+Shift+D）")
+    add_instance_arguments(parser)
+    args, qt_args = parser.parse_known_args(argv[1:])
+
+    # 设置只在启动时读取一次；界面缩放必须在创建 QApplication 之前通过环境变量指定
+    settings = Settings()
+    os.environ.setdefault("QT_SCALE_FACTOR", f"{settings.ui_scale:g}")
+    profiler.mark("读取设置")
+
+    if args.status:
+        # 没有运行中的实例时只打印状态，不启动界面
+        return forward_to_instance(argv[1:])
+
+    app = QApplication(argv[:1] + qt_args)
+    profiler.mark("创建 QApplication")
+
+    server = None
+    if not args.new_instance:
+        from rtang.ipc_server import InstanceServer
+        # 命令在事件循环开始后才会处理，此时窗口已经创建
+        server = InstanceServer(lambda command, command_args: win.handle_command(command, command_args), app)
+        if not server.listen():
+            # 两个实例几乎同时启动时，后启动的一个在这里发现对方，把参数交给它
+            code = forward_to_instance(argv[1:])
+            return code if code is not None else 1
+        profiler.mark("命令通道")
+
+    themes = ThemeManager(app, resource_path("styles"))
+    theme_error = None
+    # 用户选择的主题不可用时退回默认主题，默认主题也不可用时无样式运行
+    for key in dict.fromkeys((settings.theme, DEFAULT_THEME)):
+        try:
+            themes.apply(key)
+            break
+        except (ThemeError, OSError) as e:
+            theme_error = theme_error or str(e)
+            print(f"Warning: {e}")
+    profiler.mark("解析样式表")
+
+    win = RTangClient(lazy=not args.eager_init, settings=settings, themes=themes)
+    if theme_error:
+        win.show_toast(theme_error)
+    for error in settings.errors:
+        win.show_toast(error)
+
+    def on_first_frame():
+        profiler.mark("首帧")
+        if args.profile_startup is not None:
+            profiler.report()
+            if args.profile_startup:
+                profiler.save(args.profile_startup)
+        if args.quit_after_first_frame:
+            app.quit()
+
+    win.first_frame.connect(on_first_frame)
+    win.show()
+    profiler.mark("显示窗口")
 
+    def run_startup_commands():
+        # 本实例就是第一个实例时，--launch/--play 在窗口显示后直接执行
+        for command, command_args in commands_from_args(args):
+            if command == "show":
+                continue
+            reply = win.handle_command(command, command_args)
+            if reply is not None and reply.get("ok") is False:
+                win.show_toast(reply["error"])
 
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    QTimer.singleShot(0, run_startup_commands)
+    if args.diagnostics:
+        QTimer.singleShot(0, win.toggle_diagnostics)
 
-    try:
-        with open(resource_path("styles/pink_theme.qss"), "r", encoding="utf-8") as f:
-            app.setStyleSheet(f.read())
-    except FileNotFoundError:
-        print("Warning: styles/pink_theme.qss not found, running without style.")
+    code = app.exec()
+    if server is not None:
+        server.close()
+    if args.ui_stats:
+        print(win.ui_updates.summary(), file=sys.stderr)
+    return code
 
-    win = RTangClient()
-    win.show()
 
-    sys.exit(app.exec())
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
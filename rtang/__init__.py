@@ -0,0 +1,18 @@
+"""RTangClient 核心引擎，不依赖 QtWidgets，可被 GUI 和命令行共同使用"""
+import os
+import sys
+
+APP_NAME = "RTangClient"
+
+
+def data_dir():
+    """获取用户数据目录（索引、缓存等），不存在时自动创建"""
+    path = os.environ.get("RTANG_DATA_DIR")
+    if not path:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        else:
+            base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        path = os.path.join(base, APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
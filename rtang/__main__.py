@@ -0,0 +1,5 @@
+import sys
+
+from rtang.cli import main
+
+sys.exit(main())
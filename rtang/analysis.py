@@ -0,0 +1,555 @@
+"""
+音乐预分析：每首曲目只解码一次，计算缩略波形和响度（ITU-R BS.1770 积分响度，即 ReplayGain 2.0 的算法），
+结果按文件内容哈希存入定长记录的二进制缓存，播放时直接查表，不再分析音频。
+解码依次尝试：标准库 wave（WAV）、PATH 中的 ffmpeg、QtMultimedia 的 QAudioDecoder，都不需要额外的 Python 依赖。
+分析在进程池中进行（纯 Python 的滤波循环会长时间占用 GIL），本模块除 QAudioDecoder 外不导入 Qt。
+"""
+import hashlib
+import math
+import mmap
+import multiprocessing
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import wave
+from array import array
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from rtang import data_dir
+from rtang.hashing import available_algorithms, hash_file
+from rtang.ledger import VerifyLedger, stat_record
+
+# 分析用的采样率上限：降采样到 11 kHz 左右，K 加权滤波的两个转折频率（38 Hz、1.7 kHz）都远低于奈奎斯特频率，
+# 而逐样本的滤波循环只需处理原来四分之一的数据
+ANALYSIS_RATE = 11025
+# 每首曲目保存的波形点数，界面按控件宽度再取最大值合并
+WAVEFORM_POINTS = 1024
+# ReplayGain 2.0 的参考响度
+REFERENCE_LUFS = -18.0
+# 播放时在 ReplayGain 增益上再加的前置增益：目标响度为 -14 LUFS（各流媒体平台的常用值），
+# 否则多数流行音乐要衰减 10 dB 左右，整体音量明显变小
+PREAMP_DB = 4.0
+# 响度门限（BS.1770-4）
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+# 每 25 ms 记一个波形峰值和能量，4 个为 100 ms，16 个为一个 400 ms 的测量块
+HOPS_PER_SECOND = 40
+
+Analysis = namedtuple("Analysis", "loudness gain_db peak duration_ms waveform")
+
+# 缓存文件：32 字节文件头 + 定长记录，记录按写入顺序追加，可整体映射到内存
+MAGIC = b"RTWF"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHI20x")
+_RECORD = struct.Struct("<16sfffI")
+RECORD_SIZE = _RECORD.size + WAVEFORM_POINTS
+
+
+class DecodeError(Exception):
+    pass
+
+
+def _kweight_coefficients(rate):
+    """K 加权的两级双二阶滤波器（高架 + 高通），按任意采样率计算，与 libebur128 相同"""
+    f0, gain, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / rate)
+    a0 = 1 + k / q + k * k
+    highpass = (2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+    return shelf, highpass
+
+
+class LoudnessMeter:
+    """
+    逐块输入单声道样本（-1..1 的浮点数），统计积分响度、采样峰值和每 25 ms 的波形峰值。
+    立体声按两声道完全相同处理（先平均再补 +3 dB），对音乐来说与分声道计算相差很小，计算量只有一半。
+    """
+
+    def __init__(self, rate, channels=1):
+        self.rate = rate
+        self.hop = max(1, round(rate / HOPS_PER_SECOND))
+        self.channel_gain = 10 * math.log10(min(channels, 2))
+        self.shelf, self.highpass = _kweight_coefficients(rate)
+        self._state = [0.0] * 4
+        self._pending = array("d")
+        self.frames = 0
+        self.peak = 0.0
+        self.hop_peaks = array("f")
+        self.hop_energy = array("d")
+
+    def feed(self, samples):
+        self._pending.extend(samples)
+        hop = self.hop
+        n = len(self._pending) // hop * hop
+        for i in range(0, n, hop):
+            self._process(self._pending[i:i + hop])
+        del self._pending[:n]
+
+    def _process(self, block):
+        b0, b1, b2, a1, a2 = self.shelf
+        h1, h2 = self.highpass
+        z1, z2, w1, w2 = self._state
+        energy = 0.0
+        # 转置直接 II 型；高通的分子固定为 1, -2, 1
+        for x in block:
+            y = b0 * x + z1
+            z1 = b1 * x - a1 * y + z2
+            z2 = b2 * x - a2 * y
+            out = y + w1
+            w1 = -2 * y - h1 * out + w2
+            w2 = y - h2 * out
+            energy += out * out
+        self._state = [z1, z2, w1, w2]
+        peak = max(max(block), -min(block))
+        if peak > self.peak:
+            self.peak = peak
+        self.frames += len(block)
+        self.hop_peaks.append(peak)
+        self.hop_energy.append(energy)
+
+    def finish(self):
+        if self._pending:
+            self._process(self._pending)
+            self._pending = array("d")
+        loudness = self.loudness()
+        gain_db = 0.0 if loudness is None else REFERENCE_LUFS - loudness
+        return Analysis(loudness, gain_db, min(self.peak, 1.0), int(self.frames * 1000 / self.rate), self.waveform())
+
+    def loudness(self):
+        """积分响度（LUFS），没有高于门限的内容时为 None"""
+        energy, hop = self.hop_energy, self.hop
+        blocks = []
+        # 400 ms 块，步长 100 ms（75% 重叠）
+        for start in range(0, len(energy) - 15, 4):
+            blocks.append(sum(energy[start:start + 16]) / (16 * hop))
+        if not blocks and energy:
+            # 不足 400 ms 的曲目按整体计算
+            blocks.append(sum(energy) / (len(energy) * hop))
+
+        def lufs(mean_square):
+            return -0.691 + 10 * math.log10(mean_square) + self.channel_gain
+
+        gated = [ms for ms in blocks if ms > 0 and lufs(ms) > ABSOLUTE_GATE]
+        if not gated:
+            return None
+        threshold = lufs(sum(gated) / len(gated)) + RELATIVE_GATE
+        gated = [ms for ms in gated if lufs(ms) > threshold]
+        return lufs(sum(gated) / len(gated))
+
+    def waveform(self, points=WAVEFORM_POINTS):
+        """把每 25 ms 的峰值按最大值合并为 points 个 0..255 的点"""
+        peaks = self.hop_peaks
+        result = bytearray(points)
+        if not peaks:
+            return bytes(result)
+        count = len(peaks)
+        for i in range(points):
+            lo = i * count // points
+            hi = max(lo + 1, (i + 1) * count // points)
+            result[i] = min(255, int(max(peaks[lo:hi]) * 255 + 0.5))
+        return bytes(result)
+
+
+def _to_mono(samples, channels, step, scale):
+    """交错的多声道整数样本按 step 抽取、平均为单声道并缩放到 -1..1；抽取前不做低通，对响度估计影响很小"""
+    stride = channels * step
+    if channels == 1:
+        return [s * scale for s in samples[::stride]]
+    scale /= channels
+    columns = [samples[c::stride] for c in range(channels)]
+    return [sum(frame) * scale for frame in zip(*columns)]
+
+
+def _decode_wave(path):
+    with wave.open(path, "rb") as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        if width not in (1, 2, 4):
+            raise DecodeError(f"不支持 {width * 8} 位 WAV")
+        step = max(1, rate // ANALYSIS_RATE)
+        yield rate / step, channels
+        typecode = {1: "B", 2: "h", 4: "i"}[width]
+        scale = 1.0 / (1 << (width * 8 - 1))
+        while True:
+            data = w.readframes(65536)
+            if not data:
+                break
+            samples = array(typecode, data)
+            if width > 1 and sys.byteorder == "big":
+                samples.byteswap()
+            if width == 1:
+                # 8 位 WAV 为无符号数
+                samples = array("h", (s - 128 for s in samples))
+            yield _to_mono(samples, channels, step, scale)
+
+
+def _decode_ffmpeg(path, ffmpeg):
+    # 统一输出为双声道，单声道文件因此按双声道计算，响度偏高 3 dB（只会让它稍微更安静一些）
+    command = [ffmpeg, "-v", "error", "-nostdin", "-i", path, "-vn", "-ac", "2", "-ar", str(ANALYSIS_RATE),
+               "-f", "s16le", "-"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+    try:
+        yield ANALYSIS_RATE, 2
+        while True:
+            data = process.stdout.read(65536 * 4)
+            if not data:
+                break
+            samples = array("h", data[:len(data) // 4 * 4])
+            if sys.byteorder == "big":
+                samples.byteswap()
+            yield _to_mono(samples, 2, 1, 1 / 32768)
+        error = process.stderr.read().decode("utf-8", "replace").strip()
+        if process.wait() != 0:
+            raise DecodeError(error or f"ffmpeg 返回 {process.returncode}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def _decode_qt(path):
+    """QtMultimedia 自带的解码器；在分析进程中创建一个 QCoreApplication 驱动事件循环"""
+    from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer, QUrl
+    from PySide6.QtMultimedia import QAudioDecoder, QAudioFormat
+
+    if QCoreApplication.instance() is None:
+        QCoreApplication([])
+    decoder = QAudioDecoder()
+    requested = QAudioFormat()
+    requested.setSampleRate(ANALYSIS_RATE)
+    requested.setChannelCount(2)
+    requested.setSampleFormat(QAudioFormat.Int16)
+    decoder.setAudioFormat(requested)
+    decoder.setSource(QUrl.fromLocalFile(path))
+    chunks = []
+    loop = QEventLoop()
+    # 长时间没有新数据时放弃，避免损坏的文件让分析进程永远等下去
+    watchdog = QTimer()
+    watchdog.setSingleShot(True)
+    watchdog.setInterval(30000)
+    watchdog.timeout.connect(loop.quit)
+
+    def on_buffer():
+        buffer = decoder.read()
+        if buffer.isValid():
+            chunks.append((buffer.format(), bytes(buffer.constData())))
+        watchdog.start()
+
+    decoder.bufferReady.connect(on_buffer)
+    decoder.finished.connect(loop.quit)
+    # 出错时解码也会停止；不连接与 error() 方法同名的信号
+    decoder.isDecodingChanged.connect(lambda decoding: decoding or loop.quit())
+    decoder.start()
+    watchdog.start()
+    loop.exec()
+    decoder.stop()
+    if decoder.error() != QAudioDecoder.NoError:
+        raise DecodeError(decoder.errorString())
+    if not chunks:
+        raise DecodeError("没有解码出音频数据")
+
+    fmt = chunks[0][0]
+    rate, channels = fmt.sampleRate(), fmt.channelCount()
+    step = max(1, rate // ANALYSIS_RATE)
+    yield rate / step, channels
+    typecode, scale = {
+        QAudioFormat.UInt8: ("B", 1 / 128),
+        QAudioFormat.Int16: ("h", 1 / 32768),
+        QAudioFormat.Int32: ("i", 1 / 2147483648),
+        QAudioFormat.Float: ("f", 1.0),
+    }[fmt.sampleFormat()]
+    for _, data in chunks:
+        samples = array(typecode, data)
+        if typecode == "B":
+            samples = array("h", (s - 128 for s in samples))
+        yield _to_mono(samples, channels, step, scale)
+
+
+def _decoders(path):
+    if path.lower().endswith(".wav"):
+        yield lambda: _decode_wave(path)
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        yield lambda: _decode_ffmpeg(path, ffmpeg)
+    yield lambda: _decode_qt(path)
+
+
+def analyze_pcm(chunks):
+    """chunks 的第一项为 (采样率, 原始声道数)，其后为单声道样本块"""
+    rate, channels = next(chunks)
+    meter = LoudnessMeter(rate, channels)
+    for samples in chunks:
+        meter.feed(samples)
+    return meter.finish()
+
+
+def analyze_file(path):
+    """解码并分析单个文件，所有解码器都失败时抛出 DecodeError"""
+    errors = []
+    for decoder in _decoders(path):
+        try:
+            return analyze_pcm(decoder())
+        except (DecodeError, wave.Error, EOFError, OSError, KeyError, ValueError, ImportError) as e:
+            errors.append(str(e) or type(e).__name__)
+    raise DecodeError("; ".join(errors))
+
+
+def content_algo():
+    return "xxh3_128" if "xxh3_128" in available_algorithms() else "sha1"
+
+
+def cache_key(algo, digest):
+    """缓存记录的 16 字节键，与哈希算法无关"""
+    return hashlib.blake2b(f"{algo}:{digest}".encode("ascii"), digest_size=16).digest()
+
+
+def _analyze_job(path, algo):
+    """进程池中执行：先算内容哈希（可能与已分析过的文件重复），再解码分析"""
+    digest = hash_file(path, algo)
+    return digest, analyze_file(path)
+
+
+def _lower_priority():
+    # 分析是后台工作，不与游戏和界面争抢 CPU
+    if hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+
+class WaveformCache:
+    """
+    按内容哈希索引的定长记录文件。打开时扫描一遍键建立内存索引，读取时经 mmap 直接取记录；
+    写入只追加，进程内加锁。文件头版本或点数不符时整体重建。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "waveforms.bin")
+        self._lock = threading.Lock()
+        self._index = {}
+        self._map = None
+        self._mapped_size = 0
+        self._file = self._open()
+        self._remap()
+        for slot in range(self._count()):
+            offset = _HEADER.size + slot * RECORD_SIZE
+            self._index[bytes(self._map[offset:offset + 16])] = offset
+
+    def _open(self):
+        try:
+            f = open(self.path, "r+b")
+        except FileNotFoundError:
+            f = open(self.path, "w+b")
+        header = f.read(_HEADER.size)
+        valid = len(header) == _HEADER.size
+        if valid:
+            magic, version, points, record_size = _HEADER.unpack(header)
+            valid = (magic, version, points, record_size) == (MAGIC, VERSION, WAVEFORM_POINTS, RECORD_SIZE)
+        if not valid:
+            f.seek(0)
+            f.truncate()
+            f.write(_HEADER.pack(MAGIC, VERSION, WAVEFORM_POINTS, RECORD_SIZE))
+            f.flush()
+        size = os.fstat(f.fileno()).st_size
+        # 上次写入中断留下的半条记录直接截掉
+        whole = _HEADER.size + (size - _HEADER.size) // RECORD_SIZE * RECORD_SIZE
+        if whole != size:
+            f.truncate(whole)
+        return f
+
+    def _count(self):
+        return (self._mapped_size - _HEADER.size) // RECORD_SIZE
+
+    def _remap(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size == self._mapped_size:
+            return
+        # 旧的映射可能还被读取中的切片引用，交给垃圾回收关闭
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        self._mapped_size = size
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def get(self, key):
+        with self._lock:
+            offset = self._index.get(key)
+            if offset is None:
+                return None
+            _, loudness, gain_db, peak, duration_ms = _RECORD.unpack_from(self._map, offset)
+            start = offset + _RECORD.size
+            waveform = self._map[start:start + WAVEFORM_POINTS]
+        return Analysis(None if math.isnan(loudness) else loudness, gain_db, peak, duration_ms, waveform)
+
+    def put(self, key, analysis):
+        loudness = math.nan if analysis.loudness is None else analysis.loudness
+        record = _RECORD.pack(key, loudness, analysis.gain_db, analysis.peak, analysis.duration_ms)
+        waveform = bytes(analysis.waveform[:WAVEFORM_POINTS]).ljust(WAVEFORM_POINTS, b"\0")
+        with self._lock:
+            if key in self._index:
+                return
+            offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(record + waveform)
+            self._file.flush()
+            self._index[key] = offset
+            self._remap()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class AudioAnalyzer:
+    """
+    管理分析进程池：路径按提交顺序分析，prioritize() 可把指定曲目插到最前面。
+    已分析过的文件（路径、大小和 mtime 未变，或内容哈希相同）直接命中缓存，不进入进程池。
+    每个路径的结果只通知一次：命中缓存时在调用 add() 的线程，分析完成时在进程池的后台线程调用 on_result(path, Analysis)。
+    同时在途的任务数不超过 worker 数的两倍。
+    """
+
+    def __init__(self, on_result, cache=None, ledger=None, max_workers=None):
+        self.on_result = on_result
+        self.cache = cache or WaveformCache()
+        self.ledger = ledger or VerifyLedger(os.path.join(data_dir(), "analysis.db"))
+        self.algo = content_algo()
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) // 2))
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._queued = set()
+        self._in_flight = set()
+        self._delivered = set()
+        self._known = {}
+        self._failed = set()
+        self._pool = None
+        self._closed = False
+
+    def lookup(self, path):
+        """已缓存的分析结果；文件变化过或还没分析时返回 None"""
+        record = self._known.get(path)
+        if record is None:
+            return None
+        try:
+            if stat_record(path, record.algo, record.digest) != record:
+                return None
+        except OSError:
+            return None
+        return self.cache.get(cache_key(record.algo, record.digest))
+
+    def load_folder(self, root):
+        """读出 root 下全部已记录的路径与哈希，之后 lookup() 只需 stat"""
+        known = self.ledger.lookup(root)
+        with self._lock:
+            self._known.update(known)
+
+    def _waiting(self, path):
+        return not (path in self._in_flight or path in self._delivered or path in self._failed)
+
+    def add(self, paths):
+        with self._lock:
+            for path in paths:
+                if path not in self._queued and self._waiting(path):
+                    self._queue.append(path)
+                    self._queued.add(path)
+        self._pump()
+
+    def prioritize(self, paths):
+        """把 paths 按顺序移到队首（正在播放和即将播放的曲目）"""
+        with self._lock:
+            front = [p for p in paths if self._waiting(p)]
+            if front:
+                self._queue = deque(front + [p for p in self._queue if p not in front])
+                self._queued.update(front)
+        self._pump()
+
+    def _pump(self):
+        submit = []
+        with self._lock:
+            if self._closed:
+                return
+            while self._queue and len(self._in_flight) < self.max_workers * 2:
+                path = self._queue.popleft()
+                self._queued.discard(path)
+                analysis = self.lookup(path)
+                if analysis is not None:
+                    self._delivered.add(path)
+                    submit.append((path, analysis))
+                    continue
+                self._in_flight.add(path)
+                submit.append((path, None))
+            if any(a is None for _, a in submit) and self._pool is None:
+                # 用 spawn 启动分析进程：从图形界面进程 fork 会复制 Qt 的线程状态
+                self._pool = ProcessPoolExecutor(self.max_workers, multiprocessing.get_context("spawn"),
+                                                 initializer=_lower_priority)
+            pool = self._pool
+        for path, analysis in submit:
+            if analysis is not None:
+                self.on_result(path, analysis)
+                continue
+            future = pool.submit(_analyze_job, path, self.algo)
+            future.add_done_callback(lambda f, p=path: self._on_done(p, f))
+
+    def _on_done(self, path, future):
+        with self._lock:
+            self._in_flight.discard(path)
+            closed = self._closed
+        if closed or future.cancelled():
+            return
+        try:
+            digest, analysis = future.result()
+            record = stat_record(path, self.algo, digest)
+        except Exception:
+            # 无法解码的文件本次运行不再重试
+            with self._lock:
+                self._failed.add(path)
+            self._pump()
+            return
+        key = cache_key(self.algo, digest)
+        self.cache.put(key, analysis)
+        self.ledger.record([(path, record)])
+        with self._lock:
+            self._known[path] = record
+            self._delivered.add(path)
+        self.on_result(path, self.cache.get(key))
+        self._pump()
+
+    def pending(self):
+        with self._lock:
+            return len(self._queue) + len(self._in_flight)
+
+    def clear(self):
+        """换文件夹时丢弃排队中的任务，进行中的任务结果照常写入缓存"""
+        with self._lock:
+            self._queue.clear()
+            self._queued.clear()
+            self._delivered.clear()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._queue.clear()
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self.ledger.close()
+        self.cache.close()
+
+
+def gain_factor(gain_db, preamp_db=PREAMP_DB):
+    """ReplayGain 增益对应的 QAudioOutput 音量系数。音量上限为 1，只能衰减，比目标响度更安静的曲目保持原样"""
+    if gain_db is None:
+        return 1.0
+    return min(1.0, 10 ** ((gain_db + preamp_db) / 20))
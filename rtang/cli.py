@@ -0,0 +1,273 @@
+"""
+无界面命令行：python -m rtang verify|download|mods|launch|gc
+与图形界面使用同一套启动流程（rtang.launch），不导入任何 Qt 模块，可在没有显示器的机器上定时运行。
+标准输出每行一个 JSON 事件：
+  {"event": "stage", "stage": ...}
+  {"event": "progress", "stage": ..., "done": ..., "total": ...}
+  {"event": "log", "line": ...}          launch 时游戏的输出
+  {"event": "exit", "returncode": ...}   launch 时游戏退出
+  {"event": "result", "ok": ..., ...}    最后一行，汇总结果
+  {"event": "error", "message": ...}
+每个事件都带 "t"（自命令开始的秒数）。退出码见 EXIT_*。
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+
+from rtang.launch import LaunchError, default_launch_config, prepare_launch, spawn_game, sync_files
+from rtang.manifest import local_path
+from rtang.profiles import config_for, load_profiles
+from rtang.settings import Settings
+
+EXIT_OK = 0
+EXIT_BAD_FILES = 1       # verify 发现缺失或损坏的文件
+EXIT_USAGE = 2           # 参数错误（argparse 的默认值）
+EXIT_FAILED = 3          # 清单读取、下载或启动失败
+EXIT_GAME_FAILED = 4     # launch 时游戏以非 0 退出码结束
+EXIT_CANCELLED = 130
+
+# result 事件中最多列出的问题文件数，全部文件数见 bad_count
+MAX_LISTED = 100
+
+
+class EventWriter:
+    """线程安全地输出 JSON 行；同一阶段的进度事件按 interval 秒限流，阶段结束时的进度总会输出"""
+
+    def __init__(self, stream=None, interval=0.5):
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stage = None
+        self._last_progress = 0.0
+
+    def emit(self, event, **fields):
+        now = time.monotonic()
+        line = json.dumps(dict(event=event, t=round(now - self.started, 3), **fields), ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def progress(self, stage, done, total):
+        now = time.monotonic()
+        with self._lock:
+            new_stage = stage != self._stage
+            if not new_stage and done != total and now - self._last_progress < self.interval:
+                return
+            self._stage = stage
+            self._last_progress = now
+        if new_stage:
+            self.emit("stage", stage=stage)
+        if total:
+            self.emit("progress", stage=stage, done=done, total=total)
+
+
+def _run_cancellable(target, cancel):
+    """
+    在工作线程中执行 target，Ctrl+C 时设置 cancel 并等待工作线程收尾。
+    用事件判断是否结束：被信号打断的 join() 可能在工作线程仍在运行时就返回。
+    """
+    outcome = {}
+    finished = threading.Event()
+
+    def run():
+        try:
+            outcome["value"] = target()
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            finished.set()
+
+    threading.Thread(target=run, name="cli-worker").start()
+    while not finished.is_set():
+        try:
+            finished.wait(0.2)
+        except KeyboardInterrupt:
+            # 收尾期间再次收到信号时继续等待，不丢下还在写文件的工作线程
+            cancel.set()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("value")
+
+
+def _config(args):
+    settings = Settings()
+    for error in settings.errors:
+        print(error, file=sys.stderr)
+    if args.profile:
+        try:
+            profiles = load_profiles()
+        except ValueError as e:
+            raise LaunchError(f"配置档文件有误: {e}") from e
+        profile = next((p for p in profiles if p.id == args.profile), None)
+        if profile is None:
+            raise LaunchError(f"没有这个配置档: {args.profile}")
+        config = config_for(profile, settings)
+    else:
+        config = default_launch_config(settings)
+    if args.game_dir:
+        config.game_dir = os.path.abspath(args.game_dir)
+    if args.mirror is not None:
+        config.mirror = args.mirror
+    if args.manifest:
+        config.manifest = args.manifest
+    if args.mods_manifest is not None:
+        config.mods_manifest = args.mods_manifest
+    if args.mods_dir:
+        config.mods_dir = os.path.abspath(args.mods_dir)
+    if args.workers:
+        config.workers = args.workers
+    if args.full:
+        config.full_verify = True
+    if args.bandwidth is not None:
+        config.bandwidth_limit = args.bandwidth * 1024
+    if args.host_bandwidth is not None:
+        config.per_host_bandwidth = args.host_bandwidth * 1024
+    if args.no_store:
+        config.use_store = False
+    return config
+
+
+def cmd_sync(args, out, cancel):
+    """verify 只校验，download 校验后补全"""
+    config = _config(args)
+    repair = args.command == "download"
+    result = _run_cancellable(lambda: sync_files(config, out.progress, cancel, repair=repair), cancel)
+    if cancel.is_set():
+        out.emit("result", ok=False, cancelled=True)
+        return EXIT_CANCELLED
+    _, bad = result
+    out.emit("result", ok=not bad, game_dir=config.game_dir, bad_count=len(bad),
+             bad=[local_path(config.game_dir, e) for e in bad[:MAX_LISTED]])
+    return EXIT_BAD_FILES if bad else EXIT_OK
+
+
+def cmd_mods(args, out, cancel):
+    """只同步模组，不校验游戏文件"""
+    from rtang.modsync import sync_mods
+    config = _config(args)
+    if not config.mods_manifest:
+        raise LaunchError("未配置模组清单（--mods-manifest 或设置中的模组清单）")
+    result = _run_cancellable(lambda: sync_mods(config, out.progress, cancel), cancel)
+    if cancel.is_set():
+        out.emit("result", ok=False, cancelled=True)
+        return EXIT_CANCELLED
+    out.emit("result", ok=True, mods_dir=config.mods_path(), **result._asdict())
+    return EXIT_OK
+
+
+def cmd_launch(args, out, cancel):
+    config = _config(args)
+    command = _run_cancellable(lambda: prepare_launch(config, out.progress, cancel), cancel)
+    if cancel.is_set():
+        out.emit("result", ok=False, cancelled=True)
+        return EXIT_CANCELLED
+    if args.detach:
+        # 不接管输出，命令行退出后游戏继续运行
+        process = spawn_game(command, config.game_dir, config.process_env())
+        out.emit("result", ok=True, pid=process.pid, command=command)
+        return EXIT_OK
+
+    from rtang.supervisor import GameSupervisor
+    done = threading.Event()
+    supervisor = None
+
+    def on_output():
+        for line in supervisor.drain():
+            out.emit("log", line=line)
+
+    supervisor = GameSupervisor(command, config.game_dir, env=config.process_env(), on_output=on_output,
+                                on_exit=lambda r: done.set())
+    supervisor.start()
+    out.emit("spawned", pid=supervisor.pid, command=command)
+    try:
+        while not done.wait(0.2):
+            pass
+    except KeyboardInterrupt:
+        supervisor.terminate()
+        done.wait(10)
+    on_output()
+    result = supervisor.result
+    if result is None:
+        out.emit("result", ok=False, cancelled=True)
+        return EXIT_CANCELLED
+    out.emit("exit", returncode=result.returncode, runtime=round(result.runtime, 3), startup_ms=result.startup_ms,
+             peak_rss=result.peak_rss, crash_bundle=result.crash_bundle)
+    out.emit("result", ok=result.returncode == 0, returncode=result.returncode)
+    return EXIT_OK if result.returncode == 0 else EXIT_GAME_FAILED
+
+
+def cmd_gc(args, out, cancel):
+    from rtang.store import AssetStore
+    removed, freed = AssetStore(args.store_root).gc(args.dry_run)
+    out.emit("result", ok=True, dry_run=args.dry_run, removed=removed, freed=freed)
+    return EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m rtang", description="RTangClient 无界面命令行")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--interval", type=float, default=0.5, help="进度事件的最小间隔（秒）")
+    game = argparse.ArgumentParser(add_help=False, parents=[common])
+    game.add_argument("--profile", metavar="ID", help="使用 profiles.json 中的配置档，其余参数在其基础上覆盖")
+    game.add_argument("--game-dir", help="游戏目录，默认取用户设置")
+    game.add_argument("--mirror", help="下载镜像")
+    game.add_argument("--manifest", help="清单路径或 URL")
+    game.add_argument("--mods-manifest", help="模组清单路径或 URL，空字符串表示不同步")
+    game.add_argument("--mods-dir", help="模组目录，默认为游戏目录下的 mods")
+    game.add_argument("--workers", type=int, default=0, help="校验线程数")
+    game.add_argument("--full", action="store_true", help="忽略校验缓存，重新计算全部哈希")
+    game.add_argument("--bandwidth", type=int, help="下载限速（KB/s，0 为不限）")
+    game.add_argument("--host-bandwidth", type=int, help="每个镜像主机的下载限速（KB/s，0 为不限）")
+    game.add_argument("--no-store", action="store_true", help="不使用本地资源仓库")
+
+    sub.add_parser("verify", parents=[game], help="只校验，有问题的文件以退出码 1 报告")
+    sub.add_parser("download", parents=[game], help="校验并补全缺失或损坏的文件")
+    sub.add_parser("mods", parents=[game], help="按模组清单同步模组目录，大文件只下载变化的块")
+    launch = sub.add_parser("launch", parents=[game], help="补全文件后启动游戏，等待游戏退出")
+    launch.add_argument("--detach", action="store_true", help="启动后立即返回，不等待游戏退出")
+    gc = sub.add_parser("gc", parents=[common], help="清理资源仓库中不再被引用的内容")
+    gc.add_argument("--store-root", help="仓库目录，默认位于用户数据目录")
+    gc.add_argument("--dry-run", action="store_true", help="只统计，不删除")
+    return parser
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+COMMANDS = {"verify": cmd_sync, "download": cmd_sync, "mods": cmd_mods, "launch": cmd_launch, "gc": cmd_gc}
+
+
+def main(argv=None, stream=None):
+    args = build_parser().parse_args(argv)
+    out = EventWriter(stream, args.interval)
+    cancel = threading.Event()
+    if hasattr(signal, "SIGTERM"):
+        # 定时任务被系统终止时与 Ctrl+C 一样取消并收尾
+        signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        return COMMANDS[args.command](args, out, cancel)
+    except LaunchError as e:
+        if cancel.is_set():
+            out.emit("result", ok=False, cancelled=True)
+            return EXIT_CANCELLED
+        out.emit("error", message=str(e))
+        out.emit("result", ok=False)
+        return EXIT_FAILED
+    except KeyboardInterrupt:
+        out.emit("result", ok=False, cancelled=True)
+        return EXIT_CANCELLED
+    except Exception as e:
+        # 意外错误不能以 Python 默认的退出码 1 结束，那会被当成 EXIT_BAD_FILES
+        traceback.print_exc()
+        out.emit("error", message=f"内部错误: {e!r}")
+        out.emit("result", ok=False)
+        return EXIT_FAILED
@@ -0,0 +1,307 @@
+"""
+运行时诊断：事件循环延迟、卡顿时 GUI 线程正在执行的代码、每秒定时器唤醒、控件和动画数量、进程 CPU 与内存。
+只在打开诊断时才安装事件过滤器和心跳定时器，平时没有任何开销。
+每秒一条采样写入滚动日志（JSON 行），用户反馈"启动器卡"时让其打开诊断、复现后把日志发回即可，不需要安装分析器。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from PySide6.QtCore import QAbstractAnimation, QEvent, QObject, Qt, QTimer, Signal
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import QApplication, QLabel
+
+from rtang import data_dir
+from rtang.procstat import format_bytes, memory_info
+
+# 项目内的源文件，卡顿调用栈中优先指出这些帧
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _stack_summary(frame, limit=12):
+    """从外到内的 ["main.py:540 switch_page", ...]，只保留项目内的帧；项目内没有时保留最内层的几帧"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    # "<frozen runpy>" 这类伪文件名不是路径，不能用 abspath 拼到当前目录下
+    own = [f for f in frames if os.path.isabs(f.f_code.co_filename)
+           and os.path.normpath(f.f_code.co_filename).startswith(_PROJECT_ROOT + os.sep)]
+    if own:
+        return [f"{os.path.relpath(f.f_code.co_filename, _PROJECT_ROOT)}:{f.f_lineno} {f.f_code.co_name}"
+                for f in own[-limit:]]
+    return [f"{os.path.basename(f.f_code.co_filename)}:{f.f_lineno} {f.f_code.co_name}" for f in frames[-limit:]]
+
+
+class RollingLog:
+    """追加写入的 JSON 行文件，超过 max_bytes 时改名为 .1（依次后移，最多保留 backups 个）"""
+
+    def __init__(self, path, max_bytes=1024 * 1024, backups=2):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            if os.path.getsize(self.path) + len(line) > self.max_bytes:
+                self._rotate()
+        except OSError:
+            pass
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class EventLoopMonitor(QObject):
+    """
+    - 心跳：每 heartbeat_ms 触发一次的精确定时器，实际间隔超出的部分就是事件循环延迟（新事件要等多久才被处理）
+    - 看门狗线程：心跳超过 stall_ms 没有更新时，抓取 GUI 线程的 Python 调用栈，指出是哪个槽函数在阻塞界面；
+      阻塞在 C++ 中时调用栈停在发起调用的 Python 函数，另外记录正在分发的事件
+    - 应用级事件过滤器：统计每秒事件数，以及每个定时器（按 objectName，没有时按父对象和类名）的唤醒次数。
+      Qt 只对 GUI 线程中的对象调用应用级过滤器，后台线程的事件不会进入 Python
+    - 每秒采样控件、动画、提示框数量和进程 CPU、内存，发出 sampled(dict) 并写入滚动日志
+    """
+    sampled = Signal(dict)
+    stalled = Signal(dict)
+
+    def __init__(self, window, log_path=None, heartbeat_ms=50, stall_ms=100, history=600, parent=None):
+        super().__init__(parent or window)
+        self.window = window
+        self.heartbeat_ms = heartbeat_ms
+        self.stall_ms = stall_ms
+        self.log = RollingLog(log_path or os.path.join(data_dir(), "diagnostics.jsonl"))
+        self.samples = deque(maxlen=history)
+        self.stalls = deque(maxlen=100)
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setTimerType(Qt.PreciseTimer)
+        self._heartbeat.setInterval(heartbeat_ms)
+        self._heartbeat.timeout.connect(self._on_heartbeat)
+        self._sampler = QTimer(self)
+        self._sampler.setInterval(1000)
+        self._sampler.timeout.connect(self._sample)
+        self._own_timers = (self._heartbeat, self._sampler)
+
+        self._running = False
+        self._beat = 0.0
+        self._latencies = []
+        self._events = 0
+        self._timers = Counter()
+        self._current_event = None
+        # 看门狗抓到的 (心跳时间, 调用栈, 正在分发的事件)
+        self._stall_capture = None
+        self._stop = threading.Event()
+        self._watchdog = None
+        self._last_sample = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._beat = time.perf_counter()
+        self._last_sample = (time.monotonic(), time.process_time())
+        self._reset_counters()
+        QApplication.instance().installEventFilter(self)
+        self._heartbeat.start()
+        self._sampler.start()
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, args=(threading.get_ident(),), name="ui-watchdog",
+                                          daemon=True)
+        self._watchdog.start()
+        self.log.write({"event": "start", "time": time.time(), "pid": os.getpid()})
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        QApplication.instance().removeEventFilter(self)
+        self._heartbeat.stop()
+        self._sampler.stop()
+        self._stop.set()
+        self._watchdog.join()
+        self._watchdog = None
+        self.log.write({"event": "stop", "time": time.time()})
+
+    def _reset_counters(self):
+        self._latencies = []
+        self._events = 0
+        self._timers = Counter()
+
+    # ---- GUI 线程 ----
+
+    def eventFilter(self, obj, event):
+        kind = event.type()
+        self._events += 1
+        if kind == QEvent.Timer:
+            if obj not in self._own_timers:
+                self._timers[self._timer_name(obj)] += 1
+        self._current_event = (kind, obj)
+        return False
+
+    @staticmethod
+    def _timer_name(obj):
+        name = obj.objectName()
+        if name:
+            return name
+        cls = obj.metaObject().className()
+        parent = obj.parent()
+        if parent is None:
+            return cls
+        return f"{parent.objectName() or parent.metaObject().className()}/{cls}"
+
+    def _on_heartbeat(self):
+        now = time.perf_counter()
+        previous, self._beat = self._beat, now
+        gap = (now - previous) * 1000
+        self._latencies.append(max(0.0, gap - self.heartbeat_ms))
+        capture, self._stall_capture = self._stall_capture, None
+        if gap - self.heartbeat_ms >= self.stall_ms:
+            stack, dispatching = [], None
+            if capture is not None and capture[0] == previous:
+                _, stack, dispatching = capture
+            stall = {"time": round(time.time(), 3), "duration_ms": round(gap - self.heartbeat_ms, 1),
+                     "stack": stack, "dispatching": dispatching}
+            self.stalls.append(stall)
+            self.log.write(dict(stall, event="stall"))
+            self.stalled.emit(stall)
+
+    def _widget_counts(self):
+        widgets = QApplication.allWidgets()
+        animations = self.window.findChildren(QAbstractAnimation)
+        counts = {
+            "widgets": len(widgets),
+            "visible_widgets": sum(1 for w in widgets if w.isVisible()),
+            "animations": len(animations),
+            "running_animations": sum(1 for a in animations if a.state() == QAbstractAnimation.Running),
+            "qobjects": len(self.window.findChildren(QObject)),
+        }
+        toasts = getattr(self.window, "toasts", None)
+        if toasts is not None:
+            counts["toasts"] = {"active": len(toasts.active), "fading": toasts.fading_count(),
+                                "idle": toasts.idle_count()}
+        return counts
+
+    def _sample(self):
+        now, cpu = time.monotonic(), time.process_time()
+        elapsed = max(1e-6, now - self._last_sample[0])
+        cpu_percent = (cpu - self._last_sample[1]) / elapsed * 100
+        self._last_sample = (now, cpu)
+        memory = memory_info()
+        latencies = self._latencies
+        sample = {
+            "time": round(time.time(), 3),
+            "loop_latency_ms": {"p50": round(_percentile(latencies, 0.5), 2),
+                                "p95": round(_percentile(latencies, 0.95), 2),
+                                "max": round(max(latencies), 2) if latencies else 0.0},
+            "events_per_s": round(self._events / elapsed),
+            "timer_wakeups_per_s": round(sum(self._timers.values()) / elapsed),
+            "timers": dict(self._timers.most_common(8)),
+            "cpu_percent": round(cpu_percent, 1),
+            "rss": memory[0] if memory else None,
+        }
+        sample.update(self._widget_counts())
+        self._reset_counters()
+        self.samples.append(sample)
+        self.log.write(dict(sample, event="sample"))
+        self.sampled.emit(sample)
+
+    def snapshot(self, last=60):
+        """最近 last 秒的采样和最近的卡顿记录"""
+        return {"running": self._running, "log": self.log.path, "samples": list(self.samples)[-last:],
+                "stalls": list(self.stalls)}
+
+    def export(self, path):
+        """把内存中的全部采样和卡顿记录写成 JSON 行文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            for record in sorted([dict(s, event="sample") for s in self.samples] +
+                                 [dict(s, event="stall") for s in self.stalls], key=lambda r: r["time"]):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return path
+
+    # ---- 看门狗线程 ----
+
+    def _watch(self, gui_ident):
+        captured_for = None
+        interval = self.stall_ms / 2000
+        while not self._stop.wait(interval):
+            beat = self._beat
+            if (time.perf_counter() - beat) * 1000 < self.stall_ms + self.heartbeat_ms or captured_for == beat:
+                continue
+            # 每次卡顿只抓一次：最早的调用栈最能说明是谁开始阻塞的
+            captured_for = beat
+            frame = sys._current_frames().get(gui_ident)
+            stack = _stack_summary(frame) if frame is not None else []
+            del frame
+            dispatching = None
+            current = self._current_event
+            if current is not None:
+                kind, obj = current
+                # 只读取 Python 端已有的类型信息，不在后台线程调用 Qt 对象的方法
+                dispatching = f"{type(obj).__name__}:{getattr(kind, 'name', kind)}"
+            self._stall_capture = (beat, stack, dispatching)
+
+
+class PerfOverlay(QLabel):
+    """窗口左上角的半透明诊断信息，每秒随采样刷新一次，不接收鼠标事件"""
+
+    def __init__(self, monitor, parent):
+        super().__init__(parent)
+        self.setObjectName("perfOverlay")
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_StyledBackground, True)
+        self.setFont(QFont("Consolas", 9))
+        self.setTextFormat(Qt.PlainText)
+        self.monitor = monitor
+        self._last_stall = None
+        monitor.sampled.connect(self._on_sample)
+        monitor.stalled.connect(self._on_stall)
+        self.setText("正在采样…")
+        self.adjustSize()
+
+    def _on_stall(self, stall):
+        self._last_stall = stall
+
+    def _on_sample(self, sample):
+        latency = sample["loop_latency_ms"]
+        timers = "  ".join(f"{name} {n}" for name, n in list(sample["timers"].items())[:3])
+        toasts = sample.get("toasts")
+        lines = [
+            f"事件循环延迟 p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  最大 {latency['max']:.1f} ms",
+            f"事件 {sample['events_per_s']}/s  定时器唤醒 {sample['timer_wakeups_per_s']}/s",
+            f"  {timers}" if timers else "  没有定时器唤醒",
+            f"控件 {sample['widgets']}（可见 {sample['visible_widgets']}）  "
+            f"动画 {sample['running_animations']}/{sample['animations']}  QObject {sample['qobjects']}",
+        ]
+        if toasts is not None:
+            lines.append(f"提示框 显示 {toasts['active']}  淡出 {toasts['fading']}  空闲 {toasts['idle']}")
+        rss = format_bytes(sample["rss"]) if sample["rss"] else "-"
+        lines.append(f"CPU {sample['cpu_percent']:.1f}%  内存 {rss}")
+        if self._last_stall is not None:
+            stall = self._last_stall
+            where = stall["stack"][-1] if stall["stack"] else (stall["dispatching"] or "未知")
+            lines.append(f"最近卡顿 {stall['duration_ms']:.0f} ms  {where}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.raise_()
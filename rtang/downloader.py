@@ -0,0 +1,356 @@
+"""分块、多连接、可断点续传的下载器"""
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.parse
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from rtang.hashing import hash_file
+
+READ_BLOCK = 64 * 1024
+MAX_REDIRECTS = 5
+
+DownloadJob = namedtuple("DownloadJob", "url dest size algo digest")
+DownloadJob.__new__.__defaults__ = (None, None, None)
+
+
+class DownloadError(Exception):
+    pass
+
+
+class DownloadCancelled(DownloadError):
+    pass
+
+
+class TokenBucket:
+    """令牌桶限速，rate 为字节每秒，0 表示不限速；允许短暂透支，之后按透支量休眠"""
+
+    def __init__(self, rate=0):
+        self.rate = rate
+        self._tokens = float(rate)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ConnectionPool:
+    """按 (scheme, host, port) 复用 keep-alive 连接，每个主机的并发连接数有上限"""
+
+    def __init__(self, per_host=4, timeout=30.0):
+        self.per_host = per_host
+        self.timeout = timeout
+        self._idle = defaultdict(list)
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise DownloadError(f"不支持的地址: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return parts.scheme, parts.hostname, port
+
+    def _slot(self, key):
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self.per_host)
+            return self._slots[key]
+
+    @contextmanager
+    def connection(self, url, fresh=False):
+        """
+        取出一个连接；正常退出时放回池中，出现异常或调用方置 conn.rtang_discard 时关闭。
+        fresh 为 True 时不复用空闲连接，总是新建。
+        """
+        key = self.key(url)
+        slot = self._slot(key)
+        slot.acquire()
+        try:
+            with self._lock:
+                conn = self._idle[key].pop() if self._idle[key] and not fresh else None
+            if conn is None:
+                scheme, host, port = key
+                cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+                conn = cls(host, port, timeout=self.timeout)
+            conn.rtang_discard = False
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            if conn.rtang_discard:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle[key].append(conn)
+        finally:
+            slot.release()
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+class _PartState:
+    """记录 .part 文件中已完成的分块，保存在 dest.part.json，崩溃或断网后据此续传"""
+
+    def __init__(self, job, size, chunk_size):
+        self.job = job
+        self.size = size
+        self.chunk_size = chunk_size
+        self.part_path = job.dest + ".part"
+        self.state_path = job.dest + ".part.json"
+        self.done = set()
+        self._lock = threading.Lock()
+
+    @property
+    def chunk_count(self):
+        if self.chunk_size <= 0:
+            return 1 if self.size else 0
+        return -(-self.size // self.chunk_size)
+
+    def chunk_range(self, index):
+        if self.chunk_size <= 0:
+            return 0, self.size - 1
+        start = index * self.chunk_size
+        return start, min(self.size, start + self.chunk_size) - 1
+
+    def load_or_create(self):
+        os.makedirs(os.path.dirname(self.job.dest) or ".", exist_ok=True)
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if (saved.get("url") == self.job.url and saved.get("size") == self.size
+                    and saved.get("chunk_size") == self.chunk_size
+                    and os.path.getsize(self.part_path) == self.size):
+                self.done = set(saved.get("done", []))
+                return
+        except (OSError, ValueError):
+            pass
+        self.done = set()
+        with open(self.part_path, "wb") as f:
+            f.truncate(self.size)
+        self._save()
+
+    def mark_done(self, index):
+        with self._lock:
+            self.done.add(index)
+            self._save()
+
+    def _save(self):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"url": self.job.url, "size": self.size, "chunk_size": self.chunk_size,
+                       "done": sorted(self.done)}, f)
+        os.replace(tmp, self.state_path)
+
+    def finish(self):
+        if self.job.digest:
+            if hash_file(self.part_path, self.job.algo) != self.job.digest:
+                # 内容错误时丢弃进度，下次从头下载
+                for path in (self.part_path, self.state_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                raise DownloadError(f"下载的文件校验失败: {self.job.dest}")
+        os.replace(self.part_path, self.job.dest)
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+
+class Downloader:
+    """
+    大文件按 HTTP Range 切成多块并发下载，连接池复用 keep-alive 连接。
+    max_connections 限制全部任务的总并发，bandwidth/per_host_bandwidth 为总体和单主机限速（字节每秒）。
+    """
+
+    def __init__(self, max_connections=8, per_host_connections=4, bandwidth=0, per_host_bandwidth=0,
+                 chunk_size=4 * 1024 * 1024, timeout=30.0, retries=3):
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.pool = ConnectionPool(per_host_connections, timeout)
+        self._bucket = TokenBucket(bandwidth)
+        self._per_host_bandwidth = per_host_bandwidth
+        self._host_buckets = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="download")
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _host_bucket(self, url):
+        key = ConnectionPool.key(url)
+        with self._lock:
+            if key not in self._host_buckets:
+                self._host_buckets[key] = TokenBucket(self._per_host_bandwidth)
+            return self._host_buckets[key]
+
+    @staticmethod
+    def _target(url):
+        parts = urllib.parse.urlsplit(url)
+        return urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+
+    def probe(self, url):
+        """用 Range: bytes=0-0 探测文件大小与是否支持分块，跟随重定向；返回 (最终地址, 大小, 是否支持 Range)"""
+        for _ in range(MAX_REDIRECTS + 1):
+            try:
+                redirect, result = self._probe_once(url, fresh=False)
+            except (OSError, http.client.HTTPException):
+                # 池中的 keep-alive 连接可能已被服务器关闭，换一个新连接重试一次
+                try:
+                    redirect, result = self._probe_once(url, fresh=True)
+                except (OSError, http.client.HTTPException) as e:
+                    raise DownloadError(f"下载失败: {url} ({e})") from e
+            if redirect is None:
+                return result
+            url = redirect
+        raise DownloadError(f"重定向次数过多: {url}")
+
+    def _probe_once(self, url, fresh):
+        """返回 (重定向地址, None) 或 (None, probe 的结果)"""
+        with self.pool.connection(url, fresh) as conn:
+            conn.request("GET", self._target(url), headers={"Range": "bytes=0-0"})
+            resp = conn.getresponse()
+            if resp.status in (301, 302, 303, 307, 308):
+                location = resp.getheader("Location")
+                resp.read()
+                return urllib.parse.urljoin(url, location), None
+            if resp.status == 206:
+                resp.read()
+                total = resp.getheader("Content-Range", "").rpartition("/")[2]
+                return None, (url, int(total) if total.isdigit() else None, total.isdigit())
+            # 不支持 Range 的服务器会返回整个文件，不读正文直接丢弃连接
+            conn.rtang_discard = True
+            if resp.status == 200:
+                length = resp.getheader("Content-Length")
+                return None, (url, int(length) if length and length.isdigit() else None, False)
+            raise DownloadError(f"HTTP {resp.status}: {url}")
+
+    def _fetch_chunk(self, state, url, index, ranged, progress, cancel):
+        start, end = state.chunk_range(index)
+        self._fetch(url, start, end, ranged, state.part_path, start, progress, cancel)
+        state.mark_done(index)
+
+    def _fetch(self, url, start, end, ranged, path, offset, progress, cancel):
+        """把 url 的 [start, end] 字节写入已存在的文件 path 的 offset 处，失败时重试"""
+        bucket = self._host_bucket(url)
+        last_error = None
+        for _ in range(self.retries):
+            written = 0
+            try:
+                with self.pool.connection(url) as conn:
+                    headers = {"Range": f"bytes={start}-{end}"} if ranged else {}
+                    conn.request("GET", self._target(url), headers=headers)
+                    resp = conn.getresponse()
+                    if resp.status != (206 if ranged else 200):
+                        conn.rtang_discard = True
+                        raise DownloadError(f"HTTP {resp.status}: {url}")
+                    with open(path, "r+b") as f:
+                        f.seek(offset)
+                        while True:
+                            if cancel is not None and cancel.is_set():
+                                conn.rtang_discard = True
+                                raise DownloadCancelled("已取消")
+                            block = resp.read(READ_BLOCK)
+                            if not block:
+                                break
+                            bucket.consume(len(block))
+                            self._bucket.consume(len(block))
+                            f.write(block)
+                            written += len(block)
+                            if progress is not None:
+                                progress.add(len(block))
+                if written != end - start + 1:
+                    raise DownloadError(f"分块长度不符: {url}")
+                return
+            except DownloadCancelled:
+                raise
+            except (OSError, http.client.HTTPException, DownloadError) as e:
+                last_error = e
+                if progress is not None and written:
+                    progress.add(-written)
+        raise DownloadError(f"下载失败: {url} ({last_error})")
+
+    def download_ranges(self, url, dest, ranges, progress=None, cancel=None):
+        """
+        按 HTTP Range 并发下载 url 的若干片段，写入已存在的文件 dest。ranges 为 [(起始字节, 长度, 写入位置)]，
+        增量同步只补齐本地旧版本中没有的块时使用；服务器不支持 Range 时抛出 DownloadError。
+        """
+        if not ranges:
+            return
+        url, _, ranged = self.probe(url)
+        if not ranged:
+            raise DownloadError(f"服务器不支持分段下载: {url}")
+        futures = [self._executor.submit(self._fetch, url, start, start + length - 1, True, dest, offset,
+                                         progress, cancel)
+                   for start, length, offset in ranges]
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    def download_many(self, jobs, progress=None, cancel=None):
+        """
+        下载一组文件。progress 需提供 add(n)（如 verify.ProgressCounter），续传时已完成的分块会立即计入。
+        任一文件失败时抛出 DownloadError，已完成的分块保留在 .part 中供下次续传。
+        """
+        states = []
+        futures = []
+        for job in jobs:
+            if job.size == 0:
+                states.append(_PartState(job, 0, 0))
+                states[-1].load_or_create()
+                continue
+            url, size, ranged = self.probe(job.url)
+            if size is None:
+                raise DownloadError(f"无法确定文件大小: {job.url}")
+            if job.size is not None and size != job.size:
+                raise DownloadError(f"服务器上的文件大小与清单不符: {job.url}")
+            state = _PartState(job, size, self.chunk_size if ranged else 0)
+            state.load_or_create()
+            states.append(state)
+            for index in range(state.chunk_count):
+                if index in state.done:
+                    if progress is not None:
+                        start, end = state.chunk_range(index)
+                        progress.add(end - start + 1)
+                    continue
+                futures.append(self._executor.submit(
+                    self._fetch_chunk, state, url, index, ranged, progress, cancel))
+
+        wait(futures)
+        for future in futures:
+            future.result()
+        for state in states:
+            state.finish()
+
+    def download(self, url, dest, size=None, algo=None, digest=None, progress=None, cancel=None):
+        self.download_many([DownloadJob(url, dest, size, algo, digest)], progress, cancel)
@@ -0,0 +1,111 @@
+"""
+文件哈希引擎：大文件走 mmap，其余用每个线程复用的大缓冲区 readinto，避免每块都分配新的 bytes。
+hashlib 和 xxhash 在计算时都会释放 GIL，多个文件可以在线程池中并行计算。
+"""
+import hashlib
+import mmap
+import os
+import threading
+
+BUFFER_SIZE = 4 * 1024 * 1024
+# 不小于这个大小的文件用 mmap；小文件映射的开销比直接读取还大
+MMAP_THRESHOLD = 16 * 1024 * 1024
+# mmap 时每次交给哈希函数的切片大小，同时也是检查取消和上报进度的粒度
+MMAP_STEP = 8 * 1024 * 1024
+
+_XXHASH_ALGOS = ("xxh3_64", "xxh3_128", "xxh64")
+_local = threading.local()
+
+
+def _xxhash():
+    try:
+        import xxhash
+    except ImportError:
+        return None
+    return xxhash
+
+
+def available_algorithms():
+    """当前环境可用的算法；xxhash 为可选依赖，未安装时只有 hashlib 的算法"""
+    algos = ["sha1", "sha256"]
+    if _xxhash() is not None:
+        algos.extend(_XXHASH_ALGOS)
+    return algos
+
+
+def new_hasher(algo):
+    if algo in _XXHASH_ALGOS:
+        xxhash = _xxhash()
+        if xxhash is None:
+            raise ValueError(f"算法 {algo} 需要安装 xxhash")
+        return getattr(xxhash, algo)()
+    return hashlib.new(algo)
+
+
+def _buffer():
+    buf = getattr(_local, "buffer", None)
+    if buf is None:
+        buf = _local.buffer = bytearray(BUFFER_SIZE)
+        _local.view = memoryview(buf)
+    return _local.view
+
+
+def _hash_readinto(f, h, progress, cancel):
+    view = _buffer()
+    readinto = f.readinto
+    update = h.update
+    while True:
+        if cancel is not None and cancel.is_set():
+            return False
+        n = readinto(view)
+        if not n:
+            return True
+        update(view[:n])
+        if progress is not None:
+            progress.add(n)
+
+
+def _hash_mmap(f, size, h, progress, cancel):
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        view = memoryview(mm)
+        try:
+            for offset in range(0, size, MMAP_STEP):
+                if cancel is not None and cancel.is_set():
+                    return False
+                block = view[offset:offset + MMAP_STEP]
+                h.update(block)
+                if progress is not None:
+                    progress.add(len(block))
+                block.release()
+        finally:
+            view.release()
+    return True
+
+
+def hash_file(path, algo, progress=None, cancel=None, method="auto"):
+    """
+    返回十六进制摘要，取消时返回 None。
+    method 为 "mmap"、"readinto" 或 "auto"（按文件大小选择，mmap 失败时退回 readinto）。
+    """
+    h = new_hasher(algo)
+    # 不经过 Python 的缓冲层，readinto 直接写入复用的缓冲区
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        use_mmap = method == "mmap" or (method == "auto" and size >= MMAP_THRESHOLD)
+        if use_mmap and size > 0:
+            try:
+                done = _hash_mmap(f, size, h, progress, cancel)
+            except (OSError, ValueError):
+                # 网络文件系统等不支持映射时换用普通读取；映射在读取前就会失败，不会重复上报进度
+                if method == "mmap":
+                    raise
+                h = new_hasher(algo)
+                f.seek(0)
+                done = _hash_readinto(f, h, progress, cancel)
+        else:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            done = _hash_readinto(f, h, progress, cancel)
+    return h.hexdigest() if done else None
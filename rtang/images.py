@@ -0,0 +1,126 @@
+"""异步图片加载：工作线程中用 QImageReader 按目标尺寸解码，GUI 线程中按字节数限量的 LRU 缓存"""
+from collections import OrderedDict
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QObject, QRunnable, QSize, Qt, QThreadPool, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+from shiboken6 import isValid
+
+
+def _decode(reader, size, dpr):
+    """按目标逻辑尺寸和 DPR 缩放解码，保持宽高比；JPEG 等格式可直接在解码阶段降采样"""
+    reader.setAutoTransform(True)
+    target = QSize(round(size.width() * dpr), round(size.height() * dpr))
+    source = reader.size()
+    if source.isValid() and target.isValid():
+        scaled = source.scaled(target, Qt.KeepAspectRatio)
+        if scaled.width() < source.width():
+            reader.setScaledSize(scaled)
+    image = reader.read()
+    if not image.isNull() and target.isValid() and (image.width() > target.width() or image.height() > target.height()):
+        image = image.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+class _DecodeTask(QRunnable):
+
+    def __init__(self, relay, key, source, size, dpr):
+        super().__init__()
+        self.relay = relay
+        self.key = key
+        self.source = source
+        self.size = size
+        self.dpr = dpr
+
+    def run(self):
+        if isinstance(self.source, (bytes, bytearray)):
+            buffer = QBuffer()
+            buffer.setData(QByteArray(bytes(self.source)))
+            buffer.open(QIODevice.ReadOnly)
+            image = _decode(QImageReader(buffer), self.size, self.dpr)
+        else:
+            image = _decode(QImageReader(self.source), self.size, self.dpr)
+        self.relay.decoded.emit(self.key, image)
+
+
+class _Relay(QObject):
+    # 工作线程发出，排队送回 GUI 线程
+    decoded = Signal(object, QImage)
+
+
+class ImageService(QObject):
+    """
+    request() 命中缓存时立即回调，否则交给线程池解码，完成后在 GUI 线程回调。
+    同一图片的并发请求只解码一次；缓存键为 (来源, 宽, 高, DPR)，总量按像素字节数限制。
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_threads=2, parent=None):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._pending = {}
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._relay = _Relay(self)
+        self._relay.decoded.connect(self._on_decoded)
+
+    @property
+    def cache_bytes(self):
+        return self._cache_bytes
+
+    def request(self, source, size, dpr, callback, cache_key=None):
+        """
+        source 为文件路径或图片字节（如内嵌封面，此时需给出 cache_key）。
+        callback(pixmap) 在 GUI 线程调用，解码失败时收到空 QPixmap。
+        """
+        key = (cache_key or source, size.width(), size.height(), round(dpr, 2))
+        pixmap = self._cache.get(key)
+        if pixmap is not None:
+            self._cache.move_to_end(key)
+            callback(pixmap)
+            return
+        waiting = self._pending.get(key)
+        if waiting is not None:
+            waiting.append(callback)
+            return
+        self._pending[key] = [callback]
+        self._pool.start(_DecodeTask(self._relay, key, source, QSize(size), dpr))
+
+    def bind(self, label, source, size, placeholder=None, on_failed=None, cache_key=None):
+        """先给 label 显示占位图，解码完成后换成真正的图片；label 已销毁时忽略结果"""
+        if placeholder is not None:
+            label.setPixmap(placeholder)
+
+        def deliver(pixmap):
+            if not isValid(label):
+                return
+            if pixmap.isNull():
+                if on_failed is not None:
+                    on_failed()
+            else:
+                label.setPixmap(pixmap)
+
+        self.request(source, size, label.devicePixelRatioF(), deliver, cache_key)
+
+    def _on_decoded(self, key, image):
+        callbacks = self._pending.pop(key, [])
+        pixmap = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+        if not pixmap.isNull():
+            pixmap.setDevicePixelRatio(key[3])
+            self._insert(key, pixmap)
+        for callback in callbacks:
+            callback(pixmap)
+
+    def _insert(self, key, pixmap):
+        cost = pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+        if cost > self.max_bytes:
+            return
+        self._cache[key] = pixmap
+        self._cache_bytes += cost
+        while self._cache_bytes > self.max_bytes:
+            _, old = self._cache.popitem(last=False)
+            self._cache_bytes -= old.width() * old.height() * max(1, old.depth() // 8)
+
+    def clear(self):
+        self._cache.clear()
+        self._cache_bytes = 0
@@ -0,0 +1,201 @@
+"""
+单实例命令通道（客户端部分，不依赖 Qt）：每个请求和回复都是一行 JSON。
+服务端是运行中客户端里的 QLocalServer（见 ipc_server.py）；这里直接用 Unix 套接字或 Windows 命名管道连接，
+第二次启动和脚本调用都不需要加载 Qt，几毫秒内就能完成。
+命令: show、launch（可选参数 profiles，配置档 id 列表）、play（参数 folder）、status、diagnostics、ping。
+"""
+import argparse
+import getpass
+import json
+import os
+import re
+import socket
+import sys
+import tempfile
+import time
+
+from rtang import APP_NAME
+
+MAX_MESSAGE = 1024 * 1024
+
+
+class InstanceNotRunning(Exception):
+    pass
+
+
+def server_name():
+    """
+    传给 QLocalServer.listen 的名字：Unix 上为套接字的完整路径（放在只有本用户可写的运行时目录），
+    Windows 上为命名管道名。按用户区分，不同用户各自一个实例。
+    """
+    if sys.platform == "win32":
+        user = re.sub(r"[^\w.-]", "_", getpass.getuser())
+        return f"{APP_NAME}-{user}"
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"{APP_NAME.lower()}-{os.getuid()}.sock")
+
+
+def encode(message):
+    return json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def decode(line):
+    message = json.loads(line.decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ValueError("消息必须是 JSON 对象")
+    return message
+
+
+def _read_line(recv):
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = recv()
+        if not chunk:
+            break
+        data += chunk
+        if len(data) > MAX_MESSAGE:
+            raise ValueError("回复过长")
+    return data
+
+
+def _request_unix(name, payload, timeout):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(name)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise InstanceNotRunning(str(e)) from e
+        sock.sendall(payload)
+        return _read_line(lambda: sock.recv(65536))
+    finally:
+        sock.close()
+
+
+def _request_pipe(name, payload, timeout):
+    path = r"\\.\pipe" + "\\" + name
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            pipe = open(path, "r+b", buffering=0)
+            break
+        except FileNotFoundError as e:
+            raise InstanceNotRunning(str(e)) from e
+        except OSError:
+            # 管道的所有实例都在忙（ERROR_PIPE_BUSY），服务端确实存在，稍后重试
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.01)
+    with pipe:
+        pipe.write(payload)
+        return _read_line(lambda: pipe.read(65536))
+
+
+def request(command, timeout=2.0, **args):
+    """向运行中的实例发送命令并返回回复；没有实例时抛出 InstanceNotRunning，通信失败时抛出 OSError"""
+    payload = encode({"command": command, "args": args})
+    if sys.platform == "win32":
+        line = _request_pipe(server_name(), payload, timeout)
+    else:
+        line = _request_unix(server_name(), payload, timeout)
+    if not line:
+        raise OSError("实例没有回复")
+    try:
+        return decode(line)
+    except ValueError as e:
+        raise OSError(f"无法解析回复: {e}") from e
+
+
+def is_running(timeout=0.5):
+    """
+    是否有实例在监听命令通道。只有套接字不存在或连接被拒绝才算没有实例；
+    连接上但超时没有回复（对方还在创建窗口，尚未进入事件循环）仍算在运行。
+    """
+    try:
+        request("ping", timeout=timeout)
+    except InstanceNotRunning:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def add_instance_arguments(parser):
+    parser.add_argument("--launch", action="store_true", help="启动游戏（已有实例时交给它执行）")
+    parser.add_argument("--profile", action="append", metavar="ID",
+                        help="与 --launch 一起使用，启动指定的配置档，可重复；默认为侧边栏勾选的配置档")
+    parser.add_argument("--play", metavar="FOLDER", help="播放文件夹中的音乐（已有实例时交给它执行）")
+    parser.add_argument("--status", action="store_true", help="以 JSON 打印运行中实例的状态后退出，不启动界面")
+    parser.add_argument("--new-instance", action="store_true", help="忽略已运行的实例，启动新的实例")
+
+
+def commands_from_args(args):
+    """命令行参数对应的命令列表；没有指定动作时只唤起窗口"""
+    commands = []
+    if args.play:
+        commands.append(("play", {"folder": os.path.abspath(args.play)}))
+    if args.launch:
+        commands.append(("launch", {"profiles": args.profile} if args.profile else {}))
+    return commands or [("show", {})]
+
+
+def forward_to_instance(argv, out=None):
+    """
+    在导入 Qt 之前调用：已有实例时把参数交给它，返回进程退出码；
+    没有实例（且不是 --status）时返回 None，由调用方继续启动界面。
+    """
+    out = out or sys.stdout
+    parser = argparse.ArgumentParser(add_help=False)
+    add_instance_arguments(parser)
+    args, _ = parser.parse_known_args(argv)
+    if args.new_instance:
+        return None
+    try:
+        if args.status:
+            print(json.dumps(request("status"), ensure_ascii=False), file=out)
+            return 0
+        for command, command_args in commands_from_args(args):
+            reply = request(command, **command_args)
+            if not reply.get("ok"):
+                print(reply.get("error", f"{command} 失败"), file=sys.stderr)
+                return 1
+        return 0
+    except InstanceNotRunning:
+        if args.status:
+            print(json.dumps({"ok": False, "running": False}), file=out)
+            return 1
+        return None
+    except OSError as e:
+        # 实例存在但没有响应（例如界面卡住），不再启动第二个实例去争抢音频
+        print(f"{APP_NAME} 已在运行但没有响应: {e}", file=sys.stderr)
+        return 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rtang.ipc", description="向运行中的 RTangClient 发送命令")
+    parser.add_argument("command", choices=["show", "launch", "play", "status", "diagnostics", "ping"])
+    parser.add_argument("folder", nargs="?", help="play 命令的音乐文件夹")
+    parser.add_argument("--profile", action="append", metavar="ID", help="launch 命令启动的配置档，可重复")
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args(argv)
+    command_args = {}
+    if args.command == "play":
+        if not args.folder:
+            parser.error("play 需要指定文件夹")
+        command_args["folder"] = os.path.abspath(args.folder)
+    if args.command == "launch" and args.profile:
+        command_args["profiles"] = args.profile
+    try:
+        reply = request(args.command, timeout=args.timeout, **command_args)
+    except InstanceNotRunning:
+        print(json.dumps({"ok": False, "running": False}))
+        return 1
+    except OSError as e:
+        print(json.dumps({"ok": False, "error": str(e)}, ensure_ascii=False))
+        return 2
+    print(json.dumps(reply, ensure_ascii=False))
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""单实例命令通道的服务端：在界面线程中接收命令，交给 handler(command, args) 处理并回复一行 JSON"""
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer
+
+from rtang.ipc import MAX_MESSAGE, decode, encode, is_running, server_name
+
+
+class InstanceServer(QObject):
+    """
+    handler 返回的字典作为回复（自动补上 ok 字段），抛出异常时回复错误信息。
+    请求都很小，在界面线程中处理即可，不需要单独的线程。
+    """
+
+    def __init__(self, handler, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.name = server_name()
+        self.server = QLocalServer(self)
+        # Unix 上套接字文件只允许当前用户访问
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._buffers = {}
+
+    def listen(self):
+        """成功时返回 True；已有实例在监听时返回 False"""
+        if self.server.listen(self.name):
+            return True
+        if is_running():
+            return False
+        # 上次异常退出留下的套接字文件（连接被拒绝或文件不存在），清理后重试
+        QLocalServer.removeServer(self.name)
+        return self.server.listen(self.name)
+
+    def close(self):
+        self.server.close()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._forget(s))
+
+    def _forget(self, socket):
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket):
+        if socket not in self._buffers:
+            return
+        data = self._buffers[socket] + bytes(socket.readAll())
+        if b"\n" not in data:
+            if len(data) > MAX_MESSAGE:
+                socket.abort()
+            else:
+                self._buffers[socket] = data
+            return
+        line = data.split(b"\n", 1)[0]
+        # 每个连接只处理一条命令，回复后由服务端断开
+        del self._buffers[socket]
+        socket.write(encode(self._dispatch(line)))
+        socket.flush()
+        socket.disconnectFromServer()
+
+    def _dispatch(self, line):
+        try:
+            message = decode(line)
+            command = str(message.get("command", ""))
+            args = message.get("args") or {}
+            if not isinstance(args, dict):
+                raise ValueError("args 必须是对象")
+        except ValueError as e:
+            return {"ok": False, "error": f"无效的请求: {e}"}
+        if command == "ping":
+            return {"ok": True}
+        try:
+            reply = self.handler(command, args)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        if reply is None:
+            return {"ok": False, "error": f"未知命令: {command}"}
+        return dict(reply, ok=reply.get("ok", True))
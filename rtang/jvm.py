@@ -0,0 +1,108 @@
+"""
+JVM 参数生成：根据本机内存和 CPU 核数计算堆大小、垃圾回收器和 GC 线程数。
+预设只决定取舍方向，具体数值都按检测到的硬件算出，同一预设在不同机器上结果不同。
+"""
+import os
+import shlex
+from collections import namedtuple
+
+from rtang.procstat import system_memory
+
+MB = 1024 * 1024
+
+Machine = namedtuple("Machine", "total_mb available_mb cpus")
+Preset = namedtuple("Preset", "key label share max_heap_mb reserve_mb gc pause_ms gc_thread_share pretouch")
+
+# share 为堆占物理内存的比例；reserve_mb 为至少留给系统和游戏本身（本地内存、显存映射）的内存
+PRESETS = {p.key: p for p in (
+    Preset("low-end", "低配", 0.25, 2048, 1536, "g1", 100, 0.5, False),
+    Preset("balanced", "均衡", 0.35, 8192, 2048, "g1", 50, 0.75, False),
+    Preset("high-throughput", "高吞吐", 0.5, 16384, 3072, "zgc", 200, 1.0, True),
+)}
+DEFAULT_PRESET = "balanced"
+MIN_HEAP_MB = 512
+# ZGC 在堆较小或核数较少时不如 G1，低于这些值时高吞吐预设退回 G1
+ZGC_MIN_HEAP_MB = 4096
+ZGC_MIN_CPUS = 4
+
+
+def detect_machine():
+    """检测失败时按 4 GB 内存、可用一半估计"""
+    memory = system_memory()
+    if memory is None:
+        total, available = 4096 * MB, 2048 * MB
+    else:
+        total, available = memory
+    return Machine(total // MB, available // MB, os.cpu_count() or 1)
+
+
+def heap_size_mb(preset, machine, requested_mb=0):
+    """requested_mb 非 0 时使用用户指定的大小，但不超过物理内存减去预留部分"""
+    limit = max(MIN_HEAP_MB, machine.total_mb - preset.reserve_mb)
+    if requested_mb:
+        return max(MIN_HEAP_MB, min(requested_mb, limit))
+    heap = int(machine.total_mb * preset.share)
+    # 可用内存不足时不按总量分配，避免游戏启动后系统开始换页
+    heap = min(heap, preset.max_heap_mb, limit, max(MIN_HEAP_MB, machine.available_mb - 512))
+    # 对齐到 256 MB，参数更易读
+    return max(MIN_HEAP_MB, heap // 256 * 256)
+
+
+def parallel_gc_threads(cpus, share=1.0):
+    # 与 HotSpot 的默认公式一致：8 核以内每核一个，超出部分按 5/8 计
+    threads = cpus if cpus <= 8 else 8 + (cpus - 8) * 5 // 8
+    return max(1, int(threads * share))
+
+
+def build_jvm_args(preset_key=DEFAULT_PRESET, machine=None, memory_mb=0):
+    preset = PRESETS.get(preset_key) or PRESETS[DEFAULT_PRESET]
+    machine = machine or detect_machine()
+    heap = heap_size_mb(preset, machine, memory_mb)
+    # 低配预设让堆按需增长，其余预设固定大小，避免运行中扩容带来的停顿
+    initial = min(heap, max(MIN_HEAP_MB, heap // 4)) if preset.key == "low-end" else heap
+    args = [f"-Xms{initial}m", f"-Xmx{heap}m"]
+
+    parallel = parallel_gc_threads(machine.cpus, preset.gc_thread_share)
+    concurrent = max(1, (parallel + 3) // 4)
+    use_zgc = preset.gc == "zgc" and heap >= ZGC_MIN_HEAP_MB and machine.cpus >= ZGC_MIN_CPUS
+    if use_zgc:
+        args.append("-XX:+UseZGC")
+    else:
+        args.append("-XX:+UseG1GC")
+        args.append(f"-XX:MaxGCPauseMillis={preset.pause_ms}")
+        # 游戏每帧产生大量短命对象，放大新生代可以减少回收次数
+        args.extend(["-XX:+UnlockExperimentalVMOptions", "-XX:G1NewSizePercent=20", "-XX:G1ReservePercent=20"])
+        if heap >= 4096:
+            args.append("-XX:G1HeapRegionSize=16M")
+    args.append(f"-XX:ParallelGCThreads={parallel}")
+    args.append(f"-XX:ConcGCThreads={concurrent}")
+    args.extend(["-XX:+ParallelRefProcEnabled", "-XX:+DisableExplicitGC"])
+    # 预先触碰整个堆会拖慢启动，只在可用内存足够放下整个堆时使用
+    if preset.pretouch and machine.available_mb > heap + 1024:
+        args.append("-XX:+AlwaysPreTouch")
+    return args
+
+
+def split_jvm_args(text):
+    """按命令行规则拆分用户填写的 JVM 参数；引号不配对等无法拆分时抛出 ValueError"""
+    try:
+        if os.name == "nt":
+            # Windows 路径含反斜杠，不能按 POSIX 规则拆分
+            return [a.strip('"') for a in shlex.split(text, posix=False)]
+        return shlex.split(text)
+    except ValueError as e:
+        raise ValueError(f"{e}，请检查引号是否配对") from None
+
+
+def jvm_args_for(settings, machine=None):
+    """用户填写了自定义参数时原样使用，否则按预设生成；自定义参数无法拆分时抛出 ValueError"""
+    override = settings.jvm_args.strip()
+    if not override:
+        return build_jvm_args(settings.jvm_preset, machine, settings.memory_mb)
+    return split_jvm_args(override)
+
+
+def format_args(args):
+    if os.name == "nt":
+        return " ".join(f'"{a}"' if " " in a else a for a in args)
+    return shlex.join(args)
@@ -0,0 +1,248 @@
+"""游戏启动流程：读取清单 → 校验本地文件 → 从镜像补全 → 启动游戏进程"""
+import os
+import urllib.parse
+from dataclasses import dataclass, field
+
+from rtang.jvm import jvm_args_for
+from rtang.ledger import VerifyLedger
+from rtang.manifest import load_manifest, local_path
+from rtang.store import AssetStore
+from rtang.verify import ProgressCounter, record_entries, verify_files
+
+STAGE_MANIFEST = "manifest"
+STAGE_VERIFY = "verify"
+STAGE_DOWNLOAD = "download"
+STAGE_STORE = "store"
+STAGE_MODS_VERIFY = "mods-verify"
+STAGE_MODS = "mods"
+STAGE_SPAWN = "spawn"
+
+
+class LaunchError(Exception):
+    pass
+
+
+@dataclass
+class LaunchConfig:
+    game_dir: str
+    mirror: str = ""
+    manifest: str = ""
+    workers: int = 0
+    timeout: float = 30.0
+    full_verify: bool = False
+    # 下载并发与限速（字节每秒，0 为不限）
+    max_connections: int = 8
+    per_host_connections: int = 4
+    bandwidth_limit: int = 0
+    per_host_bandwidth: int = 0
+    # 内容寻址仓库，多个版本目录共享相同文件；store_dir 为空时使用用户数据目录
+    use_store: bool = True
+    store_dir: str = ""
+    # 用硬链接代替复制，省空间但游戏目录中的文件不能被就地改写（见 rtang.store）
+    store_hardlinks: bool = False
+    # 为空时使用清单中的 java；jvm_args 插入到 java 可执行文件之后（或清单中的 {jvm_args} 处）
+    java_path: str = ""
+    jvm_args: list = field(default_factory=list)
+    # 追加到启动命令末尾的参数，以及游戏进程额外的环境变量（配置档中的账号等）
+    game_args: list = field(default_factory=list)
+    env: dict = field(default_factory=dict)
+    # 服务器下发的模组清单（路径或地址），为空时不同步；mods_dir 为空时使用游戏目录下的 mods
+    mods_manifest: str = ""
+    mods_dir: str = ""
+
+    def mods_path(self):
+        return self.mods_dir or os.path.join(self.game_dir, "mods")
+
+    def process_env(self):
+        """游戏进程的完整环境；没有额外变量时为 None，即继承当前进程"""
+        if not self.env:
+            return None
+        return dict(os.environ, **self.env)
+
+    def manifest_location(self):
+        if self.manifest:
+            return self.manifest
+        if self.mirror:
+            return self.mirror.rstrip("/") + "/manifest.json"
+        return os.path.join(self.game_dir, "manifest.json")
+
+
+def default_launch_config(settings=None):
+    """
+    默认配置：游戏目录为当前目录下的 game；传入 settings 时取用户设置，
+    环境变量 RTANG_GAME_DIR、RTANG_MIRROR 等仍然优先，便于临时覆盖。
+    """
+    config = LaunchConfig(game_dir=os.path.join(os.path.abspath("."), "game"))
+    if settings is not None:
+        config.game_dir = settings.game_dir or config.game_dir
+        config.mirror = settings.mirror
+        config.workers = settings.verify_workers
+        config.full_verify = settings.full_verify
+        config.max_connections = settings.max_connections
+        config.per_host_connections = settings.per_host_connections
+        config.bandwidth_limit = settings.bandwidth_limit
+        config.per_host_bandwidth = settings.per_host_bandwidth
+        config.java_path = settings.java_path
+        try:
+            config.jvm_args = jvm_args_for(settings)
+        except ValueError as e:
+            raise LaunchError(f"自定义 JVM 参数有误: {e}") from e
+        config.mods_manifest = settings.mods_manifest
+        config.store_hardlinks = settings.store_hardlinks
+    config.game_dir = os.environ.get("RTANG_GAME_DIR") or config.game_dir
+    config.mirror = os.environ.get("RTANG_MIRROR", config.mirror)
+    config.manifest = os.environ.get("RTANG_MANIFEST", config.manifest)
+    config.mods_manifest = os.environ.get("RTANG_MODS_MANIFEST", config.mods_manifest)
+    for name, attr in (("RTANG_BANDWIDTH_LIMIT", "bandwidth_limit"),
+                       ("RTANG_PER_HOST_BANDWIDTH", "per_host_bandwidth")):
+        if os.environ.get(name):
+            value = os.environ[name].strip()
+            if not value.isdigit():
+                raise LaunchError(f"环境变量 {name} 必须是非负整数（字节每秒），当前为 {value!r}")
+            setattr(config, attr, int(value))
+    return config
+
+
+def mirror_url(mirror, entry):
+    return mirror.rstrip("/") + "/" + urllib.parse.quote(entry.path)
+
+
+def download_files(mirror, root, entries, config, callback=None, cancel=None):
+    # 下载器依赖 http.client，只在真正需要下载时才导入，避免拖慢客户端启动
+    import http.client
+    from rtang.downloader import DownloadCancelled, DownloadError, DownloadJob, Downloader
+
+    jobs = [DownloadJob(mirror_url(mirror, e), local_path(root, e), e.size, e.algo, e.digest) for e in entries]
+    progress = ProgressCounter(sum(e.size for e in entries), callback)
+    try:
+        with Downloader(config.max_connections, config.per_host_connections, config.bandwidth_limit,
+                        config.per_host_bandwidth, timeout=config.timeout) as downloader:
+            downloader.download_many(jobs, progress, cancel)
+    except DownloadCancelled as e:
+        raise LaunchError("已取消") from e
+    except (DownloadError, OSError, http.client.HTTPException) as e:
+        raise LaunchError(str(e)) from e
+
+
+def build_command(manifest, config):
+    command = manifest.launch.get("command")
+    if not command:
+        raise LaunchError("清单中没有启动命令")
+    if not isinstance(command, list):
+        raise LaunchError("清单中的启动命令必须是数组")
+    java = config.java_path or "java"
+    result = []
+    expanded = False
+    for arg in command:
+        arg = str(arg)
+        if arg == "{jvm_args}":
+            result.extend(config.jvm_args)
+            expanded = True
+            continue
+        try:
+            result.append(arg.format(game_dir=config.game_dir, java=java))
+        except (KeyError, IndexError, ValueError) as e:
+            # 只支持 {game_dir} 和 {java}，字面的花括号要写成 {{ }}
+            raise LaunchError(f"清单中的启动参数无效: {arg} ({e!r})") from e
+    if not expanded and config.jvm_args and _is_java(command[0]):
+        result[1:1] = config.jvm_args
+    if config.java_path and _is_java(command[0]):
+        result[0] = config.java_path
+    return result + list(config.game_args)
+
+
+def _is_java(executable):
+    name = os.path.splitext(os.path.basename(str(executable)))[0].lower()
+    return name in ("java", "javaw", "{java}")
+
+
+def spawn_game(command, cwd, env=None):
+    import subprocess
+    try:
+        return subprocess.Popen(command, cwd=cwd, env=env)
+    except OSError as e:
+        raise LaunchError(f"无法启动游戏: {e}") from e
+
+
+def sync_files(config, callback=None, cancel=None, repair=True):
+    """
+    读取清单并校验本地文件；repair 为 True 时再从仓库和镜像补全。
+    返回 (清单, 仍缺失或损坏的条目)，repair 时后者总是为空（补全失败会抛出 LaunchError）。
+    callback(stage, done, total) 在工作线程中调用，verify/download 阶段以字节计，store 阶段以文件数计。
+    """
+    def report(stage):
+        if callback is None:
+            return None
+        return lambda done, total: callback(stage, done, total)
+
+    def check_cancel():
+        if cancel is not None and cancel.is_set():
+            raise LaunchError("已取消")
+
+    if callback is not None:
+        callback(STAGE_MANIFEST, 0, 0)
+    try:
+        manifest = load_manifest(config.manifest_location(), config.timeout)
+    except (OSError, ValueError) as e:
+        raise LaunchError(f"读取游戏清单失败: {e}") from e
+    check_cancel()
+
+    ledger = VerifyLedger()
+    try:
+        bad = verify_files(config.game_dir, manifest.files, config.workers or None, report(STAGE_VERIFY),
+                           cancel, ledger, config.full_verify)
+        check_cancel()
+        if not repair:
+            return manifest, bad
+
+        store = AssetStore(config.store_dir or None, config.store_hardlinks) if config.use_store else None
+        if store is not None:
+            if store.ref_digest(config.game_dir) != AssetStore.entries_digest(manifest.files):
+                # 首次登记这个版本目录：把校验通过的文件收入仓库，供其他版本共享
+                bad_set = set(bad)
+                good = [e for e in manifest.files if e not in bad_set]
+                for i, entry in enumerate(good):
+                    check_cancel()
+                    if callback is not None:
+                        callback(STAGE_STORE, i, len(good))
+                    store.add_file(local_path(config.game_dir, entry), entry.algo, entry.digest)
+                if callback is not None and good:
+                    callback(STAGE_STORE, len(good), len(good))
+            if bad:
+                missing = store.materialize(config.game_dir, bad)
+                missing_set = set(missing)
+                record_entries(ledger, config.game_dir, [e for e in bad if e not in missing_set])
+                bad = missing
+
+        if bad:
+            mirror = config.mirror or manifest.mirror
+            if not mirror:
+                raise LaunchError(f"{len(bad)} 个文件缺失或损坏，且未配置下载镜像")
+            download_files(mirror, config.game_dir, bad, config, report(STAGE_DOWNLOAD), cancel)
+            record_entries(ledger, config.game_dir, bad)
+            if store is not None:
+                for entry in bad:
+                    store.add_file(local_path(config.game_dir, entry), entry.algo, entry.digest)
+            check_cancel()
+        if store is not None:
+            store.write_ref(config.game_dir, manifest.files)
+    finally:
+        ledger.close()
+    return manifest, []
+
+
+def prepare_launch(config, callback=None, cancel=None):
+    """
+    执行启动前的全部步骤（清单、校验、补全、同步模组），返回启动命令，由调用方决定如何启动和监管进程。
+    图形界面和命令行（rtang.cli）都经过这里。
+    """
+    manifest, _ = sync_files(config, callback, cancel)
+    from rtang.modsync import finish_pending, sync_mods
+    if config.mods_manifest:
+        sync_mods(config, callback, cancel)
+    else:
+        # 不再同步时也要补完上次中断的替换，游戏不能看到一半新一半旧的模组目录
+        finish_pending(config.mods_path())
+    if callback is not None:
+        callback(STAGE_SPAWN, 0, 0)
+    return build_command(manifest, config)
@@ -0,0 +1,164 @@
+"""侧边栏的配置档列表：勾选要启动的配置档，每行显示排队、准备、运行等状态和进度"""
+from PySide6.QtCore import QObject, Qt, Signal
+from PySide6.QtWidgets import (
+    QCheckBox, QFrame, QHBoxLayout, QLabel, QProgressBar, QSizePolicy, QToolButton, QVBoxLayout, QWidget
+)
+
+from rtang.launch import (
+    STAGE_DOWNLOAD, STAGE_MANIFEST, STAGE_MODS, STAGE_MODS_VERIFY, STAGE_SPAWN, STAGE_STORE, STAGE_VERIFY
+)
+from rtang.orchestrator import CANCELLED, EXITED, FAILED, PENDING, PREPARING, QUEUED, RUNNING, WAITING
+
+
+class LaunchBridge(QObject):
+    """LaunchOrchestrator 的回调在后台线程执行，经排队信号送回 GUI 线程"""
+    state_changed = Signal(object)
+    output_pending = Signal(str)
+
+
+STAGE_TEXT = {
+    STAGE_MANIFEST: "读取清单",
+    STAGE_VERIFY: "校验文件",
+    STAGE_STORE: "登记仓库",
+    STAGE_DOWNLOAD: "下载文件",
+    STAGE_MODS_VERIFY: "校验模组",
+    STAGE_MODS: "同步模组",
+    STAGE_SPAWN: "正在启动",
+}
+
+
+def state_text(state):
+    if state is None:
+        return ""
+    if state.status == QUEUED:
+        return "排队中"
+    if state.status == PREPARING:
+        text = STAGE_TEXT.get(state.stage, "准备中")
+        if state.total:
+            text += f" {state.done * 100 // state.total}%"
+        return text
+    if state.status == WAITING:
+        return state.message or "等待中"
+    if state.status == RUNNING:
+        return f"运行中 · PID {state.pid}"
+    if state.status == EXITED:
+        return f"已退出（代码 {state.returncode}）"
+    if state.status == FAILED:
+        return f"失败: {state.message}"
+    if state.status == CANCELLED:
+        return "已取消"
+    return state.status
+
+
+class _ProfileRow(QWidget):
+
+    def __init__(self, profile, checked, parent=None):
+        super().__init__(parent)
+        self.profile_id = profile.id
+        self.state = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+        top = QHBoxLayout()
+        top.setSpacing(4)
+        self.check = QCheckBox(profile.name)
+        self.check.setObjectName("profileCheck")
+        self.check.setChecked(checked)
+        self.check.setToolTip(profile.game_dir or "使用设置中的游戏目录")
+        self.stop_button = QToolButton()
+        self.stop_button.setObjectName("profileStop")
+        self.stop_button.setText("✕")
+        self.stop_button.setCursor(Qt.PointingHandCursor)
+        self.stop_button.hide()
+        top.addWidget(self.check, 1)
+        top.addWidget(self.stop_button)
+        self.status = QLabel()
+        self.status.setObjectName("profileStatus")
+        # 失败原因可能很长，按行宽省略，完整内容在提示中
+        self.status.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Preferred)
+        self.progress = QProgressBar()
+        self.progress.setObjectName("profileProgress")
+        self.progress.setRange(0, 1000)
+        self.progress.setTextVisible(False)
+        self.progress.setFixedHeight(4)
+        self.progress.hide()
+        layout.addLayout(top)
+        layout.addWidget(self.status)
+        layout.addWidget(self.progress)
+        self.status.hide()
+
+    def set_state(self, state):
+        self.state = state
+        self._elide_status()
+        self.status.setVisible(state is not None)
+        self.status.setToolTip(state.message if state is not None else "")
+        preparing = state is not None and state.status == PREPARING and state.total > 0
+        if preparing:
+            self.progress.setValue(state.done * 1000 // state.total)
+        self.progress.setVisible(preparing)
+        active = state is not None and (state.status in PENDING or state.status == RUNNING)
+        self.stop_button.setVisible(active)
+        self.stop_button.setToolTip("结束游戏" if active and state.status == RUNNING else "取消启动")
+
+    def _elide_status(self):
+        text = state_text(self.state)
+        self.status.setText(self.status.fontMetrics().elidedText(text, Qt.ElideRight, max(self.width(), 80)))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._elide_status()
+
+
+class LaunchPanel(QFrame):
+    """
+    selection_changed(勾选的 id 列表) 在勾选变化时发出；stop_requested(id) 由每行的 ✕ 发出，
+    排队或准备中时表示取消，运行中时表示结束游戏；双击一行发出 log_requested(id)，日志页改为显示该配置档。
+    """
+    selection_changed = Signal(list)
+    stop_requested = Signal(str)
+    log_requested = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("launchPanel")
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._layout.setSpacing(8)
+        self._rows = {}
+        self._key = None
+
+    def set_profiles(self, profiles, selected):
+        """配置档有变化时重建列表，已有行的状态保留"""
+        key = [(p.id, p.name, p.game_dir) for p in profiles]
+        if key == self._key:
+            return
+        self._key = key
+        states = {pid: row.state for pid, row in self._rows.items()}
+        for row in self._rows.values():
+            row.deleteLater()
+        self._rows = {}
+        for profile in profiles:
+            row = _ProfileRow(profile, profile.id in selected, self)
+            row.check.toggled.connect(lambda _: self.selection_changed.emit(self.selected()))
+            row.stop_button.clicked.connect(lambda _=False, pid=profile.id: self.stop_requested.emit(pid))
+            row.set_state(states.get(profile.id))
+            self._layout.addWidget(row)
+            self._rows[profile.id] = row
+        # 只有一个配置档时界面与单实例启动相同，不显示列表
+        self.setVisible(len(profiles) > 1)
+
+    def selected(self):
+        return [pid for pid, row in self._rows.items() if row.check.isChecked()]
+
+    def update_state(self, state):
+        row = self._rows.get(state.profile_id)
+        if row is not None:
+            row.set_state(state)
+
+    def mouseDoubleClickEvent(self, event):
+        child = self.childAt(event.position().toPoint())
+        while child is not None and not isinstance(child, _ProfileRow):
+            child = child.parentWidget()
+        if child is not None:
+            self.log_requested.emit(child.profile_id)
+        super().mouseDoubleClickEvent(event)
@@ -0,0 +1,67 @@
+"""校验账本：记录文件上次校验通过时的大小、mtime、inode 和哈希，热启动时只需 stat"""
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+from rtang import data_dir
+
+LedgerRecord = namedtuple("LedgerRecord", "size mtime_ns inode algo digest")
+
+
+class VerifyLedger:
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(data_dir(), "verify.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " algo TEXT NOT NULL,"
+            " digest TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def lookup(self, root):
+        """一次性读出 root 下的全部记录：{绝对路径: LedgerRecord}"""
+        lo = os.path.join(os.path.normpath(os.path.abspath(root)), "")
+        hi = lo[:-1] + chr(ord(lo[-1]) + 1)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns, inode, algo, digest FROM files WHERE path >= ? AND path < ?",
+                (lo, hi)
+            ).fetchall()
+        return {path: LedgerRecord(*fields) for path, *fields in rows}
+
+    def record(self, rows):
+        """rows: [(绝对路径, LedgerRecord), ...]"""
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, *rec) for path, rec in rows]
+            )
+            self._conn.commit()
+
+    def forget(self, paths):
+        if not paths:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in paths])
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def stat_record(path, algo, digest):
+    st = os.stat(path)
+    return LedgerRecord(st.st_size, st.st_mtime_ns, st.st_ino, algo, digest)
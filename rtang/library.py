@@ -0,0 +1,116 @@
+"""音乐库递归扫描与持久化索引"""
+import os
+import sqlite3
+import threading
+
+from rtang import data_dir
+
+MUSIC_EXTS = (".mp3", ".wav", ".ogg", ".flac", ".m4a")
+
+
+class LibraryIndex:
+    """以路径为键、记录 mtime 和大小的 SQLite 索引，重复扫描时只处理有变化的文件"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(data_dir(), "library.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tracks ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _prefix_range(root):
+        # 用区间查询代替 LIKE，避免路径中的 % 和 _ 被当作通配符
+        root = os.path.join(os.path.normpath(root), "")
+        return root, root[:-1] + chr(ord(root[-1]) + 1)
+
+    def known(self, root):
+        """返回 root 下已索引文件的 {path: (mtime_ns, size)}"""
+        lo, hi = self._prefix_range(root)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, size FROM tracks WHERE path >= ? AND path < ?", (lo, hi)
+            ).fetchall()
+        return {path: (mtime_ns, size) for path, mtime_ns, size in rows}
+
+    def update(self, rows):
+        """rows: [(path, mtime_ns, size), ...]"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO tracks (path, mtime_ns, size) VALUES (?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size",
+                rows
+            )
+            self._conn.commit()
+
+    def remove(self, paths):
+        with self._lock:
+            self._conn.executemany("DELETE FROM tracks WHERE path = ?", [(p,) for p in paths])
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def iter_music_files(root, exts=MUSIC_EXTS):
+    """递归遍历 root，按目录内文件名排序产出 (path, mtime_ns, size)"""
+    stack = [os.path.normpath(root)]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name.lower())
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.lower().endswith(exts):
+                    # Windows 上 scandir 已带回 stat 信息，不会额外触发系统调用
+                    st = entry.stat()
+                    yield entry.path, st.st_mtime_ns, st.st_size
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+
+def scan_library(root, index, batch_size=500, cancel=None):
+    """
+    扫描 root 并同步索引，分批产出 (paths, changed)：
+    paths 为本批找到的音乐文件，changed 为其中新增或有改动的数量。
+    扫描结束后会把已删除的文件从索引中移除；cancel 为 threading.Event，置位后提前结束。
+    """
+    known = index.known(root)
+    seen = set()
+    batch = []
+    changed = []
+    for path, mtime_ns, size in iter_music_files(root):
+        if cancel is not None and cancel.is_set():
+            return
+        seen.add(path)
+        batch.append(path)
+        if known.get(path) != (mtime_ns, size):
+            changed.append((path, mtime_ns, size))
+        if len(batch) >= batch_size:
+            if changed:
+                index.update(changed)
+            yield batch, len(changed)
+            batch = []
+            changed = []
+    if changed:
+        index.update(changed)
+    if batch:
+        yield batch, len(changed)
+    removed = known.keys() - seen
+    if removed:
+        index.remove(removed)
@@ -0,0 +1,63 @@
+"""游戏日志页：按批追加到只保留最近若干行的文本框"""
+from PySide6.QtGui import QFont, QTextCursor
+from PySide6.QtWidgets import QLabel, QPlainTextEdit, QVBoxLayout, QWidget
+
+
+class LogView(QWidget):
+    """
+    QPlainTextEdit 按块存储文本，追加大量行比 QTextEdit 快得多；行数上限与环形缓冲一致。
+    页面不可见时不追加，重新显示时从环形缓冲整体重建一次。
+    """
+
+    def __init__(self, max_lines=5000, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 10, 20, 10)
+        layout.setSpacing(8)
+        self.status_label = QLabel("游戏未运行")
+        self.status_label.setObjectName("logStatus")
+        self.text = QPlainTextEdit()
+        self.text.setObjectName("gameLog")
+        self.text.setReadOnly(True)
+        self.text.setUndoRedoEnabled(False)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text.setMaximumBlockCount(max_lines)
+        self.text.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.text)
+        self.supervisor = None
+        self._stale = False
+
+    def attach(self, supervisor, reload=False):
+        """reload 为 True 时下次显示从环形缓冲载入已有输出"""
+        self.supervisor = supervisor
+        self.text.clear()
+        self._stale = reload
+
+    def append_lines(self, lines):
+        if not lines:
+            return
+        if not self.isVisible():
+            self._stale = True
+            return
+        bar = self.text.verticalScrollBar()
+        follow = bar.value() >= bar.maximum() - 2
+        # 一批只插入一次，避免每行都触发一次布局
+        cursor = QTextCursor(self.text.document())
+        cursor.movePosition(QTextCursor.End)
+        if not self.text.document().isEmpty():
+            cursor.insertText("\n")
+        cursor.insertText("\n".join(lines))
+        if follow:
+            bar.setValue(bar.maximum())
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._stale and self.supervisor is not None:
+            self._stale = False
+            self.text.setPlainText("\n".join(self.supervisor.snapshot(clear_pending=True)))
+            bar = self.text.verticalScrollBar()
+            bar.setValue(bar.maximum())
+
+    def set_status(self, text):
+        self.status_label.setText(text)
@@ -0,0 +1,75 @@
+"""游戏清单：文件列表、大小与哈希"""
+import json
+import os
+import posixpath
+from collections import namedtuple
+
+from rtang.hashing import available_algorithms
+
+HASH_ALGOS = ("sha256", "sha1", "xxh3_128", "xxh3_64", "xxh64")
+
+ManifestEntry = namedtuple("ManifestEntry", "path size algo digest")
+Manifest = namedtuple("Manifest", "version files mirror launch")
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def _safe_relpath(path):
+    """清单里的路径一律是 / 分隔的相对路径，不允许跳出游戏目录"""
+    norm = posixpath.normpath(path.replace("\\", "/"))
+    if norm.startswith(("/", "../")) or norm in ("..", ".") or ":" in norm.split("/")[0]:
+        raise ManifestError(f"清单中存在非法路径: {path}")
+    return norm
+
+
+def parse_manifest(data):
+    """
+    解析清单字典，格式：
+    {"version": "1.0", "mirror": "http://...",
+     "files": [{"path": "bin/game.jar", "size": 123, "sha256": "..."}],
+     "launch": {"command": ["java", "-jar", "{game_dir}/bin/game.jar"]}}
+    每个文件可以给出 sha256、sha1 或 xxhash 系列（需安装 xxhash），按 HASH_ALGOS 顺序取第一个可用的。
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("files", []), list):
+        raise ManifestError("清单必须是对象，files 必须是数组")
+    available = set(available_algorithms())
+    files = []
+    for index, item in enumerate(data.get("files", [])):
+        if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+            raise ManifestError(f"第 {index + 1} 个文件缺少 path")
+        try:
+            size = int(item["size"])
+        except (KeyError, TypeError, ValueError):
+            raise ManifestError(f"文件的 size 无效: {item['path']}") from None
+        for algo in HASH_ALGOS:
+            if item.get(algo) and algo in available:
+                digest = str(item[algo]).lower()
+                break
+        else:
+            raise ManifestError(f"文件缺少可用的哈希: {item['path']}")
+        files.append(ManifestEntry(_safe_relpath(item["path"]), size, algo, digest))
+    launch = data.get("launch", {})
+    if not isinstance(launch, dict):
+        raise ManifestError("launch 必须是对象")
+    return Manifest(str(data.get("version", "")), files, str(data.get("mirror") or ""), launch)
+
+
+def read_manifest_data(location, timeout=30):
+    """从本地路径或 http(s) 地址读取清单的原始字典"""
+    if location.startswith(("http://", "https://")):
+        import urllib.request
+        with urllib.request.urlopen(location, timeout=timeout) as resp:
+            return json.load(resp)
+    with open(location, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_manifest(location, timeout=30):
+    """从本地路径或 http(s) 地址读取清单"""
+    return parse_manifest(read_manifest_data(location, timeout))
+
+
+def local_path(root, entry):
+    return os.path.join(root, *entry.path.split("/"))
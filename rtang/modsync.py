@@ -0,0 +1,552 @@
+"""
+模组与资源包同步：让本地 mods 目录与服务器下发的清单一致。
+- 只处理有变化的文件：校验经账本只需 stat，大小或哈希不同的文件才会更新
+- 块级增量：清单中标记 delta 的大文件在镜像上附带块签名（文件名加 .rtsig）。本地有旧版本（同名文件，
+  或同目录下改了版本号的旧文件）时按签名复用其中相同的块，只用 HTTP Range 下载变化的块
+- 原子应用：新文件先在 .rtang-sync/staging 中拼装并校验，全部就绪后写入日志，再逐个改名替换；
+  替换中途退出时，下次同步或启动前按日志补完，游戏不会看到一半新一半旧的目录
+镜像可以是 http(s) 地址，也可以是本地目录，便于测试和局域网共享。清单与游戏清单格式相同，另有：
+    {"exclusive": true, "files": [{"path": "x.jar", "size": 1, "sha256": "...", "delta": true}]}
+exclusive 为 true 时清单之外的文件移入 .rtang-sync/disabled（不删除，可以手动找回）；否则只删除以前由同步安装、
+现已从清单移除的文件。清单和签名可用 python -m rtang.modsync build 目录 生成。
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import posixpath
+import shutil
+import struct
+import sys
+from collections import namedtuple
+
+from rtang.hashing import hash_file
+from rtang.launch import STAGE_MODS, STAGE_MODS_VERIFY, LaunchError, mirror_url
+from rtang.ledger import VerifyLedger
+from rtang.manifest import local_path, parse_manifest, read_manifest_data
+from rtang.store import AssetStore
+from rtang.verify import ProgressCounter, record_entries, verify_files
+
+SYNC_DIR = ".rtang-sync"
+SIGNATURE_SUFFIX = ".rtsig"
+# 小于这个大小的文件直接整个下载，增量的额外请求不划算
+DELTA_MIN_SIZE = 1024 * 1024
+# 块边界：zip 本地文件头。模组 jar 和资源包都是 zip，中间某个条目变化或长度改变时，
+# 其后条目的块仍能对齐复用；没有文件头的区域按 MAX_BLOCK 定长切分
+BLOCK_ANCHOR = b"PK\x03\x04"
+MIN_BLOCK = 16 * 1024
+MAX_BLOCK = 256 * 1024
+COPY_BLOCK = 1024 * 1024
+
+_SIG_MAGIC = b"RTSG"
+_SIG_VERSION = 1
+_SIG_HEADER = struct.Struct("<4sHHQ")
+_SIG_RECORD = struct.Struct("<I16s")
+
+SyncResult = namedtuple("SyncResult", "updated removed disabled downloaded reused")
+
+
+# ---- 块签名 ----
+
+def split_blocks(buf):
+    """按内容切块，返回 [(起始位置, 长度)]；同样的内容无论在文件中的位置如何，切出的块都相同"""
+    blocks = []
+    size = len(buf)
+    start = 0
+    while start < size:
+        limit = min(size, start + MAX_BLOCK)
+        cut = buf.find(BLOCK_ANCHOR, start + MIN_BLOCK, limit)
+        end = cut if cut != -1 else limit
+        blocks.append((start, end - start))
+        start = end
+    return blocks
+
+
+def block_digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _map(f):
+    size = os.fstat(f.fileno()).st_size
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+
+def file_signature(path):
+    """文件的块签名：[(长度, 摘要)]"""
+    with open(path, "rb") as f:
+        buf = _map(f)
+        try:
+            return [(length, block_digest(buf[start:start + length])) for start, length in split_blocks(buf)]
+        finally:
+            if buf:
+                buf.close()
+
+
+def encode_signature(size, blocks):
+    parts = [_SIG_HEADER.pack(_SIG_MAGIC, _SIG_VERSION, 0, size)]
+    parts.extend(_SIG_RECORD.pack(length, digest) for length, digest in blocks)
+    return b"".join(parts)
+
+
+def decode_signature(data):
+    """返回 (文件大小, [(长度, 摘要)])，格式错误时抛出 ValueError"""
+    if len(data) < _SIG_HEADER.size:
+        raise ValueError("签名文件过短")
+    magic, version, _, size = _SIG_HEADER.unpack_from(data)
+    if magic != _SIG_MAGIC or version != _SIG_VERSION:
+        raise ValueError("不是块签名文件")
+    body = memoryview(data)[_SIG_HEADER.size:]
+    if len(body) % _SIG_RECORD.size:
+        raise ValueError("签名文件不完整")
+    blocks = list(_SIG_RECORD.iter_unpack(body))
+    if sum(length for length, _ in blocks) != size:
+        raise ValueError("签名与文件大小不符")
+    return size, blocks
+
+
+# ---- 镜像 ----
+
+class _DirectoryMirror:
+    """本地目录（或 file:// 地址）镜像"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def close(self):
+        pass
+
+    def signature(self, entry):
+        try:
+            with open(local_path(self.root, entry) + SIGNATURE_SUFFIX, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _copy(self, src, dest, start, length, offset, progress, cancel):
+        with open(src, "rb") as fin, open(dest, "r+b") as fout:
+            fin.seek(start)
+            fout.seek(offset)
+            while length > 0:
+                if cancel is not None and cancel.is_set():
+                    raise LaunchError("已取消")
+                block = fin.read(min(COPY_BLOCK, length))
+                if not block:
+                    raise LaunchError(f"镜像中的文件比清单中的短: {src}")
+                fout.write(block)
+                length -= len(block)
+                progress.add(len(block))
+
+    def fetch(self, entries, root, progress, cancel):
+        for entry in entries:
+            dest = local_path(root, entry)
+            tmp = dest + ".part"
+            with open(tmp, "wb") as f:
+                f.truncate(entry.size)
+            try:
+                self._copy(local_path(self.root, entry), tmp, 0, entry.size, 0, progress, cancel)
+            except OSError as e:
+                raise LaunchError(f"读取镜像失败: {e}") from e
+            if hash_file(tmp, entry.algo) != entry.digest:
+                os.remove(tmp)
+                raise LaunchError(f"镜像中的文件与清单不符: {entry.path}")
+            os.replace(tmp, dest)
+
+    def fetch_ranges(self, entry, dest, ranges, progress, cancel):
+        for start, length, offset in ranges:
+            self._copy(local_path(self.root, entry), dest, start, length, offset, progress, cancel)
+
+
+class _HttpMirror:
+
+    def __init__(self, base, config):
+        # 下载器依赖 http.client，只在真正需要下载时才导入
+        from rtang.downloader import Downloader
+        self.base = base
+        self.timeout = config.timeout
+        self.downloader = Downloader(config.max_connections, config.per_host_connections, config.bandwidth_limit,
+                                     config.per_host_bandwidth, timeout=config.timeout)
+
+    def close(self):
+        self.downloader.close()
+
+    def signature(self, entry):
+        import urllib.request
+        url = mirror_url(self.base, entry._replace(path=entry.path + SIGNATURE_SUFFIX))
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+                return resp.read()
+        except OSError:
+            # 没有签名（或暂时取不到）时退回整个下载
+            return None
+
+    def fetch(self, entries, root, progress, cancel):
+        from rtang.downloader import DownloadCancelled, DownloadError, DownloadJob
+        jobs = [DownloadJob(mirror_url(self.base, e), local_path(root, e), e.size, e.algo, e.digest) for e in entries]
+        try:
+            self.downloader.download_many(jobs, progress, cancel)
+        except DownloadCancelled as e:
+            raise LaunchError("已取消") from e
+        except (DownloadError, OSError) as e:
+            raise LaunchError(str(e)) from e
+
+    def fetch_ranges(self, entry, dest, ranges, progress, cancel):
+        from rtang.downloader import DownloadCancelled
+        try:
+            self.downloader.download_ranges(mirror_url(self.base, entry), dest, ranges, progress, cancel)
+        except DownloadCancelled as e:
+            raise LaunchError("已取消") from e
+
+
+def _open_mirror(base, config):
+    if base.startswith(("http://", "https://")):
+        return _HttpMirror(base, config)
+    if base.startswith("file://"):
+        import urllib.request
+        base = urllib.request.url2pathname(base[len("file://"):])
+    return _DirectoryMirror(base)
+
+
+# ---- 日志与状态 ----
+
+def _sync_path(mods_dir, *names):
+    return os.path.join(mods_dir, SYNC_DIR, *names)
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _apply(mods_dir, journal):
+    """按日志替换、删除和移走文件；每一步都可以重复执行，中断后再次调用即可补完"""
+    staging = _sync_path(mods_dir, "staging")
+    for path in journal["replace"]:
+        src = os.path.join(staging, *path.split("/"))
+        if os.path.exists(src):
+            target = os.path.join(mods_dir, *path.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(src, target)
+    for path in journal["remove"]:
+        try:
+            os.remove(os.path.join(mods_dir, *path.split("/")))
+        except FileNotFoundError:
+            pass
+    for path in journal["disable"]:
+        src = os.path.join(mods_dir, *path.split("/"))
+        if os.path.exists(src):
+            target = _sync_path(mods_dir, "disabled", *path.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(src, target)
+    _write_json(_sync_path(mods_dir, "state.json"), {"files": journal["files"]})
+    os.remove(_sync_path(mods_dir, "journal.json"))
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def finish_pending(mods_dir):
+    """补完上次中断的替换，返回是否有需要补完的日志；日志只在全部新文件就绪后写入，所以总是向前补完"""
+    journal = _read_json(_sync_path(mods_dir, "journal.json"))
+    if journal is None:
+        return False
+    try:
+        _apply(mods_dir, journal)
+    except OSError as e:
+        raise LaunchError(f"无法完成上次的模组更新: {e}") from e
+    return True
+
+
+def _local_files(mods_dir):
+    """mods 目录下的全部文件（/ 分隔的相对路径），不含同步自身的目录"""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(mods_dir):
+        if dirpath == mods_dir and SYNC_DIR in dirnames:
+            dirnames.remove(SYNC_DIR)
+        rel = os.path.relpath(dirpath, mods_dir)
+        for name in filenames:
+            files.append(name if rel == "." else posixpath.join(rel.replace(os.sep, "/"), name))
+    return files
+
+
+# ---- 同步 ----
+
+def _delta_base(mods_dir, entry, orphans):
+    """增量的旧版本：同名文件，或同目录下同扩展名、文件名前缀最长（至少 4 个字符）的清单外文件"""
+    same = local_path(mods_dir, entry)
+    if os.path.isfile(same):
+        return same
+    folder, name = posixpath.split(entry.path)
+    ext = posixpath.splitext(name)[1]
+    best, best_len = None, 3
+    for path in orphans:
+        other_folder, other = posixpath.split(path)
+        if other_folder != folder or posixpath.splitext(other)[1] != ext:
+            continue
+        common = len(os.path.commonprefix([name, other]))
+        if common > best_len:
+            best, best_len = path, common
+    return os.path.join(mods_dir, *best.split("/")) if best is not None else None
+
+
+class _EntryProgress:
+    """单个文件的进度，增量失败退回整个下载时撤销已计入的字节"""
+
+    def __init__(self, progress):
+        self.progress = progress
+        self.counted = 0
+
+    def add(self, n):
+        self.counted += n
+        self.progress.add(n)
+
+    def rollback(self):
+        self.progress.add(-self.counted)
+        self.counted = 0
+
+
+def _build_from_delta(entry, old_path, signature, dest, mirror, progress, cancel):
+    """用旧版本中相同的块拼出新文件，只下载缺少的块；返回 (下载字节, 复用字节)，无法增量时返回 None"""
+    from rtang.downloader import DownloadError
+    tracker = _EntryProgress(progress)
+    tmp = dest + ".delta"
+    try:
+        size, blocks = decode_signature(signature)
+        if size != entry.size:
+            raise ValueError("签名与清单中的大小不符")
+        missing = []
+        reused = 0
+        with open(old_path, "rb") as f, open(tmp, "wb") as out:
+            out.truncate(entry.size)
+            buf = _map(f)
+            try:
+                local = {}
+                for start, length in split_blocks(buf):
+                    local.setdefault(block_digest(buf[start:start + length]), start)
+                offset = 0
+                for length, digest in blocks:
+                    if cancel is not None and cancel.is_set():
+                        raise LaunchError("已取消")
+                    start = local.get(digest)
+                    if start is not None:
+                        out.seek(offset)
+                        out.write(buf[start:start + length])
+                        reused += length
+                        tracker.add(length)
+                    elif missing and missing[-1][2] + missing[-1][1] == offset:
+                        # 相邻的缺失块合并为一个 Range 请求
+                        prev_start, prev_length, prev_offset = missing[-1]
+                        missing[-1] = (prev_start, prev_length + length, prev_offset)
+                    else:
+                        missing.append((offset, length, offset))
+                    offset += length
+            finally:
+                if buf:
+                    buf.close()
+        mirror.fetch_ranges(entry, tmp, missing, tracker, cancel)
+        if hash_file(tmp, entry.algo) != entry.digest:
+            raise ValueError("拼出的文件与清单不符")
+        os.replace(tmp, dest)
+        return entry.size - reused, reused
+    except (ValueError, OSError, DownloadError):
+        tracker.rollback()
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return None
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _stage(mods_dir, entries, delta_paths, orphans, mirror, store, progress, cancel):
+    """把需要更新的文件在 staging 中准备好并校验，返回 (下载字节, 复用字节)"""
+    staging = _sync_path(mods_dir, "staging")
+    downloaded = reused = 0
+    full = []
+    for entry in entries:
+        if cancel is not None and cancel.is_set():
+            raise LaunchError("已取消")
+        dest = local_path(staging, entry)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # 上次中断前已经准备好的文件
+        if os.path.isfile(dest):
+            if os.path.getsize(dest) == entry.size and hash_file(dest, entry.algo) == entry.digest:
+                progress.add(entry.size)
+                reused += entry.size
+                continue
+            os.remove(dest)
+        if store is not None and not store.materialize(staging, [entry]):
+            progress.add(entry.size)
+            reused += entry.size
+            continue
+        if entry.path in delta_paths and entry.size >= DELTA_MIN_SIZE:
+            old = _delta_base(mods_dir, entry, orphans)
+            signature = mirror.signature(entry) if old is not None else None
+            if signature is not None:
+                result = _build_from_delta(entry, old, signature, dest, mirror, progress, cancel)
+                if result is not None:
+                    downloaded += result[0]
+                    reused += result[1]
+                    if store is not None:
+                        store.add_file(dest, entry.algo, entry.digest)
+                    continue
+        full.append(entry)
+    if full:
+        mirror.fetch(full, staging, progress, cancel)
+        downloaded += sum(e.size for e in full)
+        if store is not None:
+            for entry in full:
+                store.add_file(local_path(staging, entry), entry.algo, entry.digest)
+    return downloaded, reused
+
+
+def sync_mods(config, callback=None, cancel=None):
+    """
+    按 config.mods_manifest 同步 config.mods_path()，返回 SyncResult。镜像取清单中的 mirror，
+    没有时为清单所在的目录。callback(stage, done, total) 与 sync_files 相同，失败时抛出 LaunchError。
+    """
+    def report(stage):
+        if callback is None:
+            return None
+        return lambda done, total: callback(stage, done, total)
+
+    def check_cancel():
+        if cancel is not None and cancel.is_set():
+            raise LaunchError("已取消")
+
+    mods_dir = os.path.abspath(config.mods_path())
+    os.makedirs(mods_dir, exist_ok=True)
+    finish_pending(mods_dir)
+    if callback is not None:
+        callback(STAGE_MODS_VERIFY, 0, 0)
+    location = config.mods_manifest
+    try:
+        data = read_manifest_data(location, config.timeout)
+        manifest = parse_manifest(data)
+    except (OSError, ValueError) as e:
+        raise LaunchError(f"读取模组清单失败: {e}") from e
+    if any(e.path == SYNC_DIR or e.path.startswith(SYNC_DIR + "/") for e in manifest.files):
+        raise LaunchError(f"模组清单中不能包含 {SYNC_DIR} 目录")
+    try:
+        delta_paths = {e.path for e, item in zip(manifest.files, data.get("files", [])) if item.get("delta")}
+    except AttributeError as e:
+        raise LaunchError(f"读取模组清单失败: {e}") from e
+    mirror_base = manifest.mirror or (location.rsplit("/", 1)[0] if "://" in location
+                                      else os.path.dirname(os.path.abspath(location)))
+    check_cancel()
+
+    ledger = VerifyLedger()
+    try:
+        bad = verify_files(mods_dir, manifest.files, config.workers or None, report(STAGE_MODS_VERIFY), cancel,
+                           ledger, config.full_verify)
+        check_cancel()
+        listed = {e.path for e in manifest.files}
+        state = _read_json(_sync_path(mods_dir, "state.json")) or {}
+        orphans = [p for p in _local_files(mods_dir) if p not in listed]
+        orphan_set = set(orphans)
+        remove = sorted(p for p in state.get("files", []) if p not in listed and p in orphan_set)
+        disable = sorted(orphan_set - set(remove)) if data.get("exclusive") else []
+        if not bad and not remove and not disable:
+            if sorted(listed) != state.get("files"):
+                _write_json(_sync_path(mods_dir, "state.json"), {"files": sorted(listed)})
+            return SyncResult(0, 0, 0, 0, 0)
+
+        store = AssetStore(config.store_dir or None, config.store_hardlinks) if config.use_store else None
+        progress = ProgressCounter(sum(e.size for e in bad), report(STAGE_MODS))
+        if callback is not None:
+            callback(STAGE_MODS, 0, progress.total)
+        mirror = _open_mirror(mirror_base, config)
+        try:
+            downloaded, reused = _stage(mods_dir, bad, delta_paths, orphans, mirror, store, progress, cancel)
+        except OSError as e:
+            raise LaunchError(f"准备模组文件失败: {e}") from e
+        finally:
+            mirror.close()
+        check_cancel()
+
+        # 全部新文件就绪后才写日志，此后的中断都由 finish_pending 向前补完
+        journal = {"replace": [e.path for e in bad], "remove": remove, "disable": disable, "files": sorted(listed)}
+        try:
+            _write_json(_sync_path(mods_dir, "journal.json"), journal)
+            _apply(mods_dir, journal)
+        except OSError as e:
+            raise LaunchError(f"替换模组文件失败: {e}") from e
+        record_entries(ledger, mods_dir, bad)
+        ledger.forget([os.path.join(mods_dir, *p.split("/")) for p in remove + disable])
+        if store is not None:
+            store.write_ref(mods_dir, manifest.files)
+    finally:
+        ledger.close()
+    return SyncResult(len(bad), len(remove), len(disable), downloaded, reused)
+
+
+# ---- 生成清单 ----
+
+def build_manifest(root, algo="sha256", version="", exclusive=False, mirror=""):
+    """
+    为 root 下的文件生成 manifest.json；不小于 DELTA_MIN_SIZE 的文件同时写出 .rtsig 签名并标记 delta。
+    把 root 整个放到任意静态文件服务器上即可作为镜像。返回清单路径。
+    """
+    root = os.path.abspath(root)
+    files = []
+    for path in sorted(_local_files(root)):
+        if path == "manifest.json" or path.endswith(SIGNATURE_SUFFIX):
+            continue
+        full = os.path.join(root, *path.split("/"))
+        size = os.path.getsize(full)
+        item = {"path": path, "size": size, algo: hash_file(full, algo)}
+        if size >= DELTA_MIN_SIZE:
+            with open(full + SIGNATURE_SUFFIX, "wb") as f:
+                f.write(encode_signature(size, file_signature(full)))
+            item["delta"] = True
+        files.append(item)
+    data = {"version": version, "exclusive": exclusive, "files": files}
+    if mirror:
+        data["mirror"] = mirror
+    out = os.path.join(root, "manifest.json")
+    _write_json(out, data)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rtang.modsync", description="模组同步清单工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="为目录生成 manifest.json 和块签名，目录本身即可作为镜像")
+    build.add_argument("root")
+    build.add_argument("--algo", default="sha256", choices=["sha256", "sha1", "xxh3_128", "xxh3_64", "xxh64"])
+    build.add_argument("--version", default="")
+    build.add_argument("--mirror", default="", help="镜像地址，留空时客户端从清单所在位置下载")
+    build.add_argument("--exclusive", action="store_true", help="客户端把清单之外的文件移走")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        try:
+            path = build_manifest(args.root, args.algo, args.version, args.exclusive, args.mirror)
+        except (OSError, ValueError) as e:
+            print(f"生成失败: {e}", file=sys.stderr)
+            return 1
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        signed = sum(1 for item in data["files"] if item.get("delta"))
+        print(f"{path}: {len(data['files'])} 个文件，其中 {signed} 个附带块签名")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+多配置档启动编排：启动请求进入队列，最多 max_parallel 个配置档同时准备（清单、校验、补全），
+准备好的按 stagger 秒的间隔依次启动，避免几个 JVM 同时冷启动把磁盘读满。
+使用同一清单或同一游戏目录的配置档依次准备：后准备的直接命中校验账本和内容寻址仓库，不会重复下载同一批文件。
+不依赖 Qt，状态变化通过 on_state(LaunchState) 在后台线程回调。
+"""
+import os
+import threading
+import time
+import traceback
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from rtang.launch import LaunchError, prepare_launch
+
+QUEUED = "queued"
+PREPARING = "preparing"
+WAITING = "waiting"
+RUNNING = "running"
+EXITED = "exited"
+FAILED = "failed"
+CANCELLED = "cancelled"
+# 还在队列或准备中，可以取消
+PENDING = (QUEUED, PREPARING, WAITING)
+
+LaunchState = namedtuple("LaunchState", "profile_id status stage done total pid returncode message")
+
+
+def spawn_supervised(command, config, on_output, on_exit, log_lines=5000):
+    """默认的进程工厂：交给 GameSupervisor 监管，环境变量在当前进程的基础上追加配置档的设置"""
+    # 监管器用到 subprocess、zipfile 等模块，在工作线程中才导入，不占启动时间
+    from rtang.supervisor import GameSupervisor
+    return GameSupervisor(command, config.game_dir, log_lines, env=config.process_env(),
+                          on_output=on_output, on_exit=on_exit).start()
+
+
+class _Job:
+
+    def __init__(self, profile_id, config):
+        self.profile_id = profile_id
+        self.config = config
+        self.cancel = threading.Event()
+        self.supervisor = None
+        self.exit_result = None
+        self.state = LaunchState(profile_id, QUEUED, None, 0, 0, None, None, "")
+        self.last_emit = 0.0
+
+
+class LaunchOrchestrator:
+    """
+    submit(配置档 id, LaunchConfig) 把启动请求放入先进先出的队列，max_parallel 可随时调整。spawn(command, config, on_output, on_exit) 负责
+    启动并返回监管对象（需要 pid、running()、terminate() 和 result），默认为 spawn_supervised，
+    测试时可换成启动替身进程的工厂。on_output(配置档 id) 在对应游戏有新输出时调用。
+    """
+
+    # 同一阶段内两次上报的最小间隔（秒），校验和下载每个数据块都会回调
+    PROGRESS_INTERVAL = 0.05
+    # 等待共享文件锁时检查取消的间隔（秒）
+    LOCK_POLL = 0.2
+    # 线程池大小，即 max_parallel 的上限
+    MAX_WORKERS = 8
+
+    def __init__(self, on_state=None, max_parallel=2, stagger=2.0, spawn=None, on_output=None):
+        self.on_state = on_state
+        self.on_output = on_output
+        self.max_parallel = min(self.MAX_WORKERS, max(1, max_parallel))
+        self.stagger = max(0.0, stagger)
+        self.spawn = spawn or spawn_supervised
+        self._executor = ThreadPoolExecutor(self.MAX_WORKERS, thread_name_prefix="launch")
+        self._jobs = {}
+        self._queue = deque()
+        self._active = 0
+        self._lock = threading.RLock()
+        self._file_locks = {}
+        self._spawn_lock = threading.Lock()
+        self._next_spawn = 0.0
+        self._closed = False
+
+    # ---- 提交与取消 ----
+
+    def submit(self, profile_id, config):
+        """排队启动；该配置档已在排队、准备或运行中时返回 False"""
+        with self._lock:
+            if self._closed:
+                return False
+            job = self._jobs.get(profile_id)
+            if job is not None and (job.state.status in PENDING or job.state.status == RUNNING):
+                return False
+            job = _Job(profile_id, config)
+            self._jobs[profile_id] = job
+            self._queue.append(job)
+            self._emit(job)
+            self._dispatch()
+        return True
+
+    def set_max_parallel(self, count):
+        with self._lock:
+            self.max_parallel = min(self.MAX_WORKERS, max(1, count))
+            self._dispatch()
+
+    def cancel(self, profile_id):
+        """取消排队或准备中的启动，已启动的游戏不受影响；返回是否取消了什么"""
+        with self._lock:
+            job = self._jobs.get(profile_id)
+            if job is None or job.state.status not in PENDING:
+                return False
+            job.cancel.set()
+            if job in self._queue:
+                # 还没轮到执行，直接标记为已取消；否则由工作线程在下一个检查点退出
+                self._queue.remove(job)
+                self._update(job, status=CANCELLED, message="已取消")
+        return True
+
+    def cancel_all(self):
+        with self._lock:
+            ids = [job.profile_id for job in self._jobs.values() if job.state.status in PENDING]
+        for profile_id in ids:
+            self.cancel(profile_id)
+
+    def terminate(self, profile_id):
+        supervisor = self.supervisor(profile_id)
+        if supervisor is None or not supervisor.running():
+            return False
+        supervisor.terminate()
+        return True
+
+    # ---- 查询 ----
+
+    def state(self, profile_id):
+        with self._lock:
+            job = self._jobs.get(profile_id)
+            return job.state if job is not None else None
+
+    def states(self):
+        with self._lock:
+            return [job.state for job in self._jobs.values()]
+
+    def supervisor(self, profile_id):
+        with self._lock:
+            job = self._jobs.get(profile_id)
+            return job.supervisor if job is not None else None
+
+    def pending(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.state.status in PENDING)
+
+    def running(self):
+        with self._lock:
+            return [job.profile_id for job in self._jobs.values()
+                    if job.supervisor is not None and job.supervisor.running()]
+
+    def shutdown(self, wait=True):
+        """取消所有未完成的启动并停止线程池；已启动的游戏继续运行，只是不再回调"""
+        with self._lock:
+            self._closed = True
+        self.cancel_all()
+        self._executor.shutdown(wait=wait)
+        with self._lock:
+            self.on_state = None
+            self.on_output = None
+            for job in self._jobs.values():
+                if job.supervisor is not None:
+                    job.supervisor.on_output = None
+                    job.supervisor.on_exit = None
+
+    # ---- 工作线程 ----
+
+    def _dispatch(self):
+        # 调用方持有 self._lock
+        while self._queue and self._active < self.max_parallel and not self._closed:
+            job = self._queue.popleft()
+            self._active += 1
+            self._executor.submit(self._run, job)
+
+    def _emit(self, job):
+        callback = self.on_state
+        if callback is not None:
+            callback(job.state)
+
+    def _update(self, job, **changes):
+        with self._lock:
+            job.state = job.state._replace(**changes)
+            self._emit(job)
+
+    def _report(self, job, stage, done, total):
+        now = time.monotonic()
+        if stage == job.state.stage and done != total and now - job.last_emit < self.PROGRESS_INTERVAL:
+            return
+        job.last_emit = now
+        self._update(job, stage=stage, done=done, total=total)
+
+    def _file_keys(self, config):
+        """准备时会读写的共享对象：清单位置、游戏目录和同步的模组目录"""
+        keys = {"dir:" + os.path.normcase(os.path.abspath(config.game_dir))}
+        if config.mods_manifest:
+            keys.add("dir:" + os.path.normcase(os.path.abspath(config.mods_path())))
+        location = config.manifest_location()
+        if "://" not in location:
+            location = os.path.normcase(os.path.abspath(location))
+        keys.add("manifest:" + location)
+        return sorted(keys)
+
+    def _acquire_files(self, job):
+        """按固定顺序取得共享文件锁，避免两个配置档互相等待；取消时释放已取得的锁并抛出 LaunchError"""
+        with self._lock:
+            locks = [self._file_locks.setdefault(key, threading.Lock()) for key in self._file_keys(job.config)]
+        held = []
+        try:
+            for lock in locks:
+                if not lock.acquire(blocking=False):
+                    self._update(job, status=WAITING, message="等待其他配置档准备共享文件")
+                    while not lock.acquire(timeout=self.LOCK_POLL):
+                        if job.cancel.is_set():
+                            raise LaunchError("已取消")
+                held.append(lock)
+        except BaseException:
+            for lock in reversed(held):
+                lock.release()
+            raise
+        return held
+
+    def _run(self, job):
+        try:
+            command = self._prepare(job)
+        except (LaunchError, OSError) as e:
+            self._fail(job, e)
+            return
+        except Exception as e:
+            # 线程池会吞掉未捕获的异常，不转为失败的话这个配置档会一直停在准备中
+            traceback.print_exc()
+            self._fail(job, f"内部错误: {e!r}")
+            return
+        finally:
+            # 准备完成即让出名额，等待错峰启动的配置档不占用并发数
+            with self._lock:
+                self._active -= 1
+                self._dispatch()
+        try:
+            self._spawn(job, command)
+        except (LaunchError, OSError) as e:
+            self._fail(job, e)
+        except Exception as e:
+            traceback.print_exc()
+            self._fail(job, f"内部错误: {e!r}")
+
+    def _prepare(self, job):
+        if job.cancel.is_set():
+            raise LaunchError("已取消")
+        self._update(job, status=PREPARING)
+        held = self._acquire_files(job)
+        try:
+            self._update(job, status=PREPARING, message="")
+            return prepare_launch(job.config, lambda stage, done, total: self._report(job, stage, done, total),
+                                  job.cancel)
+        finally:
+            for lock in reversed(held):
+                lock.release()
+
+    def _fail(self, job, error):
+        self._update(job, status=CANCELLED if job.cancel.is_set() else FAILED, message=str(error))
+
+    def _spawn(self, job, command):
+        # 依次启动：每次启动后至少间隔 stagger 秒才启动下一个，等待期间仍可取消
+        with self._spawn_lock:
+            delay = self._next_spawn - time.monotonic()
+            if delay > 0:
+                self._update(job, status=WAITING, message=f"错峰启动，{delay:.1f} 秒后")
+                if job.cancel.wait(delay):
+                    raise LaunchError("已取消")
+            if job.cancel.is_set():
+                raise LaunchError("已取消")
+            supervisor = self.spawn(command, job.config, lambda: self._output(job), lambda result: self._exited(job, result))
+            self._next_spawn = time.monotonic() + self.stagger
+        with self._lock:
+            job.supervisor = supervisor
+            self._update(job, status=RUNNING, stage=None, pid=supervisor.pid, message="")
+            if job.exit_result is not None:
+                # 进程在工厂返回之前就已退出，补发退出状态
+                self._update(job, status=EXITED, returncode=job.exit_result.returncode)
+
+    def _output(self, job):
+        callback = self.on_output
+        if callback is not None:
+            callback(job.profile_id)
+
+    def _exited(self, job, result):
+        with self._lock:
+            job.exit_result = result
+            if job.supervisor is not None:
+                self._update(job, status=EXITED, returncode=result.returncode)
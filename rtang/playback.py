@@ -0,0 +1,227 @@
+"""无缝播放：双播放器预加载下一首，可选交叉淡入淡出"""
+from PySide6.QtCore import QEasingCurve, QObject, QUrl, QVariantAnimation, Signal
+from PySide6.QtMultimedia import QAudioOutput, QMediaPlayer
+
+
+class _Deck:
+    """一组 QMediaPlayer + QAudioOutput"""
+
+    def __init__(self, parent):
+        self.player = QMediaPlayer(parent)
+        self.output = QAudioOutput(parent)
+        self.player.setAudioOutput(self.output)
+        self.track = None
+        self.ready = False
+
+    def load(self, track, path):
+        self.track = track
+        self.ready = False
+        self.player.setSource(QUrl.fromLocalFile(path))
+
+    def unload(self):
+        self.player.stop()
+        self.player.setSource(QUrl())
+        self.track = None
+        self.ready = False
+
+
+class GaplessPlayer(QObject):
+    """
+    两个播放器轮流工作：当前曲目剩余 preload_ms 时，备用播放器提前打开并解码下一首；
+    播完时直接开始备用播放器（crossfade_ms > 0 时提前开始并交叉淡入淡出），省去切歌时的冷启动。
+    next_track() 返回 (下标, 路径) 或 None，切换完成后发出 track_changed(下标)。
+    gain(下标) 返回该曲目的音量系数（响度统一），在曲目开始播放时与主音量相乘，播放中途不再改变。
+    """
+    positionChanged = Signal(int)
+    durationChanged = Signal(int)
+    playbackStateChanged = Signal(object)
+    track_changed = Signal(int)
+    queue_finished = Signal()
+
+    def __init__(self, next_track, preload_ms=5000, crossfade_ms=0, gain=None, parent=None):
+        super().__init__(parent)
+        self.next_track = next_track
+        self.gain = gain
+        self.preload_ms = preload_ms
+        self.crossfade_ms = crossfade_ms
+        self._volume = 1.0
+        self._decks = [_Deck(self), _Deck(self)]
+        self._active, self._standby = self._decks
+        self._preload_checked = False
+        self._fading_deck = None
+        for deck in self._decks:
+            deck.player.positionChanged.connect(lambda pos, d=deck: self._on_position(d, pos))
+            deck.player.durationChanged.connect(lambda ms, d=deck: d is self._active and self.durationChanged.emit(ms))
+            deck.player.playbackStateChanged.connect(lambda state, d=deck: self._on_state(d, state))
+            deck.player.mediaStatusChanged.connect(lambda status, d=deck: self._on_status(d, status))
+
+        self._fade = QVariantAnimation(self)
+        self._fade.setStartValue(0.0)
+        self._fade.setEndValue(1.0)
+        self._fade.setEasingCurve(QEasingCurve.InOutSine)
+        self._fade.valueChanged.connect(self._on_fade_step)
+        self._fade.finished.connect(self._finish_fade)
+
+    # ---- 与 QMediaPlayer 相同的查询接口 ----
+
+    def playbackState(self):
+        return self._active.player.playbackState()
+
+    def mediaStatus(self):
+        return self._active.player.mediaStatus()
+
+    def duration(self):
+        return self._active.player.duration()
+
+    def position(self):
+        return self._active.player.position()
+
+    def setPosition(self, position):
+        self._active.player.setPosition(position)
+        # 已预加载的下一首保留；还没预加载时按新的剩余时间重新判断
+        self._preload_checked = self._standby.track is not None
+
+    def volume(self):
+        return self._volume
+
+    def setVolume(self, volume):
+        self._volume = volume
+        if self._fading_deck is None:
+            self._active.output.setVolume(self._level(self._active))
+
+    def _level(self, deck):
+        if self.gain is None or deck.track is None:
+            return self._volume
+        return self._volume * self.gain(deck.track)
+
+    def play(self):
+        self._active.player.play()
+
+    def pause(self):
+        self._finish_fade()
+        self._active.player.pause()
+
+    def stop(self):
+        self._finish_fade()
+        self._active.player.stop()
+        self.invalidate_preload()
+
+    # ---- 播放控制 ----
+
+    def play_track(self, track, path):
+        """立即播放指定曲目；若正好是已预加载的下一首，直接切到备用播放器"""
+        self._finish_fade()
+        if self._standby.track == track and self._standby.ready:
+            self._swap()
+            self._active.player.setPosition(0)
+        else:
+            self.invalidate_preload()
+            self._active.load(track, path)
+            self._active.output.setVolume(self._level(self._active))
+        self._preload_checked = False
+        self._active.player.play()
+
+    def invalidate_preload(self):
+        """播放队列变化（随机、循环、手动选歌）后丢弃已预加载的下一首"""
+        if self._standby.track is not None:
+            self._standby.unload()
+        self._preload_checked = False
+
+    def _swap(self):
+        self._active, self._standby = self._standby, self._active
+        if self._standby is not self._fading_deck:
+            self._standby.unload()
+        self._active.output.setVolume(self._level(self._active))
+        self.durationChanged.emit(self._active.player.duration())
+        self.playbackStateChanged.emit(self._active.player.playbackState())
+
+    def _on_position(self, deck, position):
+        if deck is not self._active:
+            return
+        self.positionChanged.emit(position)
+        duration = deck.player.duration()
+        if duration <= 0:
+            return
+        remaining = duration - position
+        if not self._preload_checked and remaining <= self.preload_ms:
+            self._preload_checked = True
+            self._preload()
+        if (self.crossfade_ms > 0 and remaining <= self.crossfade_ms and self._standby.ready
+                and self._fading_deck is None):
+            self._start_crossfade()
+
+    def _preload(self):
+        if self._fading_deck is not None:
+            # 备用播放器还在淡出上一首，下次进度更新时再试
+            self._preload_checked = False
+            return
+        upcoming = self.next_track()
+        if upcoming is None:
+            return
+        track, path = upcoming
+        if track == self._active.track:
+            # 单曲循环不需要第二个播放器，结束时回到开头即可
+            return
+        self._standby.load(track, path)
+        self._standby.output.setVolume(0.0 if self.crossfade_ms > 0 else self._level(self._standby))
+
+    def _on_status(self, deck, status):
+        if deck is self._standby:
+            if status in (QMediaPlayer.LoadedMedia, QMediaPlayer.BufferedMedia) and deck.track is not None:
+                deck.ready = True
+            elif status == QMediaPlayer.InvalidMedia:
+                deck.track = None
+                deck.ready = False
+            return
+        if deck is not self._active or status != QMediaPlayer.EndOfMedia:
+            return
+        if self._standby.ready:
+            self._swap()
+            self._active.player.play()
+            self._preload_checked = False
+            self.track_changed.emit(self._active.track)
+            return
+        upcoming = self.next_track()
+        if upcoming is None:
+            self.queue_finished.emit()
+            return
+        track, path = upcoming
+        self.invalidate_preload()
+        # 没来得及预加载（曲目太短或刚跳转过），退回冷启动
+        if track != self._active.track:
+            self._active.load(track, path)
+            self._active.output.setVolume(self._level(self._active))
+        self._active.player.setPosition(0)
+        self._active.player.play()
+        self._preload_checked = False
+        self.track_changed.emit(track)
+
+    def _start_crossfade(self):
+        self._fading_deck = self._active
+        self._swap()
+        self._active.output.setVolume(0.0)
+        self._active.player.play()
+        self._preload_checked = False
+        self._fade.setDuration(self.crossfade_ms)
+        self._fade.start()
+        self.track_changed.emit(self._active.track)
+
+    def _on_fade_step(self, value):
+        if self._fading_deck is None:
+            return
+        self._active.output.setVolume(self._level(self._active) * value)
+        self._fading_deck.output.setVolume(self._level(self._fading_deck) * (1.0 - value))
+
+    def _finish_fade(self):
+        deck = self._fading_deck
+        if deck is None:
+            return
+        self._fading_deck = None
+        self._fade.stop()
+        self._active.output.setVolume(self._level(self._active))
+        if deck is self._standby:
+            deck.unload()
+
+    def _on_state(self, deck, state):
+        if deck is self._active:
+            self.playbackStateChanged.emit(state)
@@ -0,0 +1,321 @@
+"""歌单面板：基于 QAbstractListModel 的虚拟化列表，分页加载、增量搜索和预先计算的排序键"""
+import os
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer, Signal
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import QComboBox, QHBoxLayout, QLineEdit, QListView, QVBoxLayout, QWidget
+
+from rtang.tags import display_title
+
+SORT_KEYS = ("order", "title", "artist", "album", "duration")
+
+
+class PlaylistModel(QAbstractListModel):
+    """
+    曲目本身仍是 RTangClient.music_files 的顺序，模型只保存过滤、排序后的下标视图。
+    行按 PAGE_SIZE 分页暴露给视图（canFetchMore/fetchMore），十万首也不会一次性创建全部行。
+    扫描中新增的曲目和读到的标签先记为待整理，REFRESH_DELAY 毫秒后只对这些行重新过滤、归位，
+    不重置模型，滚动位置和已加载的分页都保留。
+    """
+    PathRole = Qt.UserRole + 1
+    TrackIndexRole = Qt.UserRole + 2
+    PAGE_SIZE = 500
+    REFRESH_DELAY = 300
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._paths = []
+        self._pos = {}
+        self._info = {}
+        self._search = []
+        self._sort_cache = {}
+        self._view = []
+        self._loaded = 0
+        self._terms = []
+        # 搜索文本或排序键变了、还没整理进视图的曲目；不为空时过滤不能只在旧结果里缩小范围
+        self._dirty = set()
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.REFRESH_DELAY)
+        self._refresh_timer.timeout.connect(self._refresh_view)
+        self._sort_key = "order"
+        self._descending = False
+        self._current = -1
+        self._bold = QFont()
+        self._bold.setBold(True)
+
+    # ---- 数据源 ----
+
+    def _search_text(self, path):
+        info = self._info.get(path)
+        parts = [os.path.basename(path)]
+        if info is not None:
+            parts += [info.title, info.artist, info.album]
+        return "\n".join(parts).casefold()
+
+    def set_tracks(self, paths):
+        self.beginResetModel()
+        self._paths = list(paths)
+        self._pos = {p: i for i, p in enumerate(self._paths)}
+        self._search = [self._search_text(p) for p in self._paths]
+        self._sort_cache.clear()
+        self._current = -1
+        self._rebuild_view()
+        self.endResetModel()
+
+    def append_tracks(self, paths):
+        start = len(self._paths)
+        self._paths.extend(paths)
+        for i, p in enumerate(paths, start):
+            self._pos[p] = i
+        self._search.extend(self._search_text(p) for p in paths)
+        for key, keys in self._sort_cache.items():
+            keys.extend(self._sort_value(key, p) for p in paths)
+        if self._terms or self._sort_key != "order" or self._descending:
+            self._mark_dirty(range(start, len(self._paths)))
+            return
+        # 默认顺序且无过滤时直接追加到视图末尾，已加载的行不受影响
+        self._view.extend(range(start, len(self._paths)))
+        if self._loaded < self.PAGE_SIZE:
+            self.fetchMore(QModelIndex())
+
+    def update_info(self, infos):
+        """标签读取完成后刷新搜索文本和排序键；新读到的标签可能改变匹配结果和顺序，这些行稍后归位"""
+        changed = []
+        for info in infos:
+            self._info[info.path] = info
+            i = self._pos.get(info.path)
+            if i is not None:
+                self._search[i] = self._search_text(info.path)
+                for key, keys in self._sort_cache.items():
+                    keys[i] = self._sort_value(key, info.path)
+                changed.append(i)
+        if not changed:
+            return
+        if self._terms or self._sort_key != "order":
+            self._mark_dirty(changed)
+        elif self._loaded:
+            self.dataChanged.emit(self.index(0), self.index(self._loaded - 1))
+
+    def _mark_dirty(self, indices):
+        self._dirty.update(indices)
+        # 不重新计时：扫描期间标签源源不断，也至少每 REFRESH_DELAY 整理一次
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def _refresh_view(self):
+        """把待整理的曲目重新过滤后归位到视图中，其余行的相对顺序不变"""
+        dirty = self._dirty
+        if not dirty:
+            return
+        self._dirty = set()
+        old = self._view
+        indices = sorted(dirty)
+        added = self._match(indices) if self._terms else indices
+        view = [i for i in old if i not in dirty]
+        view.extend(added)
+        if self._sort_key == "order":
+            view.sort(reverse=self._descending)
+        else:
+            view.sort(key=self._sort_keys(self._sort_key).__getitem__, reverse=self._descending)
+
+        # 已加载的行中不再匹配的先逐段删除
+        gone = dirty.difference(added)
+        if gone:
+            row = self._loaded - 1
+            while row >= 0:
+                if old[row] not in gone:
+                    row -= 1
+                    continue
+                end = row
+                while row >= 0 and old[row] in gone:
+                    row -= 1
+                self.beginRemoveRows(QModelIndex(), row + 1, end)
+                del old[row + 1:end + 1]
+                self._loaded -= end - row
+                self.endRemoveRows()
+
+        # 剩下的行就地换成新顺序，选中项等持久索引跟着曲目走
+        if old[:self._loaded] != view[:self._loaded]:
+            self.layoutAboutToBeChanged.emit()
+            persistent = self.persistentIndexList()
+            tracks = [old[index.row()] if index.row() < self._loaded else None for index in persistent]
+            self._view = view
+            rows = {track: row for row, track in enumerate(view[:self._loaded])}
+            self.changePersistentIndexList(
+                persistent, [self.index(rows[t]) if t in rows else QModelIndex() for t in tracks])
+            self.layoutChanged.emit()
+        else:
+            self._view = view
+        if self._loaded:
+            self.dataChanged.emit(self.index(0), self.index(self._loaded - 1))
+        if self._loaded < self.PAGE_SIZE:
+            self.fetchMore(QModelIndex())
+
+    def set_current(self, track_index):
+        old = self._current
+        self._current = track_index
+        for track in (old, track_index):
+            row = self._row_of(track)
+            if row is not None:
+                self.dataChanged.emit(self.index(row), self.index(row), [Qt.FontRole])
+
+    def _row_of(self, track_index):
+        if track_index < 0:
+            return None
+        try:
+            row = self._view.index(track_index, 0, self._loaded)
+        except ValueError:
+            return None
+        return row
+
+    # ---- 过滤与排序 ----
+
+    def set_filter(self, text):
+        """
+        多个关键词以空格分隔，需全部命中标题、歌手、专辑或文件名。
+        新关键词是在旧关键词基础上继续输入时，只在当前结果里继续筛选。
+        """
+        terms = text.casefold().split()
+        if terms == self._terms:
+            return
+        narrowing = not self._dirty and bool(self._terms) and len(terms) >= len(self._terms) and all(
+            new.startswith(old) for old, new in zip(self._terms, terms))
+        self.beginResetModel()
+        if narrowing:
+            self._terms = terms
+            self._view = self._match(self._view)
+        else:
+            self._terms = terms
+            self._rebuild_view()
+        self._loaded = min(self.PAGE_SIZE, len(self._view))
+        self.endResetModel()
+
+    def _match(self, indices):
+        search = self._search
+        terms = self._terms
+        if len(terms) == 1:
+            term = terms[0]
+            return [i for i in indices if term in search[i]]
+        return [i for i in indices if all(t in search[i] for t in terms)]
+
+    def sort_by(self, key, descending=False):
+        if key == self._sort_key and descending == self._descending:
+            return
+        self._sort_key = key
+        self._descending = descending
+        self.beginResetModel()
+        self._rebuild_view()
+        self.endResetModel()
+
+    def _sort_value(self, key, path):
+        info = self._info.get(path)
+        if key == "duration":
+            return getattr(info, "duration", 0.0)
+        value = getattr(info, key, "") if info is not None else ""
+        return (value or os.path.basename(path)).casefold() if key == "title" else value.casefold()
+
+    def _sort_keys(self, key):
+        keys = self._sort_cache.get(key)
+        if keys is None:
+            keys = [self._sort_value(key, p) for p in self._paths]
+            self._sort_cache[key] = keys
+        return keys
+
+    def _rebuild_view(self):
+        # 整个视图重新计算，待整理的曲目随之归位
+        self._refresh_timer.stop()
+        self._dirty.clear()
+        indices = range(len(self._paths))
+        if self._terms:
+            indices = self._match(indices)
+        if self._sort_key == "order":
+            view = list(indices)
+            if self._descending:
+                view.reverse()
+        else:
+            view = sorted(indices, key=self._sort_keys(self._sort_key).__getitem__, reverse=self._descending)
+        self._view = view
+        self._loaded = min(self.PAGE_SIZE, len(view))
+
+    # ---- Qt 模型接口 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._view)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.PAGE_SIZE, len(self._view) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        track = self._view[index.row()]
+        path = self._paths[track]
+        if role == Qt.DisplayRole:
+            return display_title(self._info.get(path), path)
+        if role == Qt.ToolTipRole:
+            info = self._info.get(path)
+            return f"{info.album}\n{path}" if info is not None and info.album else path
+        if role == Qt.FontRole and track == self._current:
+            return self._bold
+        if role == self.PathRole:
+            return path
+        if role == self.TrackIndexRole:
+            return track
+        return None
+
+
+class PlaylistPanel(QWidget):
+    """搜索框 + 排序方式 + 虚拟化列表，双击曲目发出 track_activated(在 music_files 中的下标)"""
+    track_activated = Signal(int)
+
+    SORT_LABELS = {"order": "默认顺序", "title": "标题", "artist": "歌手", "album": "专辑", "duration": "时长"}
+    SEARCH_DELAY = 150
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 10, 20, 10)
+        layout.setSpacing(8)
+
+        bar = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setObjectName("playlistSearch")
+        self.search_edit.setPlaceholderText("搜索标题、歌手或专辑")
+        self.search_edit.setClearButtonEnabled(True)
+        self.sort_combo = QComboBox()
+        for key in SORT_KEYS:
+            self.sort_combo.addItem(self.SORT_LABELS[key], key)
+        bar.addWidget(self.search_edit, 1)
+        bar.addWidget(self.sort_combo)
+        layout.addLayout(bar)
+
+        self.view = QListView()
+        self.view.setObjectName("playlistView")
+        self.view.setModel(model)
+        self.view.setUniformItemSizes(True)
+        self.view.setLayoutMode(QListView.Batched)
+        self.view.setBatchSize(200)
+        self.view.setEditTriggers(QListView.NoEditTriggers)
+        layout.addWidget(self.view)
+
+        # 输入停顿后再过滤，连续打字时不会每个字符都扫描一遍
+        self._search_timer = QTimer(self)
+        self._search_timer.setObjectName("playlistSearchTimer")
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DELAY)
+        self._search_timer.timeout.connect(lambda: self.model.set_filter(self.search_edit.text()))
+        self.search_edit.textChanged.connect(lambda: self._search_timer.start())
+        self.sort_combo.currentIndexChanged.connect(lambda: self.model.sort_by(self.sort_combo.currentData()))
+        self.view.activated.connect(lambda index: self.track_activated.emit(index.data(PlaylistModel.TrackIndexRole)))
@@ -0,0 +1,102 @@
+"""播放队列：顺序、随机和循环模式，不依赖 Qt"""
+import random
+
+REPEAT_OFF, REPEAT_ALL, REPEAT_ONE = range(3)
+
+
+class PlayQueue:
+    """
+    播放顺序，元素为曲目在 music_files 中的下标。
+    peek() 只查看下一首不移动位置，供预加载使用；advance() 才真正前进。
+    """
+
+    def __init__(self, rng=None):
+        self._rng = rng or random.Random()
+        self._order = []
+        self._pos = -1
+        self.shuffle = False
+        self.repeat = REPEAT_ALL
+
+    def __len__(self):
+        return len(self._order)
+
+    @property
+    def current(self):
+        return self._order[self._pos] if 0 <= self._pos < len(self._order) else None
+
+    def reset(self, count=0):
+        self._order = list(range(count))
+        if self.shuffle:
+            self._rng.shuffle(self._order)
+        self._pos = -1
+
+    def extend(self, count):
+        """扫描过程中新增的曲目；随机模式下混入尚未播放的部分"""
+        new = list(range(len(self._order), count))
+        if not new:
+            return
+        if self.shuffle:
+            tail = self._order[self._pos + 1:] + new
+            self._rng.shuffle(tail)
+            self._order[self._pos + 1:] = tail
+        else:
+            self._order.extend(new)
+
+    def set_current(self, track):
+        if self.current == track:
+            return
+        try:
+            self._pos = self._order.index(track)
+        except ValueError:
+            pass
+
+    def peek(self, auto=True):
+        """auto 为 True 表示当前曲目自然播完，此时单曲循环返回当前曲目"""
+        if not self._order:
+            return None
+        if auto and self.repeat == REPEAT_ONE and self.current is not None:
+            return self.current
+        if self._pos + 1 < len(self._order):
+            return self._order[self._pos + 1]
+        if self.repeat != REPEAT_OFF:
+            return self._order[0]
+        return None
+
+    def advance(self, auto=False):
+        track = self.peek(auto)
+        if track is not None and track != self.current:
+            self._pos = self._pos + 1 if self._pos + 1 < len(self._order) else 0
+        return track
+
+    def prev(self):
+        if not self._order:
+            return None
+        if self._pos > 0:
+            self._pos -= 1
+        elif self.repeat != REPEAT_OFF:
+            self._pos = len(self._order) - 1
+        else:
+            self._pos = 0
+        return self._order[self._pos]
+
+    def set_shuffle(self, on):
+        """切换随机模式时当前曲目保持不变，其余曲目重新排列"""
+        if on == self.shuffle:
+            return
+        self.shuffle = on
+        current = self.current
+        rest = [i for i in range(len(self._order)) if i != current]
+        if on:
+            self._rng.shuffle(rest)
+        if current is None:
+            self._order = rest
+            self._pos = -1
+        elif on:
+            self._order = [current] + rest
+            self._pos = 0
+        else:
+            self._order = list(range(len(rest) + 1))
+            self._pos = current
+
+    def set_repeat(self, mode):
+        self.repeat = mode
@@ -0,0 +1,136 @@
+"""进程和系统内存统计：Linux 读 /proc，Windows 调 psapi/kernel32，其他平台退回 ps 和 sysconf"""
+import os
+import sys
+
+
+def _proc_status(pid):
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii", errors="replace") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    fields[key] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        return None
+    return fields
+
+
+def _windows_memory(pid):
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    PROCESS_VM_READ = 0x0010
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ, False, pid)
+    if not handle:
+        return None
+    try:
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return {"VmRSS": counters.WorkingSetSize, "VmHWM": counters.PeakWorkingSetSize}
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _ps_rss(pid):
+    import subprocess
+    try:
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True, timeout=2).stdout
+        return {"VmRSS": int(out.strip()) * 1024}
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def memory_info(pid=None):
+    """
+    返回 (当前常驻内存, 峰值常驻内存) 字节数；系统不记录峰值时第二项为 None，
+    进程不存在或无法读取时返回 None。
+    """
+    pid = pid or os.getpid()
+    if sys.platform.startswith("linux"):
+        fields = _proc_status(pid)
+    elif sys.platform == "win32":
+        fields = _windows_memory(pid)
+    else:
+        fields = _ps_rss(pid)
+    if not fields or "VmRSS" not in fields:
+        return None
+    return fields["VmRSS"], fields.get("VmHWM")
+
+
+def _windows_system_memory():
+    import ctypes
+    from ctypes import wintypes
+
+    class MEMORYSTATUSEX(ctypes.Structure):
+        _fields_ = [
+            ("dwLength", wintypes.DWORD),
+            ("dwMemoryLoad", wintypes.DWORD),
+            ("ullTotalPhys", ctypes.c_ulonglong),
+            ("ullAvailPhys", ctypes.c_ulonglong),
+            ("ullTotalPageFile", ctypes.c_ulonglong),
+            ("ullAvailPageFile", ctypes.c_ulonglong),
+            ("ullTotalVirtual", ctypes.c_ulonglong),
+            ("ullAvailVirtual", ctypes.c_ulonglong),
+            ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+        ]
+
+    status = MEMORYSTATUSEX()
+    status.dwLength = ctypes.sizeof(status)
+    if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+        return None
+    return status.ullTotalPhys, status.ullAvailPhys
+
+
+def system_memory():
+    """返回 (物理内存总量, 可用内存) 字节数，无法获取时返回 None"""
+    if sys.platform == "win32":
+        return _windows_system_memory()
+    if sys.platform.startswith("linux"):
+        fields = {}
+        try:
+            with open("/proc/meminfo", "r", encoding="ascii") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in ("MemTotal", "MemAvailable"):
+                        fields[key] = int(value.split()[0]) * 1024
+        except (OSError, ValueError):
+            fields = {}
+        if "MemTotal" in fields:
+            return fields["MemTotal"], fields.get("MemAvailable", fields["MemTotal"] // 2)
+    try:
+        page = os.sysconf("SC_PAGE_SIZE")
+        total = os.sysconf("SC_PHYS_PAGES") * page
+    except (AttributeError, ValueError, OSError):
+        return None
+    try:
+        available = os.sysconf("SC_AVPHYS_PAGES") * page
+    except (ValueError, OSError):
+        # macOS 没有 SC_AVPHYS_PAGES，按一半估计
+        available = total // 2
+    return total, available
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
@@ -0,0 +1,121 @@
+"""
+游戏配置档：不同版本、模组组合或账号各是一个配置档，保存在用户数据目录的 profiles.json：
+    {"profiles": [{"id": "main", "name": "正式服", "game_dir": "...", "manifest": "...",
+                   "env": {"RTANG_ACCOUNT": "..."}, "args": ["--username", "..."], "mods_manifest": "..."}]}
+没有填写的字段沿用用户设置。文件不存在时只有一个由用户设置构成的默认配置档。
+"""
+import json
+import os
+import re
+from dataclasses import dataclass, field
+
+from rtang import data_dir
+from rtang.jvm import build_jvm_args, detect_machine, split_jvm_args
+from rtang.launch import LaunchError, default_launch_config
+
+DEFAULT_PROFILE_ID = "default"
+
+
+@dataclass
+class Profile:
+    id: str
+    name: str
+    game_dir: str = ""
+    manifest: str = ""
+    mirror: str = ""
+    java_path: str = ""
+    # 非空时原样作为 JVM 参数；否则按 jvm_preset 和 memory_mb（为空或 0 时取用户设置）生成
+    jvm_args: str = ""
+    jvm_preset: str = ""
+    memory_mb: int = 0
+    # 追加到游戏进程的环境变量（账号等）和启动命令末尾的参数
+    env: dict = field(default_factory=dict)
+    args: list = field(default_factory=list)
+    # 模组清单和模组目录，为空时沿用用户设置和游戏目录下的 mods
+    mods_manifest: str = ""
+    mods_dir: str = ""
+
+
+def profiles_path():
+    return os.path.join(data_dir(), "profiles.json")
+
+
+def default_profile():
+    return Profile(DEFAULT_PROFILE_ID, "默认")
+
+
+def _profile(data, index):
+    if not isinstance(data, dict):
+        raise ValueError(f"第 {index + 1} 个配置档必须是对象")
+    unknown = set(data) - set(Profile.__dataclass_fields__)
+    if unknown:
+        raise ValueError(f"第 {index + 1} 个配置档有未知字段: {', '.join(sorted(unknown))}")
+    profile_id = str(data.get("id") or "").strip()
+    if not re.fullmatch(r"[\w.-]+", profile_id):
+        raise ValueError(f"第 {index + 1} 个配置档的 id 只能包含字母、数字、下划线、点和减号")
+    env = data.get("env") or {}
+    args = data.get("args") or []
+    if not isinstance(env, dict) or not isinstance(args, list):
+        raise ValueError(f"配置档 {profile_id}: env 必须是对象，args 必须是数组")
+    return Profile(
+        id=profile_id,
+        name=str(data.get("name") or profile_id),
+        game_dir=str(data.get("game_dir") or ""),
+        manifest=str(data.get("manifest") or ""),
+        mirror=str(data.get("mirror") or ""),
+        java_path=str(data.get("java_path") or ""),
+        jvm_args=str(data.get("jvm_args") or ""),
+        jvm_preset=str(data.get("jvm_preset") or ""),
+        memory_mb=int(data.get("memory_mb") or 0),
+        env={str(k): str(v) for k, v in env.items()},
+        args=[str(a) for a in args],
+        mods_manifest=str(data.get("mods_manifest") or ""),
+        mods_dir=str(data.get("mods_dir") or ""),
+    )
+
+
+def load_profiles(path=None):
+    """读取配置档列表；文件不存在时返回只含默认配置档的列表，格式错误时抛出 ValueError"""
+    path = path or profiles_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return [default_profile()]
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{path}: {e}") from e
+    items = data.get("profiles") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError(f"{path}: 需要非空的 profiles 数组")
+    profiles = [_profile(item, i) for i, item in enumerate(items)]
+    ids = [p.id for p in profiles]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"{path}: 配置档 id 重复")
+    return profiles
+
+
+def config_for(profile, settings, instances=1, machine=None):
+    """
+    配置档对应的 LaunchConfig。instances 为同时运行的客户端数，自动计算堆大小时把本机内存平分给它们，
+    避免几个客户端各按整机内存分配而开始换页。JVM 参数无法拆分时抛出 LaunchError。
+    """
+    config = default_launch_config(settings)
+    for name in ("game_dir", "manifest", "mirror", "java_path", "mods_manifest", "mods_dir"):
+        value = getattr(profile, name)
+        if value:
+            setattr(config, name, os.path.abspath(value) if name in ("game_dir", "mods_dir") else value)
+    if profile.jvm_args.strip():
+        try:
+            config.jvm_args = split_jvm_args(profile.jvm_args)
+        except ValueError as e:
+            raise LaunchError(f"配置档 {profile.id} 的 JVM 参数有误: {e}") from e
+    elif profile.jvm_preset or profile.memory_mb or (instances > 1 and not settings.jvm_args.strip()):
+        machine = machine or detect_machine()
+        if instances > 1:
+            machine = machine._replace(total_mb=machine.total_mb // instances,
+                                       available_mb=machine.available_mb // instances)
+        config.jvm_args = build_jvm_args(profile.jvm_preset or settings.jvm_preset, machine,
+                                         profile.memory_mb or settings.memory_mb)
+    config.env = dict(profile.env)
+    config.game_args = list(profile.args)
+    return config
@@ -0,0 +1,86 @@
+"""界面刷新调度：高频数值变化先记下，每个显示帧最多应用一次，窗口隐藏或最小化时降频"""
+from PySide6.QtCore import QEvent, QObject, Qt, QTimer, Signal
+
+
+class UiUpdateScheduler(QObject):
+    """
+    post(key, apply, *args) 记录一次更新，同一 key 在下次刷新前只保留最新的值。
+    窗口可见时按屏幕刷新率刷新，隐藏或最小化时按 background_interval 刷新（0 表示等到重新显示）。
+    stats 中 posted 为提交次数，applied 为实际应用次数，coalesced 为被合并掉的次数。
+    """
+    active_changed = Signal(bool)
+
+    def __init__(self, window, background_interval=1000, parent=None):
+        super().__init__(parent or window)
+        self.window = window
+        self.background_interval = background_interval
+        self._pending = {}
+        self._active = True
+        self._timer = QTimer(self)
+        self._timer.setObjectName("uiUpdateTimer")
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self.stats = {"posted": 0, "applied": 0, "coalesced": 0, "flushes": 0}
+        window.installEventFilter(self)
+
+    @property
+    def active(self):
+        return self._active
+
+    def frame_interval(self):
+        screen = self.window.screen()
+        rate = screen.refreshRate() if screen is not None else 0
+        return max(4, round(1000 / rate)) if rate > 0 else 16
+
+    def post(self, key, apply, *args):
+        self.stats["posted"] += 1
+        if key in self._pending:
+            self.stats["coalesced"] += 1
+        self._pending[key] = (apply, args)
+        if not self._timer.isActive():
+            self._schedule()
+
+    def cancel(self, key):
+        self._pending.pop(key, None)
+
+    def _schedule(self):
+        if not self._pending:
+            return
+        if self._active:
+            self._timer.setTimerType(Qt.PreciseTimer)
+            self._timer.start(self.frame_interval())
+        elif self.background_interval > 0:
+            # 后台时允许系统合并唤醒
+            self._timer.setTimerType(Qt.CoarseTimer)
+            self._timer.start(self.background_interval)
+
+    def flush(self):
+        self._timer.stop()
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        self.stats["flushes"] += 1
+        for apply, args in pending.values():
+            apply(*args)
+        self.stats["applied"] += len(pending)
+
+    def _update_active(self):
+        active = self.window.isVisible() and not self.window.isMinimized()
+        if active == self._active:
+            return
+        self._active = active
+        self.active_changed.emit(active)
+        # 按新的频率重新安排已挂起的更新
+        self._timer.stop()
+        self._schedule()
+
+    def eventFilter(self, obj, event):
+        if obj is self.window and event.type() in (QEvent.Show, QEvent.Hide, QEvent.WindowStateChange):
+            self._update_active()
+        return super().eventFilter(obj, event)
+
+    def summary(self):
+        s = self.stats
+        ratio = s["coalesced"] / s["posted"] * 100 if s["posted"] else 0.0
+        return (f"界面更新: 提交 {s['posted']} 次，应用 {s['applied']} 次，"
+                f"合并 {s['coalesced']} 次（{ratio:.1f}%），刷新 {s['flushes']} 帧")
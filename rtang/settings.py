@@ -0,0 +1,227 @@
+"""
+用户设置：带类型的设置项，启动时读取一次并常驻内存，修改后延迟合并写盘（先写临时文件再改名）。
+取值优先级：用户设置 > 机器默认值文件（由部署工具下发）> 代码中的默认值。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from rtang import APP_NAME, data_dir
+
+Setting = namedtuple("Setting", "key type default minimum maximum")
+
+SCHEMA = {s.key: s for s in (
+    Setting("game_dir", str, "", None, None),
+    Setting("java_path", str, "", None, None),
+    # 0 为按 JVM 预设和本机内存自动计算
+    Setting("memory_mb", int, 0, 0, 65536),
+    Setting("jvm_preset", str, "balanced", None, None),
+    # 非空时原样作为 JVM 参数，不再自动生成
+    Setting("jvm_args", str, "", None, None),
+    Setting("mirror", str, "", None, None),
+    Setting("max_connections", int, 8, 1, 64),
+    Setting("per_host_connections", int, 4, 1, 32),
+    # 下载限速（字节每秒，0 为不限）：全部下载合计，以及每个镜像主机
+    Setting("bandwidth_limit", int, 0, 0, None),
+    Setting("per_host_bandwidth", int, 0, 0, None),
+    Setting("verify_workers", int, 0, 0, 64),
+    Setting("full_verify", bool, False, None, None),
+    # 资源仓库用硬链接共享文件；游戏目录中的文件被就地改写时会连带改坏仓库，默认关闭
+    Setting("store_hardlinks", bool, False, None, None),
+    # 服务器下发的模组清单地址或路径，为空时不同步模组
+    Setting("mods_manifest", str, "", None, None),
+    # 多配置档启动：同时准备的配置档数、两次启动游戏进程之间的间隔，以及侧边栏勾选的配置档（逗号分隔的 id）
+    Setting("launch_parallel", int, 2, 1, 8),
+    Setting("launch_stagger_ms", int, 2000, 0, 60000),
+    Setting("launch_profiles", str, "", None, None),
+    Setting("music_folder", str, "", None, None),
+    Setting("volume", float, 1.0, 0.0, 1.0),
+    # 按预分析的响度统一各曲目的音量
+    Setting("normalize_volume", bool, True, None, None),
+    Setting("theme", str, "pink", None, None),
+    Setting("ui_scale", float, 1.5, 0.5, 3.0),
+    Setting("toast_lifetime", int, 5000, 1000, 60000),
+    Setting("max_toasts", int, 10, 1, 50),
+)}
+
+
+def machine_defaults_path():
+    """机器默认值文件位置，可用 RTANG_DEFAULTS 指定"""
+    path = os.environ.get("RTANG_DEFAULTS")
+    if path:
+        return path
+    if sys.platform == "win32":
+        base = os.environ.get("PROGRAMDATA") or "C:\\ProgramData"
+        return os.path.join(base, APP_NAME, "defaults.json")
+    return os.path.join("/etc", APP_NAME.lower(), "defaults.json")
+
+
+def coerce(setting, value):
+    """转换为设置项的类型并限制在范围内，无法转换时抛出 ValueError"""
+    if setting.type is bool:
+        if isinstance(value, str):
+            if value.lower() in ("1", "true", "yes", "on"):
+                return True
+            if value.lower() in ("0", "false", "no", "off", ""):
+                return False
+            raise ValueError(value)
+        return bool(value)
+    if setting.type in (int, float) and isinstance(value, bool):
+        raise ValueError(value)
+    value = setting.type(value)
+    if setting.minimum is not None and value < setting.minimum:
+        value = setting.type(setting.minimum)
+    if setting.maximum is not None and value > setting.maximum:
+        value = setting.type(setting.maximum)
+    return value
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{path}: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: 顶层必须是对象")
+    return data
+
+
+class Settings:
+    """
+    get/set 只访问内存；set 之后 delay 秒内的多次修改合并为一次写盘。
+    文件中只保存与默认值不同的项，部署工具更新机器默认值后未改动过的用户也能生效。
+    """
+
+    def __init__(self, path=None, defaults_path=None, delay=0.5):
+        self.path = path or os.path.join(data_dir(), "settings.json")
+        self.defaults_path = defaults_path or machine_defaults_path()
+        self.delay = delay
+        self.errors = []
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._timer = None
+        self._deadline = 0.0
+        self._dirty = False
+        self._listeners = []
+        self._defaults = {key: s.default for key, s in SCHEMA.items()}
+        self._overrides = {}
+        self.load()
+
+    def _validated(self, data, source):
+        values = {}
+        for key, value in data.items():
+            setting = SCHEMA.get(key)
+            if setting is None:
+                continue
+            try:
+                values[key] = coerce(setting, value)
+            except (TypeError, ValueError):
+                self.errors.append(f"{source}: {key} 的值无效，已忽略")
+        return values
+
+    def load(self):
+        self.errors = []
+        defaults = {key: s.default for key, s in SCHEMA.items()}
+        defaults.update(self._load_file(self.defaults_path))
+        overrides = self._load_file(self.path)
+        with self._lock:
+            self._defaults = defaults
+            self._overrides = {k: v for k, v in overrides.items() if v != defaults[k]}
+            self._dirty = False
+
+    def _load_file(self, path):
+        try:
+            data = _read_json(path)
+        except ValueError as e:
+            self.errors.append(str(e))
+            return {}
+        return self._validated(data, path)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._overrides:
+                return self._overrides[key]
+            return self._defaults[key]
+
+    def __getattr__(self, key):
+        if key in SCHEMA:
+            return self.get(key)
+        raise AttributeError(key)
+
+    def default(self, key):
+        return self._defaults[key]
+
+    def set(self, key, value):
+        """返回转换后的实际值；值有变化时通知监听者并安排写盘"""
+        value = coerce(SCHEMA[key], value)
+        with self._lock:
+            old = self._overrides.get(key, self._defaults[key])
+            if value == old:
+                return value
+            if value == self._defaults[key]:
+                self._overrides.pop(key, None)
+            else:
+                self._overrides[key] = value
+            self._dirty = True
+            self._schedule()
+        for listener in list(self._listeners):
+            listener(key, value)
+        return value
+
+    def reset(self, key):
+        return self.set(key, self._defaults[key])
+
+    def subscribe(self, listener):
+        """listener(key, value) 在调用 set 的线程中执行"""
+        self._listeners.append(listener)
+
+    def _schedule(self):
+        # 连续修改只推迟截止时间，不为每次修改新建定时线程
+        self._deadline = time.monotonic() + self.delay
+        if self._timer is None:
+            self._start_timer(self.delay)
+
+    def _start_timer(self, delay):
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            remaining = self._deadline - time.monotonic()
+            if remaining > 0:
+                self._start_timer(remaining)
+                return
+        self.flush()
+
+    def flush(self):
+        """立即写入未保存的修改"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            data = dict(sorted(self._overrides.items()))
+            self._dirty = False
+            tmp = self.path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except OSError as e:
+                self._dirty = True
+                self.errors.append(f"保存设置失败: {e}")
+                return
+            self.writes += 1
+
+    def close(self):
+        self.flush()
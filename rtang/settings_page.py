@@ -0,0 +1,211 @@
+"""设置页：每个控件绑定一个设置项，修改立即写入内存中的 Settings，写盘由 Settings 合并延迟"""
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import (
+    QCheckBox, QComboBox, QDoubleSpinBox, QFileDialog, QFormLayout, QFrame, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+    QScrollArea, QSlider, QSpinBox, QVBoxLayout, QWidget
+)
+
+from rtang import jvm
+from rtang.settings import SCHEMA
+from rtang.theme import THEMES
+
+
+class SettingsPage(QWidget):
+
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        outer = QVBoxLayout(self)
+        outer.setContentsMargins(0, 0, 0, 0)
+        title = QLabel("设置")
+        title.setFont(QFont("Microsoft YaHei", 16))
+        title.setAlignment(Qt.AlignCenter)
+        outer.addWidget(title)
+
+        scroll = QScrollArea()
+        scroll.setObjectName("settingsScroll")
+        scroll.setWidgetResizable(True)
+        scroll.setFrameShape(QFrame.NoFrame)
+        body = QWidget()
+        body.setObjectName("settingsBody")
+        self.form = QFormLayout(body)
+        self.form.setContentsMargins(30, 10, 30, 10)
+        self.form.setSpacing(10)
+        scroll.setWidget(body)
+        outer.addWidget(scroll)
+
+        self.form.addRow(self._section("游戏"))
+        self.form.addRow("游戏目录", self._path_row("game_dir", directory=True))
+        self.form.addRow("Java 路径", self._path_row("java_path", directory=False))
+        self.machine = jvm.detect_machine()
+        self.form.addRow("本机配置", QLabel(f"内存 {self.machine.total_mb / 1024:.1f} GB"
+                                           f"（可用 {self.machine.available_mb / 1024:.1f} GB），"
+                                           f"{self.machine.cpus} 个 CPU 核心"))
+        self.preset_combo = QComboBox()
+        for preset in jvm.PRESETS.values():
+            self.preset_combo.addItem(preset.label, preset.key)
+        self.preset_combo.setCurrentIndex(max(0, self.preset_combo.findData(settings.jvm_preset)))
+        self.preset_combo.currentIndexChanged.connect(
+            lambda: self._set_and_refresh("jvm_preset", self.preset_combo.currentData()))
+        self.form.addRow("性能预设", self.preset_combo)
+        self.memory_spin = self._spin("memory_mb", step=256, suffix=" MB", special="自动")
+        self.memory_spin.valueChanged.connect(self._refresh_jvm_args)
+        self.form.addRow("内存分配", self.memory_spin)
+        self.form.addRow("生成的参数", self._generated_args_row())
+        self.jvm_args_edit = self._line("jvm_args", "留空使用上面生成的参数")
+        self.jvm_args_edit.editingFinished.connect(self._refresh_jvm_args)
+        self.form.addRow("自定义 JVM 参数", self.jvm_args_edit)
+        self.jvm_args_error = QLabel()
+        self.jvm_args_error.setObjectName("settingsError")
+        self.jvm_args_error.setWordWrap(True)
+        self.form.addRow(self.jvm_args_error)
+        self._refresh_jvm_args()
+        self.form.addRow("同时准备的配置档", self._spin("launch_parallel"))
+        self.form.addRow("游戏启动间隔", self._spin("launch_stagger_ms", step=500, suffix=" 毫秒", special="不间隔"))
+
+        self.form.addRow(self._section("下载与校验"))
+        self.form.addRow("下载镜像", self._line("mirror", "留空则使用清单中的镜像"))
+        self.form.addRow("模组清单", self._line("mods_manifest", "留空则不同步模组"))
+        self.form.addRow("最大连接数", self._spin("max_connections"))
+        self.form.addRow("每个主机连接数", self._spin("per_host_connections"))
+        self.form.addRow("下载限速", self._bandwidth_spin("bandwidth_limit"))
+        self.form.addRow("每个主机限速", self._bandwidth_spin("per_host_bandwidth"))
+        self.form.addRow("校验线程数", self._spin("verify_workers", special="自动"))
+        self.full_verify_check = self._check("full_verify", "启动时完整校验游戏文件（忽略校验缓存，重新计算全部哈希）",
+                                             "fullVerifyCheck")
+        self.form.addRow(self.full_verify_check)
+        self.store_hardlinks_check = self._check(
+            "store_hardlinks", "版本之间用硬链接共享文件（省空间，但就地改写游戏文件会连带改坏其他版本）",
+            "storeHardlinksCheck")
+        self.form.addRow(self.store_hardlinks_check)
+
+        self.form.addRow(self._section("界面与音乐"))
+        self.form.addRow("音量", self._volume_slider())
+        self.normalize_check = self._check("normalize_volume", "按响度统一音量（后台预先分析，避免曲目之间忽大忽小）",
+                                           "normalizeVolumeCheck")
+        self.form.addRow(self.normalize_check)
+        self.theme_combo = QComboBox()
+        for key, (label, _) in THEMES.items():
+            self.theme_combo.addItem(label, key)
+        self.theme_combo.setCurrentIndex(max(0, self.theme_combo.findData(settings.theme)))
+        # 主窗口订阅了设置，切换主题由它应用
+        self.theme_combo.currentIndexChanged.connect(
+            lambda: settings.set("theme", self.theme_combo.currentData()))
+        self.form.addRow("主题", self.theme_combo)
+        scale = QDoubleSpinBox()
+        scale.setRange(SCHEMA["ui_scale"].minimum, SCHEMA["ui_scale"].maximum)
+        scale.setSingleStep(0.25)
+        scale.setValue(settings.ui_scale)
+        scale.setSuffix(" 倍（重启后生效）")
+        scale.valueChanged.connect(lambda v: settings.set("ui_scale", v))
+        self.form.addRow("界面缩放", scale)
+        self.form.addRow("提示停留时间", self._spin("toast_lifetime", step=500, suffix=" 毫秒"))
+        self.form.addRow("最多同时显示提示", self._spin("max_toasts"))
+
+    def _section(self, text):
+        label = QLabel(text)
+        label.setObjectName("settingsSection")
+        label.setFont(QFont("Microsoft YaHei", 12, QFont.Bold))
+        return label
+
+    def _generated_args_row(self):
+        row = QWidget()
+        layout = QHBoxLayout(row)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.generated_args = QLineEdit()
+        self.generated_args.setObjectName("generatedJvmArgs")
+        self.generated_args.setReadOnly(True)
+        button = QPushButton("复制到自定义")
+        button.clicked.connect(self._copy_generated_args)
+        layout.addWidget(self.generated_args, 1)
+        layout.addWidget(button)
+        return row
+
+    def _set_and_refresh(self, key, value):
+        self.settings.set(key, value)
+        self._refresh_jvm_args()
+
+    def _refresh_jvm_args(self):
+        args = jvm.build_jvm_args(self.settings.jvm_preset, self.machine, self.settings.memory_mb)
+        self.generated_args.setText(jvm.format_args(args))
+        self.generated_args.setCursorPosition(0)
+        # 填写了自定义参数时生成的参数不会生效，置灰提示
+        self.generated_args.setEnabled(not self.settings.jvm_args.strip())
+        try:
+            jvm.split_jvm_args(self.settings.jvm_args)
+            error = ""
+        except ValueError as e:
+            error = str(e)
+        self.jvm_args_error.setText(error)
+        self.jvm_args_error.setVisible(bool(error))
+
+    def _copy_generated_args(self):
+        self.jvm_args_edit.setText(self.generated_args.text())
+        self.settings.set("jvm_args", self.generated_args.text())
+        self._refresh_jvm_args()
+
+    def _line(self, key, placeholder=""):
+        edit = QLineEdit(self.settings.get(key))
+        edit.setPlaceholderText(placeholder)
+        # 编辑完成时才保存，不在每次按键时写入
+        edit.editingFinished.connect(lambda: self.settings.set(key, edit.text().strip()))
+        return edit
+
+    def _path_row(self, key, directory):
+        row = QWidget()
+        layout = QHBoxLayout(row)
+        layout.setContentsMargins(0, 0, 0, 0)
+        edit = self._line(key, "留空使用默认值")
+        button = QPushButton("浏览…")
+
+        def browse():
+            if directory:
+                path = QFileDialog.getExistingDirectory(self, "选择目录", edit.text())
+            else:
+                path, _ = QFileDialog.getOpenFileName(self, "选择文件", edit.text())
+            if path:
+                edit.setText(path)
+                self.settings.set(key, path)
+
+        button.clicked.connect(browse)
+        layout.addWidget(edit, 1)
+        layout.addWidget(button)
+        return row
+
+    def _spin(self, key, step=1, suffix="", special=None):
+        setting = SCHEMA[key]
+        spin = QSpinBox()
+        spin.setRange(setting.minimum, setting.maximum if setting.maximum is not None else 2 ** 31 - 1)
+        spin.setSingleStep(step)
+        spin.setSuffix(suffix)
+        if special:
+            spin.setSpecialValueText(special)
+        spin.setValue(self.settings.get(key))
+        spin.valueChanged.connect(lambda v: self.settings.set(key, v))
+        return spin
+
+    def _bandwidth_spin(self, key):
+        spin = QSpinBox()
+        spin.setRange(0, 1024 * 1024)
+        spin.setSingleStep(256)
+        spin.setSuffix(" KB/s")
+        spin.setSpecialValueText("不限速")
+        spin.setValue(self.settings.get(key) // 1024)
+        spin.valueChanged.connect(lambda v: self.settings.set(key, v * 1024))
+        return spin
+
+    def _check(self, key, text, name):
+        check = QCheckBox(text)
+        check.setObjectName(name)
+        check.setChecked(self.settings.get(key))
+        check.toggled.connect(lambda on: self.settings.set(key, on))
+        return check
+
+    def _volume_slider(self):
+        slider = QSlider(Qt.Horizontal)
+        slider.setRange(0, 100)
+        slider.setValue(round(self.settings.volume * 100))
+        # 拖动时每一步都会修改设置，写盘由 Settings 合并
+        slider.valueChanged.connect(lambda v: self.settings.set("volume", v / 100))
+        return slider
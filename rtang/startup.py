@@ -0,0 +1,44 @@
+"""启动耗时分析：记录导入、QApplication、样式表、控件构建到首帧的时间线"""
+import json
+import sys
+import time
+
+
+class StartupProfiler:
+
+    def __init__(self):
+        self.enabled = False
+        self.t0 = time.perf_counter()
+        self.marks = []
+
+    def enable(self, t0=None):
+        self.enabled = True
+        if t0 is not None:
+            self.t0 = t0
+
+    def mark(self, name):
+        if self.enabled:
+            self.marks.append((name, time.perf_counter()))
+
+    def timeline(self):
+        """[(阶段名, 距开始毫秒, 阶段耗时毫秒), ...]"""
+        rows = []
+        last = self.t0
+        for name, t in self.marks:
+            rows.append((name, (t - self.t0) * 1000, (t - last) * 1000))
+            last = t
+        return rows
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        print("启动耗时（毫秒）:", file=stream)
+        for name, at, delta in self.timeline():
+            print(f"  {at:8.1f}  +{delta:7.1f}  {name}", file=stream)
+
+    def save(self, path):
+        data = {"marks": [{"name": name, "at_ms": at, "delta_ms": delta} for name, at, delta in self.timeline()]}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+profiler = StartupProfiler()
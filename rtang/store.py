@@ -0,0 +1,261 @@
+"""
+内容寻址的本地资源仓库：哈希 → 文件，多个版本目录通过 reflink 共享同一份内容。
+文件系统不支持 reflink（ext4、NTFS 等）时仓库不保存副本，只在 refs 中记下各版本目录里已安装的文件，
+还原时从那里复制：仓库本身不额外占用空间，仍省去重新下载。
+硬链接需显式开启（hardlink=True）：硬链接的文件与仓库共用同一份数据，游戏或玩家就地改写其中任何一个
+（例如 cp 新文件覆盖 mods 中的模组），仓库和所有其他版本目录都会跟着被改坏，直到下次校验发现并删除。
+"""
+import argparse
+import errno
+import hashlib
+import json
+import os
+import shutil
+import sys
+import uuid
+
+from rtang import data_dir
+from rtang.hashing import hash_file
+from rtang.manifest import local_path
+
+FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    """写时复制克隆（Linux btrfs/xfs 的 FICLONE、macOS APFS 的 clonefile），不支持时抛 OSError"""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(src, "rb") as fs, open(dst, "wb") as fd:
+            try:
+                fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+            except OSError:
+                fd.close()
+                os.remove(dst)
+                raise
+        return
+    if sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return
+    raise OSError(errno.ENOTSUP, "reflink not supported")
+
+
+def link_or_copy(src, dst, hardlink=False, copy=True):
+    """
+    依次尝试 reflink、硬链接（仅 hardlink 为 True 时）、复制（仅 copy 为 True 时）；
+    返回实际使用的方式，都不可用时返回 None，dst 不会被创建
+    """
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp = f"{dst}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        try:
+            _reflink(src, tmp)
+            method = "reflink"
+        except OSError:
+            method = None
+            if hardlink:
+                try:
+                    os.link(src, tmp)
+                    method = "hardlink"
+                except OSError:
+                    pass
+            if method is None and copy:
+                shutil.copyfile(src, tmp)
+                method = "copy"
+        if method is None:
+            return None
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return method
+
+
+class AssetStore:
+    """
+    objects/<algo>/<前两位>/<哈希> 存放能共享数据的内容，refs/<id>.json 记录每个版本目录引用了哪些内容、
+    分别装在哪个文件。磁盘占用只随不同内容的数量增长，gc() 删除不再被任何版本引用的内容。
+    """
+
+    def __init__(self, root=None, hardlink=False):
+        self.root = root or os.path.join(data_dir(), "store")
+        self.hardlink = hardlink
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.refs_dir = os.path.join(self.root, "refs")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+        # 不能与仓库共享数据的源文件所在的设备，之后不再逐个尝试
+        self._unshared = set()
+        self._installed = None
+
+    def blob_path(self, algo, digest):
+        return os.path.join(self.objects_dir, algo, digest[:2], digest)
+
+    def has(self, algo, digest):
+        return os.path.isfile(self.blob_path(algo, digest))
+
+    def add_file(self, path, algo, digest):
+        """
+        把已校验的文件以 reflink（或开启时的硬链接）收入仓库，返回仓库中的路径。
+        两者都不可用时不复制，返回 None：这份内容由 write_ref 登记的已安装文件提供。
+        """
+        blob = self.blob_path(algo, digest)
+        if os.path.isfile(blob):
+            return blob
+        device = os.stat(path).st_dev
+        if device in self._unshared:
+            return None
+        if link_or_copy(path, blob, self.hardlink, copy=False) is None:
+            self._unshared.add(device)
+            return None
+        return blob
+
+    def check_blob(self, algo, digest):
+        """重新计算哈希确认内容未被改动；损坏的内容会被删除"""
+        blob = self.blob_path(algo, digest)
+        try:
+            actual = hash_file(blob, algo)
+        except OSError:
+            return False
+        if actual == digest:
+            return True
+        os.remove(blob)
+        return False
+
+    def _installed_source(self, entry):
+        """版本目录中内容相同的已安装文件，找不到或已被改动时返回 None"""
+        if self._installed is None:
+            self._installed = {}
+            for ref in self._refs():
+                for key, path in ref.get("paths", {}).items():
+                    self._installed.setdefault(key, []).append(os.path.join(ref["root"], *path.split("/")))
+        for path in self._installed.get(f"{entry.algo}:{entry.digest}", ()):
+            try:
+                if os.path.getsize(path) == entry.size and hash_file(path, entry.algo) == entry.digest:
+                    return path
+            except OSError:
+                continue
+        return None
+
+    def materialize(self, root, entries):
+        """从仓库（或其他版本目录中已安装的同一内容）还原 entries 到版本目录 root，返回仍需下载的条目"""
+        missing = []
+        for entry in entries:
+            if self.has(entry.algo, entry.digest) and self.check_blob(entry.algo, entry.digest):
+                source = self.blob_path(entry.algo, entry.digest)
+            else:
+                source = self._installed_source(entry)
+            if source is None:
+                missing.append(entry)
+                continue
+            link_or_copy(source, local_path(root, entry), self.hardlink)
+        return missing
+
+    @staticmethod
+    def ref_id(root):
+        return hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode("utf-8")).hexdigest()[:16]
+
+    def ref_digest(self, root):
+        """读取版本目录登记时的清单摘要，未登记返回 None"""
+        try:
+            with open(os.path.join(self.refs_dir, self.ref_id(root) + ".json"), "r", encoding="utf-8") as f:
+                ref = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # 旧版本的登记没有记下文件位置，当作未登记重新登记一次
+        return ref.get("digest") if "paths" in ref else None
+
+    @staticmethod
+    def _objects(entries):
+        return sorted({f"{e.algo}:{e.digest}" for e in entries})
+
+    @classmethod
+    def entries_digest(cls, entries):
+        return hashlib.sha1("\n".join(cls._objects(entries)).encode("ascii")).hexdigest()
+
+    def write_ref(self, root, entries):
+        objects = self._objects(entries)
+        digest = self.entries_digest(entries)
+        paths = {}
+        for e in entries:
+            paths.setdefault(f"{e.algo}:{e.digest}", e.path)
+        path = os.path.join(self.refs_dir, self.ref_id(root) + ".json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"root": os.path.abspath(root), "digest": digest, "objects": objects, "paths": paths}, f)
+        os.replace(tmp, path)
+        self._installed = None
+        return digest
+
+    def _refs(self):
+        """全部仍有效的登记记录"""
+        refs = []
+        for name in os.listdir(self.refs_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.refs_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    ref = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # 版本目录已被删除时，它的引用一并失效
+            if not os.path.isdir(ref.get("root", "")):
+                os.remove(path)
+                continue
+            refs.append(ref)
+        return refs
+
+    def _referenced(self):
+        referenced = set()
+        for ref in self._refs():
+            referenced.update(ref.get("objects", []))
+        return referenced
+
+    def gc(self, dry_run=False):
+        """删除未被引用的内容，返回 (删除数量, 释放字节数)"""
+        referenced = self._referenced()
+        removed = freed = 0
+        for algo in os.listdir(self.objects_dir):
+            algo_dir = os.path.join(self.objects_dir, algo)
+            for dirpath, _, filenames in os.walk(algo_dir):
+                for name in filenames:
+                    if f"{algo}:{name}" in referenced:
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                        if not dry_run:
+                            os.remove(path)
+                    except OSError:
+                        continue
+                    removed += 1
+                    # 仍有版本目录硬链接着的内容不会真正释放空间
+                    if st.st_nlink <= 1:
+                        freed += st.st_size
+        return removed, freed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rtang.store", description="本地资源仓库维护")
+    parser.add_argument("--root", help="仓库目录，默认位于用户数据目录")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gc_parser = sub.add_parser("gc", help="删除不再被任何版本引用的内容")
+    gc_parser.add_argument("--dry-run", action="store_true", help="只统计，不删除")
+    args = parser.parse_args(argv)
+
+    store = AssetStore(args.root)
+    if args.command == "gc":
+        removed, freed = store.gc(args.dry_run)
+        print(f"{'可删除' if args.dry_run else '已删除'} {removed} 个对象，释放 {freed / 1048576:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+游戏进程监管：游戏的输出写入本次运行的日志文件，后台线程跟读到环形缓冲，记录启动耗时和峰值内存，异常退出时保存诊断包。
+输出不经管道，且在 POSIX 上游戏运行在独立会话中，关闭启动器后游戏不会因 SIGPIPE 或 SIGHUP 退出。
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from collections import deque, namedtuple
+
+from rtang import APP_NAME, data_dir
+from rtang.launch import LaunchError
+from rtang.procstat import memory_info
+
+GameExit = namedtuple("GameExit", "returncode runtime startup_ms peak_rss crash_bundle")
+
+# 这些名字的环境变量写入诊断包时隐去取值
+_SECRET_MARKERS = ("TOKEN", "SECRET", "PASSWORD", "PASSWD", "KEY", "CREDENTIAL", "AUTH", "COOKIE", "SESSION")
+
+
+def _redact_env(env):
+    return {k: ("***" if any(m in k.upper() for m in _SECRET_MARKERS) else v) for k, v in sorted(env.items())}
+
+
+class GameSupervisor:
+    """
+    启动并监管游戏进程。stdout/stderr 分别写入 log_dir 下本次运行的日志文件，各由一个线程跟读并切分成行，写入容量为 ring_size 的环形缓冲，
+    同时暂存到待取列表；待取列表由空变为非空时调用一次 on_output()，调用方随后用 drain() 批量取走。
+    进程结束后在监视线程中调用 on_exit(GameExit)。回调都在后台线程中执行。
+    """
+
+    RSS_INTERVAL = 1.0
+    # 跟读日志文件读到末尾后的等待间隔（秒）
+    TAIL_INTERVAL = 0.05
+    # 保留最近几次运行的日志文件
+    LOG_KEEP = 20
+
+    def __init__(self, command, cwd, ring_size=5000, env=None, on_output=None, on_exit=None, crash_dir=None,
+                 log_dir=None):
+        self.command = list(command)
+        self.cwd = cwd
+        self.env = env
+        self.on_output = on_output
+        self.on_exit = on_exit
+        self.crash_dir = crash_dir or os.path.join(data_dir(), "crashes")
+        self.log_dir = log_dir or os.path.join(data_dir(), "game-logs")
+        self.log_paths = []
+        self.ring = deque(maxlen=ring_size)
+        self._pending = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        self.lines_total = 0
+        self.lines_dropped = 0
+        self.process = None
+        self.started_at = None
+        self.startup_ms = None
+        self.rss = 0
+        self.peak_rss = 0
+        self.result = None
+        self._readers = []
+        self._exited = threading.Event()
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    def running(self):
+        return self.process is not None and self.result is None
+
+    def _open_logs(self):
+        """本次运行的 stdout/stderr 日志文件，同时清理较早的运行留下的日志"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        names = sorted(n for n in os.listdir(self.log_dir) if n.endswith(".log"))
+        for name in names[:max(0, len(names) - 2 * (self.LOG_KEEP - 1))]:
+            try:
+                os.remove(os.path.join(self.log_dir, name))
+            except OSError:
+                pass
+        stem = os.path.join(self.log_dir, time.strftime("game-%Y%m%d-%H%M%S-") + os.urandom(3).hex())
+        self.log_paths = [stem + "-out.log", stem + "-err.log"]
+        return [open(path, "wb") for path in self.log_paths]
+
+    def start(self):
+        if sys.platform == "win32":
+            options = {"creationflags": subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            # 独立会话：终端关闭或启动器退出时游戏收不到 SIGHUP/SIGINT
+            options = {"start_new_session": True}
+        self.started_at = time.monotonic()
+        try:
+            outputs = self._open_logs()
+        except OSError as e:
+            raise LaunchError(f"无法创建游戏日志: {e}") from e
+        try:
+            # 输出直接写文件而不是管道：启动器退出后没有读取端，写管道的游戏会被 SIGPIPE 结束
+            self.process = subprocess.Popen(self.command, cwd=self.cwd, env=self.env, stdin=subprocess.DEVNULL,
+                                            stdout=outputs[0], stderr=outputs[1], **options)
+        except OSError as e:
+            raise LaunchError(f"无法启动游戏: {e}") from e
+        finally:
+            for f in outputs:
+                f.close()
+        for path, prefix in zip(self.log_paths, ("", "[E] ")):
+            reader = threading.Thread(target=self._read, args=(path, prefix), daemon=True, name="game-log")
+            reader.start()
+            self._readers.append(reader)
+        threading.Thread(target=self._watch, daemon=True, name="game-watch").start()
+        return self
+
+    def _read(self, path, prefix):
+        # 按块读取后一次写入多行，输出很多时也只在缓冲区非空转换时通知一次；读到末尾时等待，进程退出后读完剩余内容为止
+        pending_tail = b""
+        with open(path, "rb") as stream:
+            while True:
+                chunk = stream.read(65536)
+                if not chunk:
+                    if self._exited.is_set():
+                        chunk = stream.read(65536)
+                        if not chunk:
+                            break
+                    else:
+                        time.sleep(self.TAIL_INTERVAL)
+                        continue
+                data = pending_tail + chunk
+                parts = data.split(b"\n")
+                pending_tail = parts.pop()
+                if parts:
+                    self._append([prefix + p.rstrip(b"\r").decode("utf-8", "replace") for p in parts])
+        if pending_tail:
+            self._append([prefix + pending_tail.rstrip(b"\r").decode("utf-8", "replace")])
+
+    def _append(self, lines):
+        with self._lock:
+            if self.startup_ms is None:
+                self.startup_ms = (time.monotonic() - self.started_at) * 1000
+            notify = not self._pending
+            overflow = len(self._pending) + len(lines) - self._pending.maxlen
+            if overflow > 0:
+                self.lines_dropped += overflow
+            self.ring.extend(lines)
+            self._pending.extend(lines)
+            self.lines_total += len(lines)
+        if notify and self.on_output is not None:
+            self.on_output()
+
+    def drain(self):
+        """取走自上次以来的新行"""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+        return lines
+
+    def snapshot(self, clear_pending=False):
+        """环形缓冲中的全部行；clear_pending 为 True 时同时清空待取列表，避免随后 drain() 重复取到"""
+        with self._lock:
+            if clear_pending:
+                self._pending.clear()
+            return list(self.ring)
+
+    def _sample_memory(self):
+        info = memory_info(self.process.pid)
+        if info is None:
+            return
+        rss, peak = info
+        self.rss = rss
+        self.peak_rss = max(self.peak_rss, rss, peak or 0)
+
+    def _watch(self):
+        while True:
+            self._sample_memory()
+            try:
+                returncode = self.process.wait(self.RSS_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                continue
+        runtime = time.monotonic() - self.started_at
+        self._exited.set()
+        for reader in self._readers:
+            reader.join(2.0)
+        bundle = None
+        if returncode != 0:
+            try:
+                bundle = self.save_crash_bundle(returncode, runtime)
+            except OSError:
+                bundle = None
+        self.result = GameExit(returncode, runtime, self.startup_ms, self.peak_rss or None, bundle)
+        if self.on_exit is not None:
+            self.on_exit(self.result)
+
+    def save_crash_bundle(self, returncode, runtime):
+        """诊断包：最近的日志行和运行环境，打包为 crash-时间-pid.zip"""
+        os.makedirs(self.crash_dir, exist_ok=True)
+        name = time.strftime("crash-%Y%m%d-%H%M%S") + f"-{self.process.pid}.zip"
+        path = os.path.join(self.crash_dir, name)
+        info = {
+            "app": APP_NAME,
+            "command": self.command,
+            "cwd": self.cwd,
+            "returncode": returncode,
+            "runtime_s": round(runtime, 3),
+            "startup_ms": self.startup_ms,
+            "peak_rss": self.peak_rss or None,
+            "lines_total": self.lines_total,
+            "platform": platform.platform(),
+            "python": sys.version,
+            "env": _redact_env(self.env if self.env is not None else os.environ),
+        }
+        tmp = path + ".tmp"
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("log.txt", "\n".join(self.snapshot()) + "\n")
+            zf.writestr("info.json", json.dumps(info, ensure_ascii=False, indent=2))
+        os.replace(tmp, path)
+        return path
+
+    def terminate(self):
+        if self.running():
+            self.process.terminate()
@@ -0,0 +1,186 @@
+"""基于 mutagen 的音乐标签读取与缓存"""
+import base64
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from rtang import data_dir
+
+TrackInfo = namedtuple("TrackInfo", "path title artist album duration cover_id")
+
+
+def display_title(info, path=None):
+    """播放栏显示用的标题，没有标签时退回文件名"""
+    if info is None or not info.title:
+        return os.path.basename(path or info.path)
+    if info.artist:
+        return f"{info.artist} - {info.title}"
+    return info.title
+
+
+def _first_text(tags, *keys):
+    for key in keys:
+        try:
+            value = tags[key]
+        except (KeyError, ValueError, TypeError):
+            continue
+        if hasattr(value, "text"):
+            value = value.text
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else ""
+        value = str(value).strip()
+        if value:
+            return value
+    return ""
+
+
+def _extract_cover(audio):
+    from mutagen.flac import Picture
+    tags = audio.tags
+    pictures = getattr(audio, "pictures", None)
+    if pictures:
+        return pictures[0].data
+    if tags is None:
+        return None
+    if hasattr(tags, "getall"):
+        apic = tags.getall("APIC")
+        if apic:
+            return apic[0].data
+    covr = tags.get("covr") if hasattr(tags, "get") else None
+    if covr:
+        return bytes(covr[0])
+    blocks = tags.get("metadata_block_picture") if hasattr(tags, "get") else None
+    if blocks:
+        try:
+            return Picture(base64.b64decode(blocks[0])).data
+        except Exception:
+            return None
+    return None
+
+
+def read_tags(path):
+    """解析单个文件，返回 (TrackInfo, 封面字节或 None)；无法解析时标签字段为空"""
+    # mutagen 导入较慢，推迟到后台线程第一次解析时
+    import mutagen
+    try:
+        audio = mutagen.File(path)
+    except Exception:
+        audio = None
+    if audio is None:
+        return TrackInfo(path, "", "", "", 0.0, None), None
+    tags = audio.tags or {}
+    title = _first_text(tags, "TIT2", "title", "\xa9nam", "TITLE")
+    artist = _first_text(tags, "TPE1", "artist", "\xa9ART", "ARTIST")
+    album = _first_text(tags, "TALB", "album", "\xa9alb", "ALBUM")
+    duration = float(getattr(audio.info, "length", 0.0) or 0.0)
+    cover = _extract_cover(audio)
+    cover_id = hashlib.sha1(cover).hexdigest() if cover else None
+    return TrackInfo(path, title, artist, album, duration, cover_id), cover
+
+
+class TagCache:
+    """以路径和 mtime 为键的标签缓存，封面按内容哈希去重存储"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(data_dir(), "library.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tags ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " title TEXT, artist TEXT, album TEXT,"
+            " duration REAL, cover_id TEXT)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS covers (id TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get_many(self, paths):
+        """返回 {path: (mtime_ns, TrackInfo)}，只包含已缓存的路径"""
+        result = {}
+        paths = list(paths)
+        with self._lock:
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                rows = self._conn.execute(
+                    "SELECT path, mtime_ns, title, artist, album, duration, cover_id FROM tags "
+                    f"WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for path, mtime_ns, *fields in rows:
+                    result[path] = (mtime_ns, TrackInfo(path, *fields))
+        return result
+
+    def put_many(self, entries):
+        """entries: [(mtime_ns, TrackInfo, 封面字节或 None), ...]"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO covers (id, data) VALUES (?, ?)",
+                [(info.cover_id, cover) for _, info, cover in entries if cover]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tags VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(info.path, mtime_ns, info.title, info.artist, info.album, info.duration, info.cover_id)
+                 for mtime_ns, info, _ in entries]
+            )
+            self._conn.commit()
+
+    def cover(self, cover_id):
+        """按 TrackInfo.cover_id 取封面字节，没有时返回 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM covers WHERE id = ?", (cover_id,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_tags_cached(paths, cache, executor, cancel=None, window=64):
+    """
+    读取一批文件的标签：mtime 未变的直接取缓存，其余提交到 executor 解析。
+    同时在途的任务数不超过 window，解析结果写回缓存。返回 TrackInfo 列表。
+    """
+    cached = cache.get_many(paths)
+    result = []
+    misses = []
+    for path in paths:
+        mtime_ns = _mtime_ns(path)
+        if mtime_ns is None:
+            continue
+        hit = cached.get(path)
+        if hit is not None and hit[0] == mtime_ns:
+            result.append(hit[1])
+        else:
+            misses.append((path, mtime_ns))
+
+    for i in range(0, len(misses), window):
+        if cancel is not None and cancel.is_set():
+            break
+        chunk = misses[i:i + window]
+        futures = [(mtime_ns, executor.submit(read_tags, path)) for path, mtime_ns in chunk]
+        entries = []
+        for mtime_ns, future in futures:
+            info, cover = future.result()
+            entries.append((mtime_ns, info, cover))
+            result.append(info)
+        cache.put_many(entries)
+    return result
+
+
+def new_tag_executor(max_workers=None):
+    """标签解析线程池，并发数默认不超过 4，避免在机械盘和网络共享上抢占 I/O"""
+    return ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1),
+                              thread_name_prefix="tag-reader")
@@ -0,0 +1,144 @@
+"""
+主题管理：样式表只读取、校验、压缩一次并缓存，切换主题时整表替换一次；
+控件的临时状态（如提示框淡出）用动态属性表达，只重新套用这一个控件的样式，不再重新解析样式表。
+"""
+import os
+import re
+
+from PySide6.QtCore import QtMsgType, qInstallMessageHandler
+from PySide6.QtWidgets import QApplication
+
+# 主题键 → (显示名称, styles 目录下的文件名)
+THEMES = {
+    "pink": ("甜美粉", "pink_theme.qss"),
+    "night": ("夜樱", "night_theme.qss"),
+}
+DEFAULT_THEME = "pink"
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_SPACE = re.compile(r"\s+")
+_PUNCT_SPACE = re.compile(r"\s*([{};,>])\s*")
+
+
+class ThemeError(Exception):
+    pass
+
+
+def compile_qss(text, source="<qss>"):
+    """去掉注释和多余空白并做基本的结构检查，返回交给 Qt 的文本；结构错误抛出 ThemeError"""
+    if text.count("/*") != text.count("*/"):
+        raise ThemeError(f"{source}: 注释没有闭合")
+    # 注释换成同样行数的空行，报错的行号与原文件一致
+    text = _COMMENT.sub(lambda m: "\n" * m.group().count("\n"), text)
+    depth = 0
+    selector_start = 0
+    for i, ch in enumerate(text):
+        error = None
+        if ch == "{":
+            if depth:
+                error = "规则不能嵌套"
+            elif not text[selector_start:i].strip():
+                error = "缺少选择器"
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth < 0:
+                error = "多余的 }"
+            selector_start = i + 1
+        if error:
+            line = text.count("\n", 0, i) + 1
+            raise ThemeError(f"{source}:{line}: {error}")
+    if depth:
+        raise ThemeError(f"{source}: 花括号没有闭合")
+    # 冒号两侧的空白保留："#a :hover" 与 "#a:hover" 含义不同
+    return _PUNCT_SPACE.sub(r"\1", _SPACE.sub(" ", text)).strip()
+
+
+def repolish(widget):
+    """动态属性改变后只重新套用这个控件的样式"""
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    widget.update()
+
+
+def set_state(widget, name, value):
+    """设置用于样式选择器的动态属性，值没有变化时什么都不做"""
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    repolish(widget)
+
+
+class ThemeManager:
+    """
+    apply() 切换主题：文本与当前相同时直接返回；Qt 只重新套用已经应用过样式的控件，
+    尚未创建的延迟页面不受影响。切换期间冻结顶层窗口的重绘，只画一帧。
+    """
+
+    def __init__(self, app, styles_dir):
+        self.app = app
+        self.styles_dir = styles_dir
+        self.current = None
+        self._cache = {}
+        self.stats = {"loads": 0, "cache_hits": 0, "switches": 0, "skipped": 0}
+
+    def themes(self):
+        return [(key, label) for key, (label, _) in THEMES.items()]
+
+    def path(self, key):
+        if key not in THEMES:
+            raise ThemeError(f"未知主题: {key}")
+        return os.path.join(self.styles_dir, THEMES[key][1])
+
+    def stylesheet(self, key):
+        """返回压缩后的样式表；文件修改时间不变时使用缓存"""
+        path = self.path(key)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError as e:
+            raise ThemeError(f"无法读取主题 {key}: {e}") from e
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            self.stats["cache_hits"] += 1
+            return cached[1]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            raise ThemeError(f"无法读取主题 {key}: {e}") from e
+        text = compile_qss(source, os.path.basename(path))
+        self._cache[key] = (mtime, text)
+        self.stats["loads"] += 1
+        return text
+
+    def apply(self, key):
+        """应用主题，失败时保留当前主题并抛出 ThemeError"""
+        text = self.stylesheet(key)
+        if text == self.app.styleSheet():
+            self.current = key
+            self.stats["skipped"] += 1
+            return
+        previous = self.app.styleSheet()
+        warnings = []
+
+        def handler(mode, context, message):
+            if mode != QtMsgType.QtDebugMsg and "stylesheet" in message.lower():
+                warnings.append(message)
+
+        windows = [w for w in QApplication.topLevelWidgets() if w.isVisible() and w.updatesEnabled()]
+        for window in windows:
+            window.setUpdatesEnabled(False)
+        old_handler = qInstallMessageHandler(handler)
+        try:
+            self.app.setStyleSheet(text)
+        finally:
+            qInstallMessageHandler(old_handler)
+            for window in windows:
+                window.setUpdatesEnabled(True)
+        if warnings:
+            # Qt 解析失败时整张表都不生效，退回之前的主题
+            self.app.setStyleSheet(previous)
+            raise ThemeError(f"主题 {key} 解析失败: {warnings[0]}")
+        self.current = key
+        self.stats["switches"] += 1
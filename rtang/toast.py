@@ -0,0 +1,229 @@
+"""右下角提示框：控件池复用、重复消息合并计数、每帧最多一次重新布局"""
+from PySide6.QtCore import QEasingCurve, QObject, QParallelAnimationGroup, QPoint, QPropertyAnimation, QRect, Qt, QTimer
+from PySide6.QtGui import QFont, QFontMetrics
+from PySide6.QtWidgets import QGraphicsOpacityEffect, QLabel
+
+from rtang.theme import set_state
+
+
+class _Toast:
+    """一个池化的提示框，动画和透明效果随控件一起复用"""
+
+    def __init__(self, manager, parent):
+        self.label = QLabel(parent)
+        self.label.setObjectName("toastLabel")
+        self.label.setAlignment(Qt.AlignCenter)
+        self.label.setFixedSize(manager.width, manager.height)
+        self.label.setFont(manager.font)
+        self.label.setAttribute(Qt.WA_StyledBackground, True)
+        self.label.hide()
+
+        self.move_anim = QPropertyAnimation(self.label, b"pos", self.label)
+        self.move_anim.setEasingCurve(QEasingCurve.OutQuad)
+
+        # 平时禁用透明效果，避免每次绘制都走离屏渲染
+        self.effect = QGraphicsOpacityEffect(self.label)
+        self.effect.setEnabled(False)
+        self.label.setGraphicsEffect(self.effect)
+        fade = QPropertyAnimation(self.effect, b"opacity", self.label)
+        fade.setStartValue(1.0)
+        fade.setEndValue(0.0)
+        fade.setEasingCurve(QEasingCurve.OutCubic)
+        self.shrink_anim = QPropertyAnimation(self.label, b"geometry", self.label)
+        self.shrink_anim.setEasingCurve(QEasingCurve.OutCubic)
+        self.fade_group = QParallelAnimationGroup(self.label)
+        self.fade_group.addAnimation(fade)
+        self.fade_group.addAnimation(self.shrink_anim)
+        self.fade_anim = fade
+
+        self.timer = QTimer(self.label)
+        self.timer.setObjectName("toastTimer")
+        self.timer.setSingleShot(True)
+
+        self.message = ""
+        self.count = 0
+        self.shown = False
+        self.fading = False
+        self.target = None
+
+
+class ToastManager(QObject):
+    """
+    show() 可以在任意频率下调用：与当前提示相同的消息只增加计数（"×12"），
+    新消息先进入列表，真正的位置计算和动画由定时器合并到每帧一次。
+    """
+
+    FRAME_INTERVAL = 16
+
+    def __init__(self, parent_widget, width=300, height=40, margin=20, spacing=10, lifetime=5000,
+                 max_toasts=10, anim_duration=300, move_duration=200, fade_duration=250, top_inset=None):
+        super().__init__(parent_widget)
+        self.widget = parent_widget
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.spacing = spacing
+        self.lifetime = lifetime
+        self.max_toasts = max_toasts
+        self.anim_duration = anim_duration
+        self.move_duration = move_duration
+        self.fade_duration = fade_duration
+        self.top_inset = top_inset or (lambda: 32)
+
+        self.font = QFont("Microsoft YaHei", 12)
+        self.metrics = QFontMetrics(self.font)
+        self._elided = {}
+
+        self.active = []       # 显示中的提示，最新的在前
+        self._fading = []
+        self._idle = []
+        self._by_message = {}
+
+        self._layout_timer = QTimer(self)
+        self._layout_timer.setObjectName("toastLayoutTimer")
+        self._layout_timer.setSingleShot(True)
+        self._layout_timer.setInterval(self.FRAME_INTERVAL)
+        self._layout_timer.timeout.connect(self._layout)
+
+        self.stats = {"shown": 0, "coalesced": 0, "labels_created": 0, "layout_passes": 0, "animations": 0}
+
+    def fading_count(self):
+        """正在淡出的提示数"""
+        return len(self._fading)
+
+    def idle_count(self):
+        """已隐藏、等待复用的标签数"""
+        return len(self._idle)
+
+    def _elide(self, message, count):
+        suffix = f" ×{count}" if count > 1 else ""
+        key = (message, suffix)
+        text = self._elided.get(key)
+        if text is None:
+            available = self.width - 30 - self.metrics.horizontalAdvance(suffix)
+            text = self.metrics.elidedText(message, Qt.ElideRight, available) + suffix
+            if len(self._elided) > 512:
+                self._elided.clear()
+            self._elided[key] = text
+        return text
+
+    def show(self, message):
+        self.stats["shown"] += 1
+        toast = self._by_message.get(message)
+        if toast is not None:
+            toast.count += 1
+            toast.label.setText(self._elide(message, toast.count))
+            toast.timer.start(self.lifetime)
+            self.stats["coalesced"] += 1
+            return
+
+        while len(self.active) >= self.max_toasts:
+            self._fade(self.active[-1])
+
+        toast = self._acquire()
+        toast.message = message
+        toast.count = 1
+        toast.shown = False
+        toast.target = None
+        toast.label.setText(self._elide(message, 1))
+        toast.timer.start(self.lifetime)
+        self.active.insert(0, toast)
+        self._by_message[message] = toast
+        self._schedule_layout()
+
+    def _acquire(self):
+        if self._idle:
+            return self._idle.pop()
+        toast = _Toast(self, self.widget)
+        toast.timer.timeout.connect(lambda: self._fade(toast))
+        toast.fade_group.finished.connect(lambda: self._recycle(toast))
+        self.stats["labels_created"] += 1
+        return toast
+
+    def _schedule_layout(self):
+        if not self._layout_timer.isActive():
+            self._layout_timer.start()
+
+    def _layout(self):
+        self.stats["layout_passes"] += 1
+        w, h = self.widget.width(), self.widget.height()
+        x = w - self.width - self.margin
+        min_y = self.top_inset() + self.margin
+        for idx, toast in enumerate(self.active):
+            target = QPoint(x, max(min_y, h - self.height - self.margin - idx * (self.height + self.spacing)))
+            if toast.target == target:
+                continue
+            toast.target = target
+            duration = self.move_duration
+            if not toast.shown:
+                toast.shown = True
+                toast.label.move(target.x(), target.y() + 60)
+                toast.label.show()
+                toast.label.raise_()
+                duration = self.anim_duration
+            toast.move_anim.stop()
+            toast.move_anim.setDuration(duration)
+            toast.move_anim.setStartValue(toast.label.pos())
+            toast.move_anim.setEndValue(target)
+            toast.move_anim.start()
+            self.stats["animations"] += 1
+
+    def _fade(self, toast):
+        if toast.fading or toast not in self.active:
+            return
+        self.active.remove(toast)
+        if self._by_message.get(toast.message) is toast:
+            del self._by_message[toast.message]
+        toast.timer.stop()
+        self._schedule_layout()
+        if not toast.shown:
+            # 还没画到屏幕上就被挤掉的提示，直接回收，不播放动画
+            self._recycle(toast)
+            return
+        while len(self._fading) >= self.max_toasts:
+            oldest = self._fading[0]
+            oldest.fade_group.stop()
+            self._recycle(oldest)
+
+        toast.fading = True
+        self._fading.append(toast)
+        toast.move_anim.stop()
+        toast.label.setText("")
+        # 淡出时的样式写在主题的 #toastLabel[fading="true"] 中，只重新套用这个控件的样式
+        set_state(toast.label, "fading", True)
+        start_geom = toast.label.geometry()
+        center = start_geom.center()
+        end_width = max(1, start_geom.width() // 2)
+        end_height = start_geom.height()
+        toast.shrink_anim.setStartValue(start_geom)
+        toast.shrink_anim.setEndValue(QRect(center.x() - end_width // 2, center.y() - end_height // 2,
+                                            end_width, end_height))
+        toast.shrink_anim.setDuration(self.fade_duration)
+        toast.fade_anim.setDuration(self.fade_duration)
+        toast.effect.setEnabled(True)
+        toast.fade_group.start()
+        self.stats["animations"] += 1
+
+    def _recycle(self, toast):
+        if toast in self._fading:
+            self._fading.remove(toast)
+        label = toast.label
+        label.hide()
+        if toast.fading:
+            toast.fading = False
+            toast.effect.setEnabled(False)
+            toast.effect.setOpacity(1.0)
+            set_state(label, "fading", False)
+        toast.message = ""
+        toast.target = None
+        self._idle.append(toast)
+
+    def clear(self):
+        for toast in list(self.active):
+            toast.timer.stop()
+            self.active.remove(toast)
+            self._recycle(toast)
+        for toast in list(self._fading):
+            toast.fade_group.stop()
+            self._recycle(toast)
+        self._by_message.clear()
@@ -0,0 +1,82 @@
+"""多线程校验本地游戏文件"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from rtang.hashing import hash_file
+from rtang.ledger import LedgerRecord, stat_record
+from rtang.manifest import local_path
+
+
+class ProgressCounter:
+    """线程安全的字节计数器，回调在工作线程中调用"""
+
+    def __init__(self, total, callback=None):
+        self.total = total
+        self.done = 0
+        self._callback = callback
+        self._lock = threading.Lock()
+
+    def add(self, n):
+        with self._lock:
+            self.done += n
+            done = self.done
+        if self._callback is not None:
+            self._callback(done, self.total)
+
+
+def check_entry(root, entry, progress=None, cancel=None, known=None):
+    """
+    校验单个文件，返回 (是否完好, 需写入账本的 LedgerRecord 或 None)。
+    缺失或大小不符直接判为损坏；账本中的大小、mtime、inode 和哈希都一致时跳过哈希计算。
+    """
+    path = local_path(root, entry)
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    if st is None or st.st_size != entry.size:
+        if progress is not None:
+            progress.add(entry.size)
+        return False, None
+    current = LedgerRecord(st.st_size, st.st_mtime_ns, st.st_ino, entry.algo, entry.digest)
+    if known is not None and known.get(path) == current:
+        if progress is not None:
+            progress.add(entry.size)
+        return True, None
+    try:
+        ok = hash_file(path, entry.algo, progress, cancel) == entry.digest
+    except OSError:
+        return False, None
+    return ok, current if ok else None
+
+
+def verify_files(root, entries, max_workers=None, callback=None, cancel=None, ledger=None, full=False):
+    """
+    并行校验 entries，返回缺失或损坏的条目列表；callback(done_bytes, total_bytes)。
+    传入 ledger 时只重新哈希元数据有变化的文件，full=True 则忽略账本全部重算并刷新账本。
+    """
+    root = os.path.abspath(root)
+    known = ledger.lookup(root) if ledger is not None and not full else None
+    progress = ProgressCounter(sum(e.size for e in entries), callback)
+    workers = max_workers or min(8, (os.cpu_count() or 1) + 2)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify") as pool:
+        results = list(pool.map(lambda e: check_entry(root, e, progress, cancel, known), entries))
+    bad = [entry for entry, (ok, _) in zip(entries, results) if not ok]
+    if ledger is not None and not (cancel is not None and cancel.is_set()):
+        ledger.record([(local_path(root, e), rec) for e, (_, rec) in zip(entries, results) if rec is not None])
+        ledger.forget([local_path(root, e) for e in bad])
+    return bad
+
+
+def record_entries(ledger, root, entries):
+    """把刚下载并校验过的文件写入账本，下次启动无需再算哈希"""
+    root = os.path.abspath(root)
+    rows = []
+    for entry in entries:
+        path = local_path(root, entry)
+        try:
+            rows.append((path, stat_record(path, entry.algo, entry.digest)))
+        except OSError:
+            continue
+    ledger.record(rows)
@@ -0,0 +1,133 @@
+"""播放栏的波形进度条，以及把后台分析结果送回 GUI 线程的桥"""
+from PySide6.QtCore import QObject, QRectF, Qt, Property, Signal
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtWidgets import QWidget
+
+
+class AnalysisBridge(QObject):
+    """AudioAnalyzer 的回调可能在进程池的后台线程执行，经排队信号送回 GUI 线程"""
+    result_ready = Signal(str, object)
+
+
+class WaveformSeekBar(QWidget):
+    """
+    有分析结果时画出整首曲目的波形，已播放部分用 playedColor；没有时画成普通的圆角进度条。
+    点击或拖动跳转，松开鼠标时发出 seek_requested(0..1)。颜色可在 QSS 中用 qproperty-waveColor 等设置。
+    位置变化只重绘新旧播放位置之间的像素。
+    """
+    seek_requested = Signal(float)
+
+    BAR_WIDTH = 2
+    BAR_GAP = 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setCursor(Qt.PointingHandCursor)
+        self._wave_color = QColor("#FFC9D6")
+        self._played_color = QColor("#FF8AAE")
+        self._waveform = None
+        self._bars = None
+        self._fraction = 0.0
+        self._dragging = False
+
+    def _get_wave_color(self):
+        return self._wave_color
+
+    def _set_wave_color(self, color):
+        self._wave_color = QColor(color)
+        self.update()
+
+    def _get_played_color(self):
+        return self._played_color
+
+    def _set_played_color(self, color):
+        self._played_color = QColor(color)
+        self.update()
+
+    waveColor = Property(QColor, _get_wave_color, _set_wave_color)
+    playedColor = Property(QColor, _get_played_color, _set_played_color)
+
+    def set_waveform(self, waveform):
+        """waveform 为 0..255 的峰值序列，None 时退回普通进度条"""
+        self._waveform = bytes(waveform) if waveform is not None else None
+        self._bars = None
+        self.update()
+
+    def fraction(self):
+        return self._fraction
+
+    def set_fraction(self, fraction):
+        if self._dragging:
+            return
+        self._move_to(min(1.0, max(0.0, fraction)))
+
+    def _move_to(self, fraction):
+        old_x, new_x = self._x(self._fraction), self._x(fraction)
+        self._fraction = fraction
+        if old_x != new_x:
+            left, right = min(old_x, new_x), max(old_x, new_x)
+            self.update(left - self.BAR_WIDTH - self.BAR_GAP, 0, right - left + 2 * (self.BAR_WIDTH + self.BAR_GAP),
+                        self.height())
+
+    def _x(self, fraction):
+        return round(fraction * self.width())
+
+    def _bar_heights(self):
+        """按控件宽度把波形点按最大值合并为竖条高度（0..1），宽度不变时复用"""
+        count = max(1, self.width() // (self.BAR_WIDTH + self.BAR_GAP))
+        if self._bars is None or len(self._bars) != count:
+            points = self._waveform
+            n = len(points)
+            # 按曲目自身的最大峰值缩放，安静的曲目也能看清起伏
+            top = max(points) or 1
+            self._bars = [max(points[i * n // count:max(i * n // count + 1, (i + 1) * n // count)]) / top
+                          for i in range(count)]
+        return self._bars
+
+    def resizeEvent(self, event):
+        self._bars = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        played_x = self._fraction * self.width()
+        height = self.height()
+        if not self._waveform:
+            radius = min(4.0, height / 4)
+            track = QRectF(0, height * 3 / 8, self.width(), height / 4)
+            painter.setBrush(self._wave_color)
+            painter.drawRoundedRect(track, radius, radius)
+            if played_x > 0:
+                painter.setBrush(self._played_color)
+                painter.drawRoundedRect(QRectF(track.x(), track.y(), played_x, track.height()), radius, radius)
+            return
+        step = self.BAR_WIDTH + self.BAR_GAP
+        first = max(0, event.rect().left() // step - 1)
+        last = event.rect().right() // step + 1
+        mid = height / 2
+        for i, level in enumerate(self._bar_heights()[first:last], first):
+            x = i * step
+            # 静音处也留一条细线，看得出曲目的长度
+            h = max(2.0, level * height)
+            painter.fillRect(QRectF(x, mid - h / 2, self.BAR_WIDTH, h),
+                             self._played_color if x < played_x else self._wave_color)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._dragging = True
+            self._move_to(self._fraction_at(event))
+
+    def mouseMoveEvent(self, event):
+        if self._dragging:
+            self._move_to(self._fraction_at(event))
+
+    def mouseReleaseEvent(self, event):
+        if self._dragging and event.button() == Qt.LeftButton:
+            self._dragging = False
+            self._move_to(self._fraction_at(event))
+            self.seek_requested.emit(self._fraction)
+
+    def _fraction_at(self, event):
+        return min(1.0, max(0.0, event.position().x() / max(1, self.width())))